@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from audit.partitions import archive_expired, ensure_partitions
+
+
+class Command(BaseCommand):
+  help = "Create upcoming audit partitions and archive months past the retention horizon."
+
+  def add_arguments(self, parser):
+    parser.add_argument("--retention-months", type=int, default=None, help="Months to keep (default: AUDIT_RETENTION_MONTHS)")
+    parser.add_argument("--archive-dir", default=None, help="Where to write .jsonl.gz files (default: AUDIT_ARCHIVE_DIR)")
+
+  def handle(self, *args, **options):
+    created = ensure_partitions()
+    if created:
+      self.stdout.write(f"Partitions ready: {', '.join(created)}")
+    for path in archive_expired(retention_months=options["retention_months"], archive_dir=options["archive_dir"]):
+      self.stdout.write(f"Archived {path}")
+    self.stdout.write(self.style.SUCCESS("Audit maintenance done"))
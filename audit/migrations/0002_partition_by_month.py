@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+from audit.partitions import partition_audit_table, unpartition_audit_table
+
+
+class Migration(migrations.Migration):
+
+  dependencies = [
+    ("audit", "0001_initial"),
+  ]
+
+  operations = [
+    migrations.RunPython(partition_audit_table, unpartition_audit_table),
+    migrations.AddIndex(
+      model_name="auditevent",
+      index=models.Index(fields=["object_type", "object_id", "created_at"], name="auditevent_object_idx"),
+    ),
+  ]
@@ -1,9 +1,22 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from common.models import TimeStampedModel
 
 
+class AuditEventQuerySet(models.QuerySet):
+  def between(self, start, end=None):
+    """Bound on `created_at`, which lets Postgres prune to the partitions covering the window."""
+    queryset = self.filter(created_at__gte=start)
+    return queryset.filter(created_at__lt=end) if end is not None else queryset
+
+  def for_object(self, obj=None, object_type: str = "", object_id=""):
+    if obj is not None:
+      object_type, object_id = obj._meta.label, obj.pk
+    return self.filter(object_type=object_type, object_id=str(object_id))
+
+
 class AuditEvent(TimeStampedModel):
   actor = models.ForeignKey(
     settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="audit_events"
@@ -12,6 +25,15 @@ class AuditEvent(TimeStampedModel):
   object_type = models.CharField(max_length=128, blank=True)
   object_id = models.CharField(max_length=64, blank=True)
   metadata = models.JSONField(default=dict, blank=True)
+  # Not auto_now_add: the writer stamps events when they are queued, and bulk_create
+  # would otherwise overwrite that with the (later) flush time.
+  created_at = models.DateTimeField(default=timezone.now)
+
+  objects = AuditEventQuerySet.as_manager()
+
+  class Meta:
+    # On Postgres the table is range-partitioned by month on created_at (see audit.partitions).
+    indexes = [models.Index(fields=["object_type", "object_id", "created_at"], name="auditevent_object_idx")]
 
   def __str__(self) -> str:
     return f"{self.action} by {self.actor}"
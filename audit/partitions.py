@@ -0,0 +1,273 @@
+"""
+Monthly range partitioning of `audit_auditevent` on `created_at` (Postgres)
+and archival of expired months to gzipped JSON-lines files.
+
+On Postgres the table is partitioned by the 0002 migration: one partition
+per UTC month plus a default partition, primary key `(id, created_at)`.
+Expired partitions are exported, detached and dropped. On other databases
+the table stays plain and expired rows are exported and deleted instead.
+"""
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from common.db import is_postgres
+
+logger = logging.getLogger(__name__)
+
+TABLE = "audit_auditevent"
+LEGACY_TABLE = f"{TABLE}_legacy"
+SEQUENCE = f"{TABLE}_partitioned_id_seq"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+ARCHIVE_FIELDS = ("id", "created_at", "updated_at", "actor_id", "action", "object_type", "object_id", "metadata")
+
+
+def month_start(value) -> date:
+  return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+  index = month.year * 12 + month.month - 1 + count
+  return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bound(month: date) -> datetime:
+  return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month: date) -> str:
+  return f"{TABLE}_p{month:%Y_%m}"
+
+
+def _create_partition(cursor, month: date) -> None:
+  cursor.execute(
+    f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+    f"FOR VALUES FROM ('{month_bound(month).isoformat()}') TO ('{month_bound(add_months(month, 1)).isoformat()}')"
+  )
+
+
+def _ensure_partition(cursor, month: date) -> None:
+  """
+  Create the partition for `month`. Postgres refuses to while the default
+  partition holds rows in that range, so those are moved across: detach the
+  default, create the partition, move the rows, reattach.
+  """
+  cursor.execute("SELECT to_regclass(%s)", [partition_name(month)])
+  if cursor.fetchone()[0] is not None:
+    return
+  lower, upper = month_bound(month), month_bound(add_months(month, 1))
+  cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)", [lower, upper])
+  if not cursor.fetchone()[0]:
+    _create_partition(cursor, month)
+    return
+  cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+  _create_partition(cursor, month)
+  cursor.execute(
+    f"INSERT INTO {partition_name(month)} SELECT * FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s",
+    [lower, upper],
+  )
+  cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s", [lower, upper])
+  moved = cursor.rowcount
+  cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+  logger.info("Moved %d audit events from the default partition into %s", moved, partition_name(month))
+
+
+def _current_month() -> date:
+  return month_start(timezone.now().astimezone(dt_timezone.utc))
+
+
+def partition_audit_table(apps, schema_editor) -> None:
+  """Migration step: rebuild the plain table as a partitioned one, keeping rows, indexes and FKs."""
+  if not is_postgres(schema_editor.connection):
+    return
+  with schema_editor.connection.cursor() as cursor:
+    cursor.execute(
+      "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+      [TABLE, f"{TABLE}_pkey"],
+    )
+    index_defs = cursor.fetchall()
+    cursor.execute(
+      "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+      [TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f"SELECT min(created_at), max(id) FROM {TABLE}")
+    oldest, last_id = cursor.fetchone()
+
+    for name, _ in foreign_keys:
+      cursor.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT {name}")
+    for name, _ in index_defs:
+      cursor.execute(f"DROP INDEX {name}")
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+    cursor.execute(f"ALTER INDEX {TABLE}_pkey RENAME TO {LEGACY_TABLE}_pkey")
+
+    cursor.execute(f"CREATE SEQUENCE {SEQUENCE}")
+    cursor.execute(f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+    cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+    month = month_start(oldest.astimezone(dt_timezone.utc)) if oldest else _current_month()
+    while month <= add_months(_current_month(), settings.AUDIT_PARTITION_MONTHS_AHEAD):
+      _create_partition(cursor, month)
+      month = add_months(month, 1)
+
+    cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")
+    if last_id:
+      cursor.execute(f"SELECT setval('{SEQUENCE}', %s)", [last_id])
+    cursor.execute(f"DROP TABLE {LEGACY_TABLE}")
+
+    for name, definition in foreign_keys:
+      cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+    for _, definition in index_defs:
+      cursor.execute(definition)
+
+
+def unpartition_audit_table(apps, schema_editor) -> None:
+  """Reverse of `partition_audit_table`: back to one plain table keyed on `id`."""
+  if not is_postgres(schema_editor.connection):
+    return
+  with schema_editor.connection.cursor() as cursor:
+    cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s", [TABLE, f"{TABLE}_pkey"])
+    index_defs = cursor.fetchall()
+    cursor.execute(
+      "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+      [TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+
+    for name, _ in foreign_keys:
+      cursor.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT {name}")
+    for name, _ in index_defs:
+      cursor.execute(f"DROP INDEX {name}")
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+    cursor.execute(f"ALTER INDEX {TABLE}_pkey RENAME TO {LEGACY_TABLE}_pkey")
+    cursor.execute(f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS)")
+    cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)")
+    cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")
+    cursor.execute(f"DROP TABLE {LEGACY_TABLE} CASCADE")
+
+    for name, definition in foreign_keys:
+      cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+    for _, definition in index_defs:
+      cursor.execute(definition)
+
+
+def ensure_partitions(months_ahead: Optional[int] = None) -> List[str]:
+  """Create partitions from this month through `months_ahead` months out (Postgres only)."""
+  if not is_postgres(connection):
+    return []
+  months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+  months = [add_months(_current_month(), offset) for offset in range(months_ahead + 1)]
+  created = []
+  for month in months:
+    try:
+      with transaction.atomic(), connection.cursor() as cursor:
+        _ensure_partition(cursor, month)
+    except DatabaseError:
+      # One bad month must not stop the rest; the next run retries it.
+      logger.exception("Could not create audit partition %s", partition_name(month))
+      continue
+    created.append(partition_name(month))
+  return created
+
+
+def _archive_path(archive_dir: Path, month: date) -> Path:
+  path = archive_dir / f"audit-{month:%Y-%m}.jsonl.gz"
+  if path.exists():
+    # A second export for the same month (e.g. stragglers from the default partition).
+    path = archive_dir / f"audit-{month:%Y-%m}-{timezone.now():%Y%m%d%H%M%S}.jsonl.gz"
+  return path
+
+
+def export_month(month: date, archive_dir: Path) -> Optional[Path]:
+  """Stream one month of events into a gzipped JSON-lines file; None when the month is empty."""
+  from .models import AuditEvent
+
+  rows = (
+    AuditEvent.objects.between(month_bound(month), month_bound(add_months(month, 1)))
+    .order_by("created_at", "id")
+    .values(*ARCHIVE_FIELDS)
+  )
+  archive_dir.mkdir(parents=True, exist_ok=True)
+  path = _archive_path(archive_dir, month)
+  partial = path.with_name(path.name + ".part")
+  count = 0
+  with gzip.open(partial, "wt", encoding="utf-8") as handle:
+    for row in rows.iterator(chunk_size=2000):
+      handle.write(json.dumps(row, cls=DjangoJSONEncoder))
+      handle.write("\n")
+      count += 1
+  if not count:
+    partial.unlink()
+    return None
+  os.replace(partial, path)
+  logger.info("Archived %d audit events for %s to %s", count, month, path)
+  return path
+
+
+def _postgres_partition_months(cursor) -> List[date]:
+  cursor.execute(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+    [TABLE],
+  )
+  months = []
+  for (name,) in cursor.fetchall():
+    match = PARTITION_RE.match(name)
+    if match:
+      months.append(date(int(match.group(1)), int(match.group(2)), 1))
+  return sorted(months)
+
+
+def archive_expired(retention_months: Optional[int] = None, archive_dir: Optional[Path] = None) -> List[Path]:
+  """
+  Export every month older than the retention horizon, then drop it: whole
+  partitions are detached and dropped on Postgres, anything else (the default
+  partition, or the plain table elsewhere) is deleted by range.
+  """
+  from .models import AuditEvent
+
+  retention_months = settings.AUDIT_RETENTION_MONTHS if retention_months is None else retention_months
+  archive_dir = Path(archive_dir or settings.AUDIT_ARCHIVE_DIR)
+  horizon = add_months(_current_month(), -retention_months)
+  written: List[Path] = []
+
+  if is_postgres(connection):
+    with connection.cursor() as cursor:
+      expired = [month for month in _postgres_partition_months(cursor) if month < horizon]
+    for month in expired:
+      path = export_month(month, archive_dir)
+      if path:
+        written.append(path)
+      with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {partition_name(month)}")
+        cursor.execute(f"DROP TABLE {partition_name(month)}")
+
+  oldest = AuditEvent.objects.filter(created_at__lt=month_bound(horizon)).aggregate(oldest=Min("created_at"))["oldest"]
+  month = month_start(oldest.astimezone(dt_timezone.utc)) if oldest else horizon
+  while month < horizon:
+    path = export_month(month, archive_dir)
+    if path:
+      written.append(path)
+      AuditEvent.objects.between(month_bound(month), month_bound(add_months(month, 1))).delete()
+    month = add_months(month, 1)
+  return written
+
+
+def maintain() -> dict:
+  created = ensure_partitions()
+  archived = archive_expired()
+  return {"partitions": created, "archived": [str(path) for path in archived]}
@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from .models import AuditEvent
+from .partitions import maintain
+
+
+@shared_task
+def write_audit_events(events):
+  AuditEvent.objects.bulk_create([AuditEvent(**event) for event in events], batch_size=500)
+  return len(events)
+
+
+@shared_task
+def maintain_audit_partitions():
+  return maintain()
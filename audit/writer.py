@@ -0,0 +1,152 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _write_events(events: List[Dict]) -> None:
+  if settings.AUDIT_WRITER == "celery":
+    from .tasks import write_audit_events
+
+    write_audit_events.delay([{**event, "created_at": event["created_at"].isoformat()} for event in events])
+  else:
+    AuditEvent.objects.bulk_create([AuditEvent(**event) for event in events], batch_size=500)
+
+
+class AuditBuffer:
+  """
+  In-process queue of pending audit events.
+
+  A daemon thread flushes with one `bulk_create` every `flush_interval`
+  seconds, or sooner once `batch_size` events are waiting. If writes fall
+  behind and `max_pending` events pile up, the caller that hits the limit
+  flushes synchronously, so request threads slow down instead of the buffer
+  growing without bound. Pending events are flushed at interpreter exit.
+  Events are stamped with `created_at` when queued, so order holds across
+  buffers and processes. If the database stays unreachable, the oldest
+  events past `max_pending` are dropped, logged and counted in `dropped`.
+  """
+
+  def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.max_pending = max_pending
+    self._events: Deque[Dict] = deque()
+    self._lock = threading.Lock()
+    self._flush_lock = threading.Lock()
+    self._wake = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+    self._pid: Optional[int] = None
+    self.dropped = 0
+
+  def add(self, event: Dict) -> None:
+    event.setdefault("created_at", timezone.now())
+    self._ensure_worker()
+    with self._lock:
+      self._events.append(event)
+      pending = len(self._events)
+    if pending >= self.max_pending:
+      self.flush()
+    elif pending >= self.batch_size:
+      self._wake.set()
+
+  def flush(self) -> int:
+    written = 0
+    with self._flush_lock:
+      while True:
+        with self._lock:
+          batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+        if not batch:
+          return written
+        try:
+          _write_events(batch)
+        except Exception:
+          logger.exception("Writing %d audit events failed; keeping them for the next flush", len(batch))
+          with self._lock:
+            self._events.extendleft(reversed(batch))
+            dropped = 0
+            while len(self._events) > self.max_pending:
+              self._events.popleft()
+              dropped += 1
+            self.dropped += dropped
+          if dropped:
+            logger.error(
+              "Audit buffer over %d events; dropped the %d oldest (%d dropped so far in this process)",
+              self.max_pending,
+              dropped,
+              self.dropped,
+            )
+          return written
+        written += len(batch)
+
+  def _ensure_worker(self) -> None:
+    # Lazily started, and restarted in children of forking servers (the thread doesn't survive fork).
+    if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+      return
+    with self._lock:
+      if self._pid != os.getpid():
+        self._events.clear()
+        self._pid = os.getpid()
+        self._thread = None
+      if self._thread is None or not self._thread.is_alive():
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+  def _run(self) -> None:
+    while True:
+      self._wake.wait(self.flush_interval)
+      self._wake.clear()
+      try:
+        self.flush()
+      finally:
+        close_old_connections()
+
+
+_buffer = AuditBuffer(
+  batch_size=settings.AUDIT_BATCH_SIZE,
+  flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+  max_pending=settings.AUDIT_MAX_PENDING,
+)
+atexit.register(_buffer.flush)
+
+
+def flush() -> int:
+  """Write out everything buffered in this process; returns the number written."""
+  return _buffer.flush()
+
+
+def record(
+  action: str,
+  obj=None,
+  actor=None,
+  metadata: Optional[Dict] = None,
+  object_type: str = "",
+  object_id="",
+) -> None:
+  """
+  Queue an audit event for `obj` (or an explicit `object_type`/`object_id`
+  when only the key is at hand). Cheap enough to call inside request
+  handling; the row is written later in a batch. Inside a transaction the
+  event is only queued once it commits, so rolled-back work leaves no trail.
+  """
+  event = {
+    "actor_id": actor.pk if actor is not None and actor.is_authenticated else None,
+    "action": action,
+    "object_type": obj._meta.label if obj is not None else object_type,
+    "object_id": str(obj.pk if obj is not None else object_id),
+    "metadata": metadata or {},
+  }
+  if settings.AUDIT_WRITER == "sync":
+    transaction.on_commit(lambda: _write_events([event]))
+  else:
+    transaction.on_commit(lambda: _buffer.add(event))
@@ -0,0 +1,185 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import permissions, serializers, viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class UpdatedAtCursorPagination(CursorPagination):
+  """
+  Stable cursor over `updated_at`. Oldest first, so a poller can keep the
+  `next` link from its last sync and only ever read forward.
+  """
+
+  ordering = ("updated_at", "id")
+  page_size = 100
+  page_size_query_param = "page_size"
+  max_page_size = 1000
+
+
+class RolePermission(permissions.IsAuthenticated):
+  """Mirror `web.decorators.role_required` using the view's `allowed_roles`."""
+
+  def has_permission(self, request, view):
+    if not super().has_permission(request, view):
+      return False
+    allowed = getattr(view, "allowed_roles", None)
+    return not allowed or request.user.is_superuser or request.user.role in allowed
+
+
+class SparseFieldsSerializer(serializers.ModelSerializer):
+  """
+  Accepts a `fields` kwarg limiting the rendered fields. Fields listed in
+  `Meta.expandable_fields` are only rendered when asked for by name.
+
+  `Meta.select_related`, `Meta.prefetch_related` and `Meta.annotations` map a
+  field name to what it needs from the queryset, so a viewset can load only
+  the relations the requested fields will touch.
+
+  `Meta.validator_relations` maps a field to the relation whose rows it
+  renders (nested lines, a parent's number, totals over lines), so the
+  viewset's ETag also changes when only those rows change.
+  """
+
+  def __init__(self, *args, fields=None, **kwargs):
+    super().__init__(*args, **kwargs)
+    wanted = self.resolve_fields(fields)
+    for name in list(self.fields):
+      if name not in wanted:
+        self.fields.pop(name)
+
+  @classmethod
+  def resolve_fields(cls, requested=None):
+    available = list(cls.Meta.fields)
+    if requested:
+      return [name for name in available if name in requested]
+    expandable = set(getattr(cls.Meta, "expandable_fields", ()))
+    return [name for name in available if name not in expandable]
+
+  @classmethod
+  def validator_relations(cls, fields):
+    relations = getattr(cls.Meta, "validator_relations", {})
+    return sorted({relations[f] for f in fields if f in relations})
+
+  @classmethod
+  def setup_eager_loading(cls, queryset, fields):
+    select = {cls.Meta.select_related[f] for f in fields if f in getattr(cls.Meta, "select_related", {})}
+    prefetch = {cls.Meta.prefetch_related[f] for f in fields if f in getattr(cls.Meta, "prefetch_related", {})}
+    annotations = {cls.Meta.annotations[f] for f in fields if f in getattr(cls.Meta, "annotations", {})}
+    if select:
+      queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+      queryset = queryset.prefetch_related(*sorted(prefetch))
+    for method in sorted(annotations):
+      queryset = getattr(queryset, method)()
+    return queryset
+
+
+class SyncReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+  """
+  Read-only viewset for integrations that poll for deltas.
+
+  - `?fields=a,b` selects a sparse field set (and only loads what it needs)
+  - `?updated_at__gte=<iso>` narrows to recent changes
+  - list and detail responses carry ETag/Last-Modified and honour
+    If-None-Match/If-Modified-Since with a 304. A list ETag covers only the
+    rows on the requested page (id and `updated_at` to the microsecond) and
+    its `next` link, so checking it costs one page however large the table
+    is. Prefer it over Last-Modified, which HTTP limits to whole seconds.
+
+  Child rows are folded into the validators rather than touching the parent
+  on every child write (bulk and `F()` updates would skip that): for each
+  relation the requested fields render (`Meta.validator_relations`), the
+  newest child `updated_at` and the child count are part of the ETag and
+  Last-Modified, so editing, adding or deleting a line is never a stale 304.
+  `updated_at__gte` still filters on the parent's own timestamp, though: set-based
+  child updates touch the parent where they happen (receipt imports, due bill
+  checklists), but to see every line change poll the child endpoint itself
+  (e.g. `/api/invoice-lines/`).
+  """
+
+  permission_classes = [RolePermission]
+  pagination_class = UpdatedAtCursorPagination
+  filterset_fields = {"updated_at": ["gte", "lt"]}
+  ordering_fields = ["updated_at", "id"]
+  allowed_roles = None
+
+  def requested_fields(self):
+    raw = self.request.query_params.get("fields", "")
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    return self.get_serializer_class().resolve_fields(requested)
+
+  def get_queryset(self):
+    queryset = super().get_queryset()
+    return self.get_serializer_class().setup_eager_loading(queryset, self.requested_fields())
+
+  def get_serializer(self, *args, **kwargs):
+    kwargs.setdefault("fields", self.requested_fields())
+    return super().get_serializer(*args, **kwargs)
+
+  def _child_state(self, queryset):
+    """Fingerprint and newest `updated_at` of the related rows the response embeds."""
+    relations = self.get_serializer_class().validator_relations(self.requested_fields())
+    if not relations:
+      return "", None
+    aggregates = {}
+    for index, relation in enumerate(relations):
+      aggregates[f"last_{index}"] = Max(f"{relation}__updated_at")
+      aggregates[f"count_{index}"] = Count(relation, distinct=True)
+    state = queryset.order_by().aggregate(**aggregates)
+    lasts = [state[f"last_{index}"] for index in range(len(relations))]
+    fingerprint = "|".join(
+      f"{relation}={last.isoformat() if last else ''}:{state[f'count_{index}']}"
+      for index, (relation, last) in enumerate(zip(relations, lasts))
+    )
+    return fingerprint, max((last for last in lasts if last), default=None)
+
+  def _validators(self, queryset, last, own_fingerprint):
+    child_fingerprint, child_last = self._child_state(queryset)
+    if child_last and (last is None or child_last > last):
+      last = child_last
+    return f"{own_fingerprint}|{child_fingerprint}", last
+
+  def _not_modified(self, request, fingerprint, last_modified):
+    etag = quote_etag(hashlib.md5(f"{fingerprint}|{request.get_full_path()}".encode()).hexdigest())
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    return etag, last_modified_ts, get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+
+  def _with_validators(self, response, etag, last_modified_ts):
+    response["ETag"] = etag
+    if last_modified_ts is not None:
+      response["Last-Modified"] = http_date(last_modified_ts)
+    return response
+
+  def list(self, request, *args, **kwargs):
+    # The page is cut from bare (id, updated_at) rows; validators come from those rows and the
+    # children they embed, and the eager-loaded rows are only fetched when there is no 304.
+    keys = self.paginate_queryset(self.filter_queryset(super().get_queryset()).only("id", "updated_at"))
+    ids = [row.pk for row in keys]
+    own = ",".join(f"{row.pk}:{row.updated_at.isoformat()}" for row in keys)
+    last = max((row.updated_at for row in keys), default=None)
+    fingerprint, last = self._validators(
+      super().get_queryset().filter(pk__in=ids), last, f"{own}|{self.paginator.get_next_link() or ''}"
+    )
+    etag, last_ts, not_modified = self._not_modified(request, fingerprint, last)
+    if not_modified is not None:
+      return not_modified
+
+    rows = self.get_queryset().in_bulk(ids)
+    serializer = self.get_serializer([rows[pk] for pk in ids if pk in rows], many=True)
+    return self._with_validators(self.get_paginated_response(serializer.data), etag, last_ts)
+
+  def retrieve(self, request, *args, **kwargs):
+    instance = self.get_object()
+    fingerprint, last = self._validators(
+      super().get_queryset().filter(pk=instance.pk),
+      instance.updated_at,
+      f"{instance.pk}:{instance.updated_at.isoformat()}",
+    )
+    etag, last_ts, not_modified = self._not_modified(request, fingerprint, last)
+    if not_modified is not None:
+      return not_modified
+    return self._with_validators(Response(self.get_serializer(instance).data), etag, last_ts)
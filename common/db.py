@@ -0,0 +1,71 @@
+from typing import Iterable
+
+from django.db import migrations
+from django.db.models import CharField, Lookup, TextField
+
+
+def is_postgres(connection) -> bool:
+  return connection.vendor == "postgresql"
+
+
+class _LikePattern(Lookup):
+  """
+  Case-insensitive LIKE against the bare column. On Postgres this is
+  `col ILIKE pattern`, which a `gin_trgm_ops` index on the column can serve;
+  Django's `icontains`/`iexact` wrap the column in UPPER(), which it can't.
+  """
+
+  template = "{}"
+
+  def get_db_prep_lookup(self, value, connection):
+    return "%s", [self.template.format(connection.ops.prep_for_like_query(value))]
+
+  def as_sql(self, compiler, connection):
+    lhs, lhs_params = self.process_lhs(compiler, connection)
+    rhs, rhs_params = self.process_rhs(compiler, connection)
+    if is_postgres(connection):
+      # Backslash is already ILIKE's escape character.
+      return f"{lhs} ILIKE {rhs}", lhs_params + rhs_params
+    # SQLite's LIKE is case-insensitive for ASCII.
+    return f"{lhs} LIKE {rhs} ESCAPE '\\'", lhs_params + rhs_params
+
+
+class TrigramContains(_LikePattern):
+  lookup_name = "trgm_contains"
+  template = "%{}%"
+
+
+class TrigramExact(_LikePattern):
+  lookup_name = "trgm_exact"
+
+
+def register_lookups() -> None:
+  for field in (CharField, TextField):
+    field.register_lookup(TrigramContains)
+    field.register_lookup(TrigramExact)
+
+
+def trigram_indexes(table: str, columns: Iterable[str]) -> migrations.RunPython:
+  """
+  GIN trigram indexes so `trgm_contains`/`trgm_exact` lookups stay index-backed on Postgres.
+  SQLite has no equivalent; there the operation is a no-op and lookups scan.
+  Built CONCURRENTLY, so the owning migration must set `atomic = False`.
+  """
+  names = {column: f"{table}_{column}_trgm" for column in columns}
+
+  def forwards(apps, schema_editor):
+    if not is_postgres(schema_editor.connection):
+      return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column, name in names.items():
+      schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"
+      )
+
+  def backwards(apps, schema_editor):
+    if not is_postgres(schema_editor.connection):
+      return
+    for name in names.values():
+      schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+  return migrations.RunPython(forwards, backwards)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class TimeStampedModel(models.Model):
@@ -7,3 +8,22 @@ class TimeStampedModel(models.Model):
 
   class Meta:
     abstract = True
+
+  def touch(self):
+    """
+    Bump `updated_at` without a full save. Templates use it as the version
+    key for cached fragments, so child rows touch their parent on change.
+    """
+    self.updated_at = timezone.now()
+    type(self)._default_manager.filter(pk=self.pk).update(updated_at=self.updated_at)
+
+
+class JobCheckpoint(models.Model):
+  """High-water mark for incremental background jobs, one row per job name."""
+
+  name = models.CharField(max_length=128, unique=True)
+  position = models.BigIntegerField(default=0)
+  last_run_at = models.DateTimeField(null=True, blank=True)
+
+  def __str__(self) -> str:
+    return f"{self.name} @ {self.position}"
@@ -0,0 +1,62 @@
+import io
+import time
+import zipfile
+from typing import BinaryIO, Callable, ContextManager, Iterable, Iterator, Tuple
+
+CHUNK_SIZE = 256 * 1024
+
+# (name inside the archive, callable returning a context manager over a binary file)
+ZipEntry = Tuple[str, Callable[[], ContextManager[BinaryIO]]]
+
+
+class _Sink(io.RawIOBase):
+  """
+  Write-only, unseekable target for `ZipFile`. It only counts and buffers
+  what was written until the generator drains it, so zipfile falls back
+  to data descriptors instead of seeking back to patch headers.
+  """
+
+  def __init__(self):
+    self._chunks = []
+    self._offset = 0
+
+  def writable(self) -> bool:
+    return True
+
+  def write(self, data) -> int:
+    self._chunks.append(bytes(data))
+    self._offset += len(data)
+    return len(data)
+
+  def tell(self) -> int:
+    return self._offset
+
+  def drain(self) -> bytes:
+    data = b"".join(self._chunks)
+    self._chunks.clear()
+    return data
+
+
+def stream_zip(entries: Iterable[ZipEntry], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+  """
+  Build a ZIP on the fly and yield it in pieces, for StreamingHttpResponse.
+  Entries are read and emitted one chunk at a time, so memory stays at about
+  `chunk_size` whatever the archive size, and the first bytes go out as soon
+  as the first entry is opened. Entries are stored, not deflated: PDFs are
+  already compressed. ZIP64 records are added automatically once the archive passes 4 GB.
+  """
+  sink = _Sink()
+  with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+    for name, opener in entries:
+      info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+      with opener() as source, archive.open(info, mode="w") as target:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+          target.write(chunk)
+          data = sink.drain()
+          if data:
+            yield data
+      data = sink.drain()
+      if data:
+        yield data
+  # Central directory, written when the archive closes.
+  yield sink.drain()
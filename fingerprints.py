@@ -0,0 +1,116 @@
+"""
+Page fingerprints, so overlapping statements are only processed once.
+
+Every page of a processed invoice is recorded under two fingerprints: the
+SHA-256 of its content stream (cheap, and a hit means the page's text never
+has to be extracted) and the SHA-256 of its normalized text (survives FCA
+regenerating the PDF). A record says which invoice the page belonged to and
+where; an invoice whose pages all come back in the same order is a
+duplicate and its stored result is reused.
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+from PyPDF2 import PdfReader
+
+from parsers.fca import PARSER_VERSION
+from storage import Storage
+from storage.dedup import content_key, load_result, save_result
+
+FINGERPRINT_PREFIX = "fingerprints"
+INVOICE_RESULT_NAMESPACE = f"invoices-v{PARSER_VERSION}"
+
+# Page counters and print stamps change when a statement is re-issued.
+VOLATILE_RE = re.compile(
+    r"PAGE\s*\d+\s*(?:OF\s*\d+)?|PRINTED\s*:?\s*\S+(?:\s+\d{1,2}:\d{2}(?::\d{2})?)?"
+)
+
+
+def normalize_page_text(text: str) -> str:
+    return " ".join(VOLATILE_RE.sub(" ", text.upper()).split())
+
+
+def text_fingerprint(text: str) -> Optional[str]:
+    normalized = normalize_page_text(text)
+    if not normalized:
+        # Blank pages all look alike.
+        return None
+    return "text-" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def content_fingerprint(reader: PdfReader, index: int) -> Optional[str]:
+    try:
+        contents = reader.pages[index].get_contents()
+        data = contents.get_data() if contents is not None else b""
+    except Exception:  # an unreadable stream just means no cheap fingerprint
+        return None
+    if not data.strip():
+        return None
+    return "content-" + hashlib.sha256(data).hexdigest()
+
+
+def _fingerprint_key(fingerprint: str) -> str:
+    kind, digest = fingerprint.split("-", 1)
+    return content_key(f"{FINGERPRINT_PREFIX}/{kind}", digest, ".json")
+
+
+def _invoice_artifacts(invoice: Dict) -> Iterable[str]:
+    return invoice["files"].values()
+
+
+class PageIndex:
+    """Fingerprint records and per-invoice results kept in artifact storage."""
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+
+    def lookup(self, fingerprint: Optional[str]) -> Optional[Dict]:
+        if not fingerprint:
+            return None
+        key = _fingerprint_key(fingerprint)
+        if not self.storage.exists(key):
+            return None
+        return json.loads(self.storage.read_bytes(key))
+
+    def known_invoice(self, records: List[Optional[Dict]]) -> Optional[str]:
+        """The invoice these page records make up, page for page, or None."""
+        if not records or any(record is None for record in records):
+            return None
+        invoice = records[0]["invoice"]
+        for position, record in enumerate(records):
+            if record["invoice"] != invoice or record["page"] != position or record["pages"] != len(records):
+                return None
+        return invoice
+
+    def load_invoice(self, invoice_key_norm: str) -> Optional[Dict]:
+        # Stale (None) if GC has collected any of its PDFs since.
+        return load_result(self.storage, INVOICE_RESULT_NAMESPACE, invoice_key_norm, _invoice_artifacts)
+
+    def record_invoice(
+        self,
+        invoice: Dict,
+        page_fingerprints: List[List[Optional[str]]],
+        first_text: str,
+        last_text: str,
+    ) -> None:
+        """
+        Store `invoice` and a record for each of its pages. The first and last
+        page keep their text, which is all a re-split needs from them.
+        """
+        invoice_key_norm = invoice["invoice_key_norm"]
+        save_result(self.storage, INVOICE_RESULT_NAMESPACE, invoice_key_norm, invoice)
+        total = len(page_fingerprints)
+        for position, fingerprints in enumerate(page_fingerprints):
+            record = {
+                "invoice": invoice_key_norm,
+                "page": position,
+                "pages": total,
+                "start": position == 0,
+                "text": first_text if position == 0 else last_text if position == total - 1 else None,
+            }
+            payload = json.dumps(record).encode("utf-8")
+            for fingerprint in fingerprints:
+                if fingerprint:
+                    self.storage.save_bytes(_fingerprint_key(fingerprint), payload, "application/json")
@@ -21,8 +21,10 @@
           redis
           psycopg2
           python-dotenv
+          boto3
           uvicorn
           gunicorn
+          pytest
         ]);
       in {
         devShells.default = pkgs.mkShell {
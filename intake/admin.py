@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import IntakeDocument, IntakeMessage
+
+
+@admin.register(IntakeMessage)
+class IntakeMessageAdmin(admin.ModelAdmin):
+  list_display = ("id", "subject", "sender", "status", "attachment_count", "duplicate_count", "processing_ms", "processed_at")
+  list_filter = ("status",)
+  search_fields = ("message_id", "subject", "sender")
+
+
+@admin.register(IntakeDocument)
+class IntakeDocumentAdmin(admin.ModelAdmin):
+  list_display = ("id", "filename", "status", "invoice_count", "size", "message")
+  list_filter = ("status",)
+  search_fields = ("filename", "sha256")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from intake.worker import run_once, watch
+
+
+class Command(BaseCommand):
+  help = "Pull FCA statement PDFs out of the intake maildir and parse them."
+
+  def add_arguments(self, parser):
+    parser.add_argument("--maildir", default=None, help="Maildir to watch (default: INTAKE_MAILDIR)")
+    parser.add_argument("--workers", type=int, default=None, help="Messages processed in parallel (default: INTAKE_MAX_WORKERS)")
+    parser.add_argument("--interval", type=float, default=None, help="Seconds between polls (default: INTAKE_POLL_INTERVAL)")
+    parser.add_argument("--once", action="store_true", help="Process what is there now and exit")
+
+  def handle(self, *args, **options):
+    if options["once"]:
+      processed = run_once(options["maildir"], options["workers"])
+      self.stdout.write(self.style.SUCCESS(f"Processed {processed} messages"))
+      return
+    self.stdout.write("Watching for mail. Ctrl+C to stop.")
+    watch(options["maildir"], options["interval"], options["workers"])
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntakeMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('message_id', models.CharField(max_length=255, unique=True)),
+                ('sender', models.CharField(blank=True, max_length=255)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('processing', 'Processing'), ('processed', 'Processed'), ('no_attachments', 'No PDF attachments'), ('failed', 'Failed')], default='processing', max_length=32)),
+                ('attachment_count', models.PositiveIntegerField(default=0)),
+                ('duplicate_count', models.PositiveIntegerField(default=0)),
+                ('queue_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('processing_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='IntakeDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('file_path', models.CharField(max_length=512)),
+                ('status', models.CharField(choices=[('parsed', 'Parsed'), ('failed', 'Failed')], default='parsed', max_length=32)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='intake.intakemessage')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
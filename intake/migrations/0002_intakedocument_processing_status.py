@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intake', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='intakedocument',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('parsed', 'Parsed'), ('failed', 'Failed')], default='parsed', max_length=32),
+        ),
+    ]
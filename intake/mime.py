@@ -0,0 +1,165 @@
+"""
+Line-oriented MIME walker that spools PDF attachments straight to disk.
+
+`email.message_from_binary_file` keeps every part (base64 text and all) in
+memory; statements with several large PDFs add up. Here only headers are
+parsed with the stdlib parser. Part bodies are decoded line by line into a
+temp file while being hashed, so memory stays flat regardless of
+attachment size.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
+
+
+@dataclass
+class SpooledAttachment:
+  filename: str
+  path: Path
+  sha256: str
+  size: int
+
+
+def read_headers(fp: BinaryIO) -> EmailMessage:
+  lines = []
+  while True:
+    line = fp.readline()
+    if not line or line in (b"\r\n", b"\n"):
+      break
+    lines.append(line)
+  return BytesHeaderParser(policy=policy.default).parsebytes(b"".join(lines))
+
+
+def is_pdf_part(headers: EmailMessage) -> bool:
+  filename = (headers.get_filename() or "").lower()
+  return headers.get_content_type() == "application/pdf" or filename.endswith(".pdf")
+
+
+class _Sink:
+  """Decodes one part body into a spool file, hashing as it goes."""
+
+  def __init__(self, encoding: str, filename: str, spool_dir: Path):
+    self.encoding = encoding
+    self.filename = filename
+    self.spool_dir = spool_dir
+    self.digest = hashlib.sha256()
+    self.size = 0
+    self._pending = b""
+    self._held_eol = b""
+    self._handle = tempfile.NamedTemporaryFile(dir=spool_dir, suffix=".part", delete=False)
+
+  def _write(self, data: bytes) -> None:
+    if data:
+      self._handle.write(data)
+      self.digest.update(data)
+      self.size += len(data)
+
+  def feed(self, line: bytes) -> None:
+    if self.encoding == "base64":
+      self._pending += b"".join(line.split())
+      usable = len(self._pending) // 4 * 4
+      self._write(base64.b64decode(self._pending[:usable]))
+      self._pending = self._pending[usable:]
+    elif self.encoding == "quoted-printable":
+      self._write(binascii.a2b_qp(line))
+    else:
+      # The line break before a boundary belongs to the boundary, so hold each one back a line.
+      body = line.rstrip(b"\r\n")
+      self._write(self._held_eol + body)
+      self._held_eol = line[len(body):]
+
+  def finish(self) -> SpooledAttachment:
+    if self._pending:
+      self._write(base64.b64decode(self._pending + b"=" * (-len(self._pending) % 4)))
+    self._handle.close()
+    sha256 = self.digest.hexdigest()
+    path = self.spool_dir / f"{sha256}.pdf"
+    os.replace(self._handle.name, path)
+    return SpooledAttachment(filename=self.filename, path=path, sha256=sha256, size=self.size)
+
+  def discard(self) -> None:
+    self._handle.close()
+    Path(self._handle.name).unlink(missing_ok=True)
+
+
+def _match_boundary(line: bytes, boundaries: List[bytes]) -> Optional[Tuple[int, bool]]:
+  stripped = line.rstrip()
+  for index in range(len(boundaries) - 1, -1, -1):
+    marker = b"--" + boundaries[index]
+    if stripped == marker:
+      return index, False
+    if stripped == marker + b"--":
+      return index, True
+  return None
+
+
+def _open_sink(headers: EmailMessage, spool_dir: Path) -> _Sink:
+  encoding = str(headers.get("Content-Transfer-Encoding", "7bit")).strip().lower()
+  return _Sink(encoding, headers.get_filename() or "attachment.pdf", spool_dir)
+
+
+def extract_pdf_attachments(
+  fp: BinaryIO, spool_dir: Path, headers: Optional[EmailMessage] = None
+) -> Tuple[EmailMessage, List[SpooledAttachment]]:
+  """
+  Read a message from `fp` and spool every PDF part into `spool_dir` as
+  `<sha256>.pdf`. Pass `headers` if the top-level headers were already read
+  off `fp`. Nested multiparts (e.g. forwarded mail) are followed.
+  """
+  spool_dir.mkdir(parents=True, exist_ok=True)
+  headers = headers if headers is not None else read_headers(fp)
+  attachments: List[SpooledAttachment] = []
+  sink: Optional[_Sink] = None
+
+  try:
+    if headers.get_content_maintype() != "multipart" or not headers.get_boundary():
+      if is_pdf_part(headers):
+        sink = _open_sink(headers, spool_dir)
+        for line in iter(fp.readline, b""):
+          sink.feed(line)
+        attachments.append(sink.finish())
+        sink = None
+      return headers, attachments
+
+    boundaries = [headers.get_boundary().encode("latin-1")]
+    for line in iter(fp.readline, b""):
+      marker = _match_boundary(line, boundaries) if line.startswith(b"--") else None
+      if marker is None:
+        if sink:
+          sink.feed(line)
+        continue
+
+      if sink:
+        attachments.append(sink.finish())
+        sink = None
+      index, closing = marker
+      del boundaries[index + 1:]
+      if closing:
+        boundaries.pop()
+        if not boundaries:
+          break
+        continue
+
+      part = read_headers(fp)
+      if part.get_content_maintype() == "multipart" and part.get_boundary():
+        boundaries.append(part.get_boundary().encode("latin-1"))
+      elif is_pdf_part(part):
+        sink = _open_sink(part, spool_dir)
+
+    if sink:
+      # Truncated message: keep what arrived, the parser will reject it if it's unusable.
+      attachments.append(sink.finish())
+      sink = None
+  finally:
+    if sink:
+      sink.discard()
+
+  return headers, attachments
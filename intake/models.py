@@ -0,0 +1,45 @@
+from django.db import models
+
+from common.models import TimeStampedModel
+
+
+class IntakeMessage(TimeStampedModel):
+  class Status(models.TextChoices):
+    PROCESSING = ("processing", "Processing")
+    PROCESSED = ("processed", "Processed")
+    NO_ATTACHMENTS = ("no_attachments", "No PDF attachments")
+    FAILED = ("failed", "Failed")
+
+  message_id = models.CharField(max_length=255, unique=True)
+  sender = models.CharField(max_length=255, blank=True)
+  subject = models.CharField(max_length=255, blank=True)
+  status = models.CharField(max_length=32, choices=Status.choices, default=Status.PROCESSING)
+  attachment_count = models.PositiveIntegerField(default=0)
+  duplicate_count = models.PositiveIntegerField(default=0)
+  # Time from delivery into the maildir to pickup, and from pickup to done.
+  queue_ms = models.PositiveIntegerField(null=True, blank=True)
+  processing_ms = models.PositiveIntegerField(null=True, blank=True)
+  processed_at = models.DateTimeField(null=True, blank=True)
+  error = models.TextField(blank=True)
+
+  def __str__(self) -> str:
+    return f"{self.subject or self.message_id} ({self.get_status_display()})"
+
+
+class IntakeDocument(TimeStampedModel):
+  class Status(models.TextChoices):
+    PROCESSING = ("processing", "Processing")
+    PARSED = ("parsed", "Parsed")
+    FAILED = ("failed", "Failed")
+
+  message = models.ForeignKey(IntakeMessage, on_delete=models.CASCADE, related_name="documents")
+  filename = models.CharField(max_length=255)
+  sha256 = models.CharField(max_length=64, unique=True)
+  size = models.PositiveBigIntegerField(default=0)
+  file_path = models.CharField(max_length=512)
+  status = models.CharField(max_length=32, choices=Status.choices, default=Status.PARSED)
+  invoice_count = models.PositiveIntegerField(default=0)
+  error = models.TextField(blank=True)
+
+  def __str__(self) -> str:
+    return f"{self.filename} ({self.sha256[:12]})"
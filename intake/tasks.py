@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .worker import run_once
+
+
+@shared_task
+def poll_maildir():
+  return run_once()
@@ -0,0 +1,37 @@
+from datetime import timedelta
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .mime import SpooledAttachment
+from .models import IntakeDocument, IntakeMessage
+from .worker import _claim_document
+
+
+@override_settings(INTAKE_DOCUMENT_LEASE=600)
+class ClaimDocumentTests(TestCase):
+  def setUp(self):
+    self.first = IntakeMessage.objects.create(message_id="<first@example.com>")
+    self.second = IntakeMessage.objects.create(message_id="<second@example.com>")
+    self.attachment = SpooledAttachment(filename="statement.pdf", path=Path("/tmp/statement.pdf"), sha256="a" * 64, size=10)
+    self.document = _claim_document(self.first, self.attachment)
+
+  def _age(self, seconds):
+    IntakeDocument.objects.filter(pk=self.document.pk).update(updated_at=timezone.now() - timedelta(seconds=seconds))
+
+  def test_document_being_parsed_is_a_duplicate(self):
+    self._age(60)
+    self.assertIsNone(_claim_document(self.second, self.attachment))
+
+  def test_document_left_processing_past_the_lease_is_reclaimed(self):
+    self._age(601)
+    document = _claim_document(self.second, self.attachment)
+    self.assertEqual(document.pk, self.document.pk)
+    self.assertEqual(document.message, self.second)
+    self.assertEqual(document.status, IntakeDocument.Status.PROCESSING)
+
+  def test_parsed_document_is_never_reclaimed(self):
+    IntakeDocument.objects.filter(pk=self.document.pk).update(status=IntakeDocument.Status.PARSED)
+    self._age(3600)
+    self.assertIsNone(_claim_document(self.second, self.attachment))
@@ -0,0 +1,184 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from invoices.pipeline import process_statement_pdf
+from .mime import SpooledAttachment, extract_pdf_attachments, read_headers
+from .models import IntakeDocument, IntakeMessage
+
+logger = logging.getLogger(__name__)
+
+
+def pending_messages(maildir: Path) -> List[Path]:
+  """Messages delivered to `new/`, oldest first (maildir: tmp/ -> new/ -> cur/)."""
+  new_dir = maildir / "new"
+  if not new_dir.is_dir():
+    return []
+  paths = [path for path in new_dir.iterdir() if path.is_file() and not path.name.startswith(".")]
+  return sorted(paths, key=lambda path: path.stat().st_mtime)
+
+
+def _file_away(path: Path, maildir: Path, flags: str) -> Path:
+  (maildir / "cur").mkdir(exist_ok=True)
+  target = maildir / "cur" / f"{path.name.split(':')[0]}:2,{flags}"
+  path.rename(target)
+  return target
+
+
+def _claim(path: Path, maildir: Path) -> Optional[Path]:
+  """
+  Move a message out of `new/` before touching it, so an overlapping run
+  can't pick it up too. The rename is atomic: None means another worker won.
+  """
+  try:
+    return _file_away(path, maildir, "")
+  except FileNotFoundError:
+    return None
+
+
+def _elapsed_ms(start: float) -> int:
+  return int((time.monotonic() - start) * 1000)
+
+
+def _claim_document(message: IntakeMessage, attachment: SpooledAttachment) -> Optional[IntakeDocument]:
+  """
+  The document row to parse `attachment` into, or None for a duplicate. A
+  document whose earlier parse failed is claimed again so the PDF is retried,
+  as is one left in PROCESSING past `INTAKE_DOCUMENT_LEASE` by a worker that
+  died mid-parse.
+  """
+  fields = {
+    "message": message,
+    "filename": attachment.filename[:255],
+    "size": attachment.size,
+    "file_path": str(attachment.path),
+  }
+  document, created = IntakeDocument.objects.get_or_create(
+    sha256=attachment.sha256, defaults={**fields, "status": IntakeDocument.Status.PROCESSING},
+  )
+  if created:
+    return document
+  now = timezone.now()
+  stale = Q(status=IntakeDocument.Status.PROCESSING, updated_at__lt=now - timedelta(seconds=settings.INTAKE_DOCUMENT_LEASE))
+  retried = IntakeDocument.objects.filter(Q(status=IntakeDocument.Status.FAILED) | stale, pk=document.pk).update(
+    status=IntakeDocument.Status.PROCESSING, error="", updated_at=now, **fields,
+  )
+  if not retried:
+    return None
+  document.refresh_from_db()
+  return document
+
+
+def _process_attachments(message: IntakeMessage, attachments: List[SpooledAttachment]) -> None:
+  message.attachment_count = len(attachments)
+  message.duplicate_count = 0
+  for attachment in attachments:
+    document = _claim_document(message, attachment)
+    if document is None:
+      message.duplicate_count += 1
+      continue
+
+    try:
+      results = process_statement_pdf(attachment.path, attachment.filename)
+    except Exception as exc:
+      document.status = IntakeDocument.Status.FAILED
+      document.error = str(exc)
+      document.save(update_fields=["status", "error", "updated_at"])
+      raise
+    errors = [result["error"] for result in results if "error" in result]
+    document.status = IntakeDocument.Status.FAILED if errors else IntakeDocument.Status.PARSED
+    document.invoice_count = len(results) - len(errors)
+    document.error = "\n".join(errors)
+    document.save(update_fields=["status", "invoice_count", "error", "updated_at"])
+
+
+def process_message(path: Path) -> IntakeMessage:
+  """
+  Spool the PDFs out of one maildir message, skip attachments already seen
+  (by SHA-256) and run the rest through the invoice pipeline. Records how
+  long the message sat in the maildir and how long processing took.
+  """
+  started = time.monotonic()
+  picked_up = timezone.now()
+  delivered = datetime.fromtimestamp(path.stat().st_mtime, tz=dt_timezone.utc)
+
+  with path.open("rb") as fp:
+    headers = read_headers(fp)
+    message_id = str(headers.get("Message-ID") or "").strip() or f"<{path.name.split(':')[0]}@maildir>"
+    message, created = IntakeMessage.objects.get_or_create(
+      message_id=message_id[:255],
+      defaults={
+        "sender": str(headers.get("From") or "")[:255],
+        "subject": str(headers.get("Subject") or "")[:255],
+        "queue_ms": max(int((picked_up - delivered).total_seconds() * 1000), 0),
+      },
+    )
+    if not created and message.status in (IntakeMessage.Status.PROCESSED, IntakeMessage.Status.NO_ATTACHMENTS):
+      logger.info("Skipping already processed message %s", message_id)
+      return message
+    try:
+      _, attachments = extract_pdf_attachments(fp, Path(settings.INTAKE_SPOOL_DIR), headers=headers)
+      _process_attachments(message, attachments)
+    except Exception as exc:
+      message.status = IntakeMessage.Status.FAILED
+      message.error = str(exc)
+      message.processing_ms = _elapsed_ms(started)
+      message.save(update_fields=["status", "error", "processing_ms", "updated_at"])
+      raise
+
+  message.status = IntakeMessage.Status.PROCESSED if attachments else IntakeMessage.Status.NO_ATTACHMENTS
+  message.processing_ms = _elapsed_ms(started)
+  message.processed_at = timezone.now()
+  message.error = ""
+  message.save()
+  logger.info(
+    "Processed %s: %d PDFs (%d duplicates) in %d ms",
+    message_id, message.attachment_count, message.duplicate_count, message.processing_ms,
+  )
+  return message
+
+
+def _process_and_file(path: Path, maildir: Path) -> Optional[IntakeMessage]:
+  path = _claim(path, maildir)
+  if path is None:
+    return None
+  try:
+    message = process_message(path)
+  except Exception:
+    # process_message has marked its IntakeMessage (and document) failed.
+    logger.exception("Intake failed for %s", path.name)
+    _file_away(path, maildir, "F")
+    return None
+  finally:
+    # Worker threads each hold their own connection; don't leak them.
+    connection.close()
+  _file_away(path, maildir, "S")
+  return message
+
+
+def run_once(maildir: Optional[Path] = None, max_workers: Optional[int] = None) -> int:
+  """Process everything currently in the maildir, at most `max_workers` messages at a time."""
+  maildir = Path(maildir or settings.INTAKE_MAILDIR or "")
+  if not str(maildir) or str(maildir) == ".":
+    return 0
+  paths = pending_messages(maildir)
+  if not paths:
+    return 0
+  with ThreadPoolExecutor(max_workers=max_workers or settings.INTAKE_MAX_WORKERS, thread_name_prefix="intake") as pool:
+    processed = sum(1 for message in pool.map(lambda path: _process_and_file(path, maildir), paths) if message)
+  return processed
+
+
+def watch(maildir: Optional[Path] = None, poll_interval: Optional[float] = None, max_workers: Optional[int] = None) -> None:
+  poll_interval = poll_interval or settings.INTAKE_POLL_INTERVAL
+  while True:
+    run_once(maildir, max_workers)
+    time.sleep(poll_interval)
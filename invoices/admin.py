@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Invoice, InvoiceFile, InvoiceLine
+from .models import Invoice, InvoiceFile, InvoiceLine, JournalExport, JournalLine
 
 
 class InvoiceLineInline(admin.TabularInline):
@@ -31,3 +31,15 @@ class InvoiceLineAdmin(admin.ModelAdmin):
   list_display = ("invoice", "part_number", "quantity", "unit_price", "refund_status")
   list_filter = ("refund_status",)
   search_fields = ("part_number", "invoice__invoice_number")
+
+
+@admin.register(JournalLine)
+class JournalLineAdmin(admin.ModelAdmin):
+  list_display = ("invoice_number", "invoice_date", "gl_account", "label", "amount", "adjustment", "export")
+  list_filter = ("invoice_type", "adjustment", "gl_account")
+  search_fields = ("invoice_number", "gl_account")
+
+
+@admin.register(JournalExport)
+class JournalExportAdmin(admin.ModelAdmin):
+  list_display = ("id", "period_start", "period_end", "line_count", "total_amount", "created_by", "created_at")
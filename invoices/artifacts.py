@@ -0,0 +1,35 @@
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+
+from storage import LocalStorage, get_storage
+from storage.gc import GCResult, collect
+from .models import InvoiceFile
+
+
+def legacy_generated_dir() -> Path:
+  # Where the FCA parser page wrote PDFs before artifact storage; swept by age only.
+  return Path(settings.BASE_DIR) / "invoices" / "generated"
+
+
+def collect_artifacts(dry_run: bool = False) -> GCResult:
+  """
+  Apply ARTIFACT_GC_MAX_AGE_DAYS / ARTIFACT_GC_MAX_BYTES to artifact storage.
+  Anything an `InvoiceFile` points at is kept regardless of age or size.
+  """
+  max_age = timedelta(days=settings.ARTIFACT_GC_MAX_AGE_DAYS) if settings.ARTIFACT_GC_MAX_AGE_DAYS else None
+  max_bytes = settings.ARTIFACT_GC_MAX_BYTES or None
+  referenced = set(InvoiceFile.objects.values_list("file_path", flat=True))
+
+  result = collect(get_storage(), max_bytes=max_bytes, max_age=max_age, protected=referenced, dry_run=dry_run)
+
+  legacy = legacy_generated_dir()
+  if legacy.is_dir() and max_age:
+    legacy_protected = {
+      Path(path).relative_to(legacy).as_posix()
+      for path in referenced
+      if Path(path).is_absolute() and legacy in Path(path).parents
+    }
+    result.merge(collect(LocalStorage(legacy), max_age=max_age, protected=legacy_protected, dry_run=dry_run))
+  return result
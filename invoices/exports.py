@@ -0,0 +1,80 @@
+import csv
+import io
+from contextlib import contextmanager
+from datetime import date
+from pathlib import PurePosixPath
+from typing import Iterator, List
+
+from django.utils.text import slugify
+
+from common.zipstream import ZipEntry, stream_zip
+from storage import StorageError
+from .models import InvoiceFile
+
+
+def period_files(start: date, end: date, supplier=None) -> List[InvoiceFile]:
+  """Every stored file for invoices dated within [start, end], optionally for one supplier."""
+  files = InvoiceFile.objects.filter(invoice__invoice_date__range=(start, end))
+  if supplier is not None:
+    files = files.filter(invoice__supplier=supplier)
+  return list(
+    files.select_related("invoice__supplier")
+    .only("file_path", "file_kind", "invoice__invoice_number", "invoice__invoice_date", "invoice__supplier__name")
+    .order_by("invoice__supplier__name", "invoice__invoice_date", "invoice__invoice_number", "file_kind", "id")
+  )
+
+
+def archive_name(invoice_file: InvoiceFile) -> str:
+  invoice = invoice_file.invoice
+  filename = PurePosixPath(invoice_file.file_path).name
+  return f"{slugify(invoice.supplier.name) or 'supplier'}/{invoice.invoice_number}/{invoice_file.file_kind}-{filename}"
+
+
+def _entries(files: List[InvoiceFile], missing: List[str]) -> Iterator[ZipEntry]:
+  for invoice_file in files:
+    # Opened here rather than inside the archive so a file missing from storage
+    # is skipped (and listed in the manifest) instead of breaking the stream.
+    try:
+      handle = invoice_file.open()
+    except (OSError, StorageError):
+      missing.append(invoice_file.file_path)
+      continue
+    yield archive_name(invoice_file), lambda handle=handle: handle
+
+
+@contextmanager
+def _manifest(files: List[InvoiceFile], missing: List[str]):
+  text = io.StringIO()
+  writer = csv.writer(text)
+  writer.writerow(["supplier", "invoice_number", "invoice_date", "kind", "archive_path", "storage_key", "status"])
+  gone = set(missing)
+  for invoice_file in files:
+    invoice = invoice_file.invoice
+    writer.writerow([
+      invoice.supplier.name,
+      invoice.invoice_number,
+      invoice.invoice_date or "",
+      invoice_file.file_kind,
+      archive_name(invoice_file),
+      invoice_file.file_path,
+      "missing" if invoice_file.file_path in gone else "ok",
+    ])
+  yield io.BytesIO(text.getvalue().encode("utf-8"))
+
+
+def stream_period_archive(start: date, end: date, supplier=None) -> Iterator[bytes]:
+  """ZIP of a period's invoice, summary and mapping PDFs plus `manifest.csv`, built while it is sent."""
+  files = period_files(start, end, supplier)
+  missing: List[str] = []
+
+  def entries() -> Iterator[ZipEntry]:
+    yield from _entries(files, missing)
+    # Last, so it can record which files were missing from storage.
+    yield "manifest.csv", lambda: _manifest(files, missing)
+
+  return stream_zip(entries())
+
+
+def archive_filename(start: date, end: date, supplier=None) -> str:
+  scope = f"-{slugify(supplier.name)}" if supplier is not None else ""
+  return f"invoices{scope}-{start.isoformat()}-to-{end.isoformat()}.zip"
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import base64
+import io
 import re
-from dataclasses import dataclass
-from datetime import datetime
+import time
+from dataclasses import asdict, dataclass, field
 from decimal import Decimal
-from pathlib import Path
 
 from typing import Iterable, List
 
-from invoices.ingestion import extract_pdf_text
+from invoices.ingestion import PdfSource, extract_pdf_text
+from metrics import PIPELINE_INVOICES, PIPELINE_PAGES, PIPELINE_SECONDS, PIPELINE_STAGE_SECONDS
+from parsers.fca import map_accounts_to_internal, parse_invoice_metadata, parse_summary
+from storage import Storage, get_storage
+from storage.dedup import put_bytes
 
 INVOICE_PREFIX = "09308000"
+# Bump when parsing or the ParsedFCAInvoice shape changes; cached parses from
+# other versions are then ignored (see invoices.pipeline).
+PARSER_VERSION = 4
 INVOICE_KIND_LABELS = {
   "W": "Weekly invoice",
   "CF": "Fleet credit memo",
@@ -40,6 +47,12 @@ SUMMARY_LINE_RE = re.compile(
 
 INVOICE_START_RE = re.compile(rf"{INVOICE_PREFIX}(?P<kind>[A-Z]+)")
 
+PIPELINE = "fca_parser"
+
+
+def _stage(name: str):
+  return PIPELINE_STAGE_SECONDS.time(pipeline=PIPELINE, stage=name)
+
 
 def _clean_amount(raw: str) -> Decimal:
   cleaned = raw.replace(",", "").strip()
@@ -111,6 +124,12 @@ class ParsedFCAInvoice:
   invoice_type: str
   summary_page: str
   accounts: List[SummaryAccountLine]
+  # From parsers.fca: invoice number/date/type (empty if the header did not parse)
+  # and the `map_accounts_to_internal` rows that feed the GL journal.
+  metadata: dict = field(default_factory=dict)
+  gl_entries: List[dict] = field(default_factory=list)
+  # First and last page (1-based) within the statement.
+  pages: List[int] = field(default_factory=list)
 
   @property
   def title(self) -> str:
@@ -118,32 +137,66 @@ class ParsedFCAInvoice:
     suffix = f" ({self.invoice_code})" if self.invoice_code else ""
     return f"{label}{suffix}"
 
+  def to_dict(self) -> dict:
+    data = asdict(self)
+    for account in data["accounts"]:
+      account["amount"] = str(account["amount"])
+    return data
+
+  @classmethod
+  def from_dict(cls, data: dict) -> "ParsedFCAInvoice":
+    accounts = [
+      SummaryAccountLine(**{**account, "amount": Decimal(account["amount"])})
+      for account in data.get("accounts", [])
+    ]
+    return cls(
+      invoice_code=data.get("invoice_code"),
+      invoice_type=data.get("invoice_type", ""),
+      summary_page=data.get("summary_page", ""),
+      accounts=accounts,
+      metadata=data.get("metadata", {}),
+      gl_entries=data.get("gl_entries", []),
+      pages=data.get("pages", []),
+    )
+
 
 class FCAInvoiceParser:
-  def __init__(self, pdf_path: Path):
-    self.pdf_path = pdf_path
+  def __init__(self, source: PdfSource):
+    self.source = source
 
   def parse(self) -> List[ParsedFCAInvoice]:
-    pages = extract_pdf_text(str(self.pdf_path))
-    sections = self._split_into_invoices(pages)
-    return [self._parse_section(section) for section in sections]
-
-  def _split_into_invoices(self, pages: List[str]) -> List[List[str]]:
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+      with _stage("extract_text"):
+        pages = extract_pdf_text(self.source)
+      PIPELINE_PAGES.inc(len(pages), pipeline=PIPELINE, result="extracted")
+      with _stage("detect_boundary"):
+        sections = self._split_into_invoices(pages)
+      invoices = [self._parse_section(section, first_page) for first_page, section in sections]
+      PIPELINE_INVOICES.inc(len(invoices), pipeline=PIPELINE, result="parsed")
+      outcome = "ok"
+      return invoices
+    finally:
+      PIPELINE_SECONDS.observe(time.perf_counter() - started, pipeline=PIPELINE, outcome=outcome)
+
+  def _split_into_invoices(self, pages: List[str]) -> List[tuple[int, List[str]]]:
+    """`(first page number, pages)` for each invoice in the statement."""
     start_indices = []
     for idx, page in enumerate(pages):
       if INVOICE_START_RE.search(page):
         start_indices.append(idx)
 
     if not start_indices:
-      return [pages]
+      return [(1, pages)]
 
-    slices: List[List[str]] = []
+    slices: List[tuple[int, List[str]]] = []
     for i, start in enumerate(start_indices):
       end = start_indices[i + 1] if i + 1 < len(start_indices) else len(pages)
-      slices.append(pages[start:end])
+      slices.append((start + 1, pages[start:end]))
     return slices
 
-  def _parse_section(self, pages: List[str]) -> ParsedFCAInvoice:
+  def _parse_section(self, pages: List[str], first_page: int = 1) -> ParsedFCAInvoice:
     invoice_code = None
     invoice_type = "Unknown"
 
@@ -155,13 +208,24 @@ class FCAInvoiceParser:
         break
 
     summary_text = pages[-1]
-    accounts = self._parse_summary(summary_text)
+    with _stage("parse_summary"):
+      accounts = self._parse_summary(summary_text)
+      gl_entries = map_accounts_to_internal(parse_summary(summary_text))
+
+    with _stage("parse_invoice_metadata"):
+      try:
+        metadata = parse_invoice_metadata(pages[0])
+      except ValueError:
+        metadata = {}
 
     return ParsedFCAInvoice(
       invoice_code=invoice_code,
       invoice_type=invoice_type,
       summary_page=summary_text,
       accounts=accounts,
+      metadata=metadata,
+      gl_entries=gl_entries,
+      pages=[first_page, first_page + len(pages) - 1],
     )
 
   def _parse_summary(self, summary_text: str) -> List[SummaryAccountLine]:
@@ -199,29 +263,44 @@ class FCAInvoiceParser:
     return None, "Unmapped"
 
 
-def render_summary_pdf(invoice: ParsedFCAInvoice, output_dir: Path) -> Path:
-  output_dir.mkdir(parents=True, exist_ok=True)
-  timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-  filename = f"{invoice.invoice_code or 'invoice'}_{timestamp}_summary.pdf"
-  pdf_bytes = _simple_pdf(invoice.summary_page.splitlines(), title=invoice.title)
-  output_path = output_dir / filename
-  output_path.write_bytes(pdf_bytes)
-  return output_path
+GENERATED_PREFIX = "generated"
+
+
+def render_summary_pdf(invoice: ParsedFCAInvoice, storage: Storage | None = None) -> str:
+  """Render the summary PDF into artifact storage and return its (content-addressed) key."""
+  with _stage("render_summary_pdf"):
+    pdf_bytes = _simple_pdf(invoice.summary_page.splitlines(), title=invoice.title)
+  return put_bytes(storage or get_storage(), GENERATED_PREFIX, pdf_bytes)
+
+
+def render_invoice_pdf(reader, invoice: ParsedFCAInvoice, storage: Storage | None = None) -> str | None:
+  """
+  Copy the invoice's own pages out of the statement (a pypdf `PdfReader`)
+  into artifact storage and return the key; None without a page range.
+  """
+  if not invoice.pages:
+    return None
+  from pypdf import PdfWriter
+
+  with _stage("render_invoice_pdf"):
+    writer = PdfWriter()
+    for index in range(invoice.pages[0] - 1, min(invoice.pages[1], len(reader.pages))):
+      writer.add_page(reader.pages[index])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+  return put_bytes(storage or get_storage(), GENERATED_PREFIX, buffer.getvalue())
 
 
-def render_mapping_pdf(invoice: ParsedFCAInvoice, output_dir: Path) -> Path:
-  output_dir.mkdir(parents=True, exist_ok=True)
-  timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-  filename = f"{invoice.invoice_code or 'invoice'}_{timestamp}_mapping.pdf"
+def render_mapping_pdf(invoice: ParsedFCAInvoice, storage: Storage | None = None) -> str:
+  """Render the GL mapping PDF into artifact storage and return its (content-addressed) key."""
   mapping_lines = [
     f"{line.source_code}: {line.amount} -> {line.gl_account or 'Unmapped'} ({line.description})"
     for line in invoice.accounts
   ]
-  pdf_bytes = _simple_pdf(mapping_lines, title=f"GL mapping for {invoice.title}")
-  output_path = output_dir / filename
-  output_path.write_bytes(pdf_bytes)
-  return output_path
+  with _stage("render_mapping_pdf"):
+    pdf_bytes = _simple_pdf(mapping_lines, title=f"GL mapping for {invoice.title}")
+  return put_bytes(storage or get_storage(), GENERATED_PREFIX, pdf_bytes)
 
 
-def encode_pdf_for_download(path: Path) -> str:
-  return base64.b64encode(path.read_bytes()).decode("utf-8")
+def encode_pdf_for_download(key: str, storage: Storage | None = None) -> str:
+  return base64.b64encode((storage or get_storage()).read_bytes(key)).decode("utf-8")
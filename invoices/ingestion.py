@@ -1,9 +1,57 @@
+import io
 import json
+import mmap
+import os
 import shlex
 import subprocess
 import tempfile
+import time
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, List, Optional, Union
+
+from metrics import EXTRACTION_SECONDS
+
+# A PDF on disk (path), in memory (bytes/memoryview/mmap) or an open binary file,
+# including Django's UploadedFile. Nothing is copied to a temp file to read it.
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+
+def source_path(source: PdfSource) -> Optional[Path]:
+  """The on-disk path for `source`, if it has one (paths, Django's TemporaryUploadedFile)."""
+  if isinstance(source, (str, os.PathLike)):
+    return Path(source)
+  temporary_file_path = getattr(source, "temporary_file_path", None)
+  if temporary_file_path is not None:
+    return Path(temporary_file_path())
+  return None
+
+
+def source_buffer(source: PdfSource):
+  """The PDF bytes as a buffer, without copying when the source already lives in memory."""
+  if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+    return source
+  for candidate in (source, getattr(source, "file", None)):
+    getbuffer = getattr(candidate, "getbuffer", None)
+    if getbuffer is not None:
+      return getbuffer()
+  source.seek(0)
+  return source.read()
+
+
+def source_stream(source: PdfSource) -> BinaryIO:
+  """A seekable binary stream positioned at the start of the PDF."""
+  if isinstance(source, (bytes, bytearray, memoryview)):
+    return io.BytesIO(source)
+  source.seek(0)
+  return source
+
+
+def _poppler_input(source: PdfSource):
+  """Command-line argument and stdin payload: the path when on disk, else `-` and the bytes."""
+  path = source_path(source)
+  if path is not None:
+    return shlex.quote(str(path)), None
+  return "-", source_buffer(source)
 
 
 def _run(cmd: str, input_bytes: bytes | None = None, timeout: int = 60) -> subprocess.CompletedProcess:
@@ -16,11 +64,12 @@ def _run(cmd: str, input_bytes: bytes | None = None, timeout: int = 60) -> subpr
   )
 
 
-def extract_text_with_poppler(pdf_path: Path) -> List[str]:
+def extract_text_with_poppler(source: PdfSource) -> List[str]:
   """
   Try to extract text using pdftotext; returns list of pages (single string split by form feed).
   """
-  proc = _run(f"pdftotext -layout {shlex.quote(str(pdf_path))} -")
+  argument, payload = _poppler_input(source)
+  proc = _run(f"pdftotext -layout {argument} -", input_bytes=payload)
   if proc.returncode != 0:
     raise RuntimeError(f"pdftotext failed: {proc.stderr.decode('utf-8', 'ignore')}")
   text = proc.stdout.decode("utf-8", "ignore")
@@ -28,14 +77,15 @@ def extract_text_with_poppler(pdf_path: Path) -> List[str]:
   return [p.strip() for p in pages if p.strip()]
 
 
-def extract_text_with_tesseract(pdf_path: Path, dpi: int = 300) -> List[str]:
+def extract_text_with_tesseract(source: PdfSource, dpi: int = 300) -> List[str]:
   """
   OCR fallback: convert PDF pages to PNG with pdftoppm, run tesseract per page.
   """
   pages_text: List[str] = []
+  argument, payload = _poppler_input(source)
   with tempfile.TemporaryDirectory() as tmpdir:
     ppm_prefix = Path(tmpdir) / "page"
-    proc = _run(f"pdftoppm -r {dpi} -png {shlex.quote(str(pdf_path))} {ppm_prefix}")
+    proc = _run(f"pdftoppm -r {dpi} -png {argument} {ppm_prefix}", input_bytes=payload)
     if proc.returncode != 0:
       raise RuntimeError(f"pdftoppm failed: {proc.stderr.decode('utf-8', 'ignore')}")
     for png_path in sorted(Path(tmpdir).glob("page-*.png")):
@@ -46,13 +96,14 @@ def extract_text_with_tesseract(pdf_path: Path, dpi: int = 300) -> List[str]:
   return pages_text
 
 
-def extract_text_with_pypdf(pdf_path: Path) -> List[str]:
+def extract_text_with_pypdf(source: PdfSource) -> List[str]:
   """
   Pure-Python fallback using pypdf. This avoids external binaries when available.
   """
   from pypdf import PdfReader
 
-  reader = PdfReader(str(pdf_path))
+  path = source_path(source)
+  reader = PdfReader(str(path) if path is not None else source_stream(source))
   pages: List[str] = []
   for page in reader.pages:
     text = (page.extract_text() or "").strip()
@@ -61,13 +112,28 @@ def extract_text_with_pypdf(pdf_path: Path) -> List[str]:
   return pages
 
 
-def extract_pdf_text(pdf_path: str) -> List[str]:
+def _timed(engine: str, extract, source: PdfSource) -> List[str]:
+  """Run one extraction engine, recording its time and outcome per engine."""
+  started = time.perf_counter()
+  outcome = "error"
+  try:
+    pages = extract(source)
+    outcome = "ok" if pages else "empty"
+    return pages
+  except (ImportError, FileNotFoundError):
+    outcome = "unavailable"
+    raise
+  finally:
+    EXTRACTION_SECONDS.observe(time.perf_counter() - started, engine=engine, outcome=outcome)
+
+
+def extract_pdf_text(source: PdfSource) -> List[str]:
   """
-  Extract text from a PDF. Try pdftotext first; if mostly empty, fallback to OCR.
+  Extract text from a PDF. Try pypdf, then pdftotext; if mostly empty, fallback to OCR.
+  `source` may be a path, bytes, an mmap or an open file (see `PdfSource`).
   """
-  path = Path(pdf_path)
   try:
-    pages = extract_text_with_pypdf(path)
+    pages = _timed("pypdf", extract_text_with_pypdf, source)
     if pages:
       return pages
   except ImportError:
@@ -77,7 +143,7 @@ def extract_pdf_text(pdf_path: str) -> List[str]:
     pages = []
 
   try:
-    pages = extract_text_with_poppler(path)
+    pages = _timed("pdftotext", extract_text_with_poppler, source)
     if pages and any(len(p) > 40 for p in pages):
       return pages
   except Exception:
@@ -85,7 +151,7 @@ def extract_pdf_text(pdf_path: str) -> List[str]:
 
   # OCR fallback
   try:
-    return extract_text_with_tesseract(path)
+    return _timed("tesseract", extract_text_with_tesseract, source)
   except FileNotFoundError as exc:
     raise RuntimeError("pdftoppm and tesseract are required for OCR fallback") from exc
 
@@ -0,0 +1,148 @@
+import csv
+import io
+import json
+import logging
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import JournalExport, JournalLine
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = [
+  "invoice_number", "invoice_type", "invoice_date", "gl_account", "label", "amount", "source_codes", "adjustment",
+]
+CENT = Decimal("0.01")
+
+
+def aggregate_gl_entries(gl_entries: List[dict]) -> Dict[str, dict]:
+  """Sum `map_accounts_to_internal` rows per internal GL account ("" for unmapped codes)."""
+  accounts: Dict[str, dict] = defaultdict(lambda: {"amount": Decimal("0"), "labels": [], "codes": []})
+  for entry in gl_entries:
+    account = accounts[entry.get("internal_gl_account") or ""]
+    account["amount"] += Decimal(str(entry.get("fca_amount") or 0))
+    label = entry.get("internal_label") or entry.get("fca_description") or ""
+    if label and label not in account["labels"]:
+      account["labels"].append(label)
+    account["codes"].append(entry.get("fca_code", ""))
+  return accounts
+
+
+def record_invoice_journal(parsed, source_name: str = "") -> int:
+  """
+  Replace the unexported journal lines for one parsed invoice. Exported
+  lines never change: when some exist, the new lines carry only the
+  difference from what was exported (an adjustment, which may be negative),
+  so a reissued invoice is corrected in the next batch instead of dropped.
+  """
+  number = parsed.metadata.get("invoice_number_norm")
+  if not number:
+    return 0
+  accounts = aggregate_gl_entries(parsed.gl_entries)
+  invoice_date = parse_date(parsed.metadata.get("invoice_date_iso") or "")
+
+  with transaction.atomic():
+    existing = list(JournalLine.objects.select_for_update().filter(invoice_number=number))
+    exported: Dict[str, Decimal] = defaultdict(Decimal)
+    exported_labels: Dict[str, str] = {}
+    for line in existing:
+      if line.export_id is not None:
+        exported[line.gl_account] += line.amount
+        exported_labels.setdefault(line.gl_account, line.label)
+    JournalLine.objects.filter(id__in=[line.id for line in existing if line.export_id is None]).delete()
+
+    lines = []
+    for gl_account in sorted(set(accounts) | set(exported)):
+      account = accounts.get(gl_account, {"amount": Decimal("0"), "labels": [], "codes": []})
+      amount = (account["amount"] - exported.get(gl_account, Decimal("0"))).quantize(CENT)
+      if exported and not amount:
+        continue
+      lines.append(JournalLine(
+        invoice_number=number,
+        invoice_type=parsed.metadata.get("invoice_type_code", ""),
+        invoice_date=invoice_date,
+        gl_account=gl_account,
+        label=("; ".join(account["labels"]) or exported_labels.get(gl_account, ""))[:255],
+        amount=amount,
+        source_codes=account["codes"],
+        source_name=source_name[:255],
+        adjustment=bool(exported),
+      ))
+    JournalLine.objects.bulk_create(lines)
+  if exported and lines:
+    logger.warning("Invoice %s changed after its journal was exported; recorded %d adjustment lines", number, len(lines))
+  return len(lines)
+
+
+def _in_period(start: date, end: date) -> Q:
+  # Undated invoices fall in the period they were parsed in.
+  return Q(invoice_date__range=(start, end)) | Q(invoice_date__isnull=True, created_at__date__range=(start, end))
+
+
+def pending_lines(start: date, end: date):
+  return JournalLine.objects.filter(_in_period(start, end), export__isnull=True)
+
+
+def create_export(start: date, end: date, user=None) -> JournalExport:
+  """Claim every not-yet-exported line in the period for a new batch."""
+  with transaction.atomic():
+    ids = list(pending_lines(start, end).select_for_update().values_list("id", flat=True))
+    batch = JournalExport.objects.create(period_start=start, period_end=end, created_by=user)
+    JournalLine.objects.filter(id__in=ids).update(export=batch, updated_at=timezone.now())
+    totals = batch.lines.aggregate(count=Count("id"), total=Sum("amount"))
+    batch.line_count = totals["count"]
+    batch.total_amount = totals["total"] or 0
+    batch.save(update_fields=["line_count", "total_amount", "updated_at"])
+  return batch
+
+
+def account_totals(lines) -> List[dict]:
+  rows = list(
+    lines.order_by().values("gl_account").annotate(amount=Sum("amount"), lines=Count("id")).order_by("gl_account")
+  )
+  for row in rows:
+    # SQLite sums decimals as floats; keep amounts to the cent everywhere.
+    row["amount"] = Decimal(str(row["amount"] or 0)).quantize(CENT)
+  return rows
+
+
+def render_csv(batch: JournalExport) -> str:
+  out = io.StringIO()
+  writer = csv.writer(out)
+  writer.writerow(CSV_COLUMNS)
+  for line in batch.lines.order_by("invoice_date", "invoice_number", "gl_account").iterator():
+    writer.writerow([
+      line.invoice_number,
+      line.invoice_type,
+      line.invoice_date or "",
+      line.gl_account,
+      line.label,
+      line.amount,
+      " ".join(line.source_codes),
+      line.adjustment,
+    ])
+  return out.getvalue()
+
+
+def render_json(batch: JournalExport) -> str:
+  lines = batch.lines.order_by("invoice_date", "invoice_number", "gl_account")
+  return json.dumps(
+    {
+      "batch": batch.pk,
+      "period_start": batch.period_start,
+      "period_end": batch.period_end,
+      "created_at": batch.created_at,
+      "total_amount": batch.total_amount,
+      "accounts": account_totals(batch.lines.all()),
+      "lines": list(lines.values(*CSV_COLUMNS)),
+    },
+    default=str,
+    indent=2,
+  )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from invoices.artifacts import collect_artifacts
+
+
+def _mb(size: int) -> str:
+  return f"{size / (1024 * 1024):.1f} MB"
+
+
+class Command(BaseCommand):
+  help = "Delete generated PDFs past ARTIFACT_GC_MAX_AGE_DAYS, then least recently used ones until under ARTIFACT_GC_MAX_BYTES."
+
+  def add_arguments(self, parser):
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting it")
+
+  def handle(self, *args, **options):
+    result = collect_artifacts(dry_run=options["dry_run"])
+    verb = "Would delete" if options["dry_run"] else "Deleted"
+    self.stdout.write(self.style.SUCCESS(
+      f"Scanned {result.scanned} artifacts ({_mb(result.scanned_bytes)}): {verb} {result.deleted}, "
+      f"reclaimed {_mb(result.reclaimed_bytes)}, {result.protected} protected, {_mb(result.remaining_bytes)} remaining"
+    ))
+    for error in result.errors:
+      self.stderr.write(error)
@@ -24,7 +24,8 @@ class Command(BaseCommand):
 
     for f in qs:
       try:
-        pages = extract_pdf_text(f.file_path)
+        with f.local_path() as path:
+          pages = extract_pdf_text(path)
         f.text_cache = pages
         f.save(update_fields=["text_cache", "updated_at"])
         self.stdout.write(self.style.SUCCESS(f"Processed InvoiceFile {f.id} ({len(pages)} pages)"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from invoices.reconciliation import reconcile_receipts
+
+
+class Command(BaseCommand):
+  help = "Reconcile ordered vs received quantities for invoices with new receipt lines."
+
+  def add_arguments(self, parser):
+    parser.add_argument("--full", action="store_true", help="Re-check every invoice that has receipts, not just new ones")
+
+  def handle(self, *args, **options):
+    result = reconcile_receipts(full=options["full"])
+    self.stdout.write(self.style.SUCCESS(
+      f"Checked {result.invoices_checked} invoices: {result.flagged_received} marked received, "
+      f"{result.unflagged_received} unmarked, {result.mismatches} mismatch notifications"
+    ))
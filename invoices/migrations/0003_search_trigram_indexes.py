@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from common.db import trigram_indexes
+
+
+class Migration(migrations.Migration):
+  atomic = False
+
+  dependencies = [
+    ("invoices", "0002_invoicefile_text_cache"),
+  ]
+
+  operations = [
+    trigram_indexes("invoices_invoice", ["invoice_number"]),
+    trigram_indexes("invoices_invoiceline", ["part_number", "description"]),
+  ]
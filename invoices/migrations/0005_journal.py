@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('invoices', '0004_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('line_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='journal_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JournalLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('invoice_number', models.CharField(max_length=128)),
+                ('invoice_type', models.CharField(blank=True, max_length=8)),
+                ('invoice_date', models.DateField(blank=True, null=True)),
+                ('gl_account', models.CharField(blank=True, help_text='Blank when the FCA code has no mapping.', max_length=32)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('source_codes', models.JSONField(blank=True, default=list)),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('export', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lines', to='invoices.journalexport')),
+            ],
+            options={
+                'ordering': ['invoice_date', 'invoice_number', 'gl_account'],
+                'indexes': [models.Index(fields=['export', 'invoice_date'], name='journalline_pending_idx')],
+                'unique_together': {('invoice_number', 'gl_account')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0005_journal'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='journalline',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='journalline',
+            name='adjustment',
+            field=models.BooleanField(default=False, help_text='Difference from amounts already exported for this invoice.'),
+        ),
+        migrations.AddConstraint(
+            model_name='journalline',
+            constraint=models.UniqueConstraint(condition=models.Q(('export__isnull', True)), fields=('invoice_number', 'gl_account'), name='journalline_pending_unique'),
+        ),
+    ]
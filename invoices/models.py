@@ -1,10 +1,67 @@
+import os
+from contextlib import contextmanager
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Abs, Coalesce
 from django.conf import settings
 
 from common.models import TimeStampedModel
+from storage import get_storage
 from suppliers.models import Supplier
 
 
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+LINE_EXTENDED_PRICE = F("quantity") * F("unit_price")
+# Header totals are keyed in by hand; anything inside half a cent is rounding.
+TOTAL_TOLERANCE = Decimal("0.005")
+
+
+def _line_aggregate(aggregate, output_field):
+  lines = (
+    InvoiceLine.objects.filter(invoice=OuterRef("pk"))
+    .order_by()
+    .values("invoice")
+    .annotate(value=aggregate)
+    .values("value")
+  )
+  return Coalesce(Subquery(lines, output_field=output_field), Value(0), output_field=output_field)
+
+
+class InvoiceQuerySet(models.QuerySet):
+  def with_line_totals(self):
+    """
+    Annotate line count, extended total, ordered/received quantities and a
+    `total_mismatch` flag. Correlated subqueries keep this to one statement
+    whose cost scales with the rows returned, so it is safe on paginated lists.
+    """
+    return self.annotate(
+      line_count=_line_aggregate(Count("id"), models.IntegerField()),
+      lines_total=_line_aggregate(Sum(LINE_EXTENDED_PRICE, output_field=MONEY), MONEY),
+      quantity_ordered=_line_aggregate(Sum("quantity"), models.IntegerField()),
+      quantity_received=_line_aggregate(Sum("received_quantity"), models.IntegerField()),
+    ).annotate(
+      total_variance=Abs(F("lines_total") - F("total_amount"), output_field=MONEY),
+    ).annotate(
+      total_mismatch=Case(
+        When(Q(line_count__gt=0) & Q(total_variance__gt=TOTAL_TOLERANCE), then=Value(True)),
+        default=Value(False),
+        output_field=models.BooleanField(),
+      ),
+      fully_received=Case(
+        When(Q(line_count__gt=0) & Q(quantity_received__gte=F("quantity_ordered")), then=Value(True)),
+        default=Value(False),
+        output_field=models.BooleanField(),
+      ),
+    )
+
+
+class InvoiceLineQuerySet(models.QuerySet):
+  def with_extended_total(self):
+    return self.annotate(extended_total=models.ExpressionWrapper(LINE_EXTENDED_PRICE, output_field=MONEY))
+
+
 class Invoice(TimeStampedModel):
   class Status(models.TextChoices):
     PARSED = ("parsed", "Parsed")
@@ -27,9 +84,12 @@ class Invoice(TimeStampedModel):
   )
   notes = models.TextField(blank=True)
 
+  objects = InvoiceQuerySet.as_manager()
+
   class Meta:
     unique_together = ("supplier", "invoice_number")
     ordering = ["-invoice_date", "-created_at"]
+    indexes = [models.Index(fields=["updated_at", "id"], name="invoice_updated_idx")]
 
   def __str__(self) -> str:
     return f"{self.supplier.name} - {self.invoice_number}"
@@ -50,6 +110,25 @@ class InvoiceFile(TimeStampedModel):
   def __str__(self) -> str:
     return f"{self.invoice} ({self.file_kind})"
 
+  def _is_legacy_path(self) -> bool:
+    # Rows created before artifact storage hold absolute filesystem paths.
+    return os.path.isabs(self.file_path) and os.path.isfile(self.file_path)
+
+  def open(self):
+    """Binary read handle; `file_path` is a storage key (or a legacy absolute path)."""
+    if self._is_legacy_path():
+      return open(self.file_path, "rb")
+    return get_storage().open_read(self.file_path)
+
+  @contextmanager
+  def local_path(self):
+    """Filesystem path for tools like pdftotext; remote objects are spooled to a temp file."""
+    if self._is_legacy_path():
+      yield self.file_path
+      return
+    with get_storage().local_path(self.file_path) as path:
+      yield str(path)
+
 
 class InvoiceLine(TimeStampedModel):
   class RefundStatus(models.TextChoices):
@@ -65,8 +144,11 @@ class InvoiceLine(TimeStampedModel):
   received_quantity = models.IntegerField(default=0)
   refund_status = models.CharField(max_length=32, choices=RefundStatus.choices, default=RefundStatus.NONE)
 
+  objects = InvoiceLineQuerySet.as_manager()
+
   class Meta:
     ordering = ["part_number"]
+    indexes = [models.Index(fields=["updated_at", "id"], name="invoiceline_updated_idx")]
 
   @property
   def extended_price(self):
@@ -74,3 +156,61 @@ class InvoiceLine(TimeStampedModel):
 
   def __str__(self) -> str:
     return f"{self.part_number} x{self.quantity}"
+
+
+class JournalExport(TimeStampedModel):
+  """A batch of journal lines handed to the accounting system; each line is exported once."""
+
+  period_start = models.DateField()
+  period_end = models.DateField()
+  created_by = models.ForeignKey(
+    settings.AUTH_USER_MODEL,
+    on_delete=models.SET_NULL,
+    null=True,
+    blank=True,
+    related_name="journal_exports",
+  )
+  line_count = models.IntegerField(default=0)
+  total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+  class Meta:
+    ordering = ["-created_at"]
+
+  def __str__(self) -> str:
+    return f"Journal export {self.pk} ({self.period_start} - {self.period_end})"
+
+
+class JournalLine(TimeStampedModel):
+  """
+  Mapped FCA summary amounts for one invoice, summed per internal GL account.
+  Written when a statement is parsed, so exports only read these rows. Only
+  the FCA parser writes the journal, so invoice numbers are FCA's and carry
+  no supplier. An invoice re-parsed with different amounts after export gets
+  adjustment lines for the difference; at most one line per invoice and
+  account is waiting for export.
+  """
+
+  invoice_number = models.CharField(max_length=128)
+  invoice_type = models.CharField(max_length=8, blank=True)
+  invoice_date = models.DateField(null=True, blank=True)
+  gl_account = models.CharField(max_length=32, blank=True, help_text="Blank when the FCA code has no mapping.")
+  label = models.CharField(max_length=255, blank=True)
+  amount = MONEY.clone()
+  source_codes = models.JSONField(default=list, blank=True)
+  source_name = models.CharField(max_length=255, blank=True)
+  export = models.ForeignKey(JournalExport, on_delete=models.SET_NULL, null=True, blank=True, related_name="lines")
+  adjustment = models.BooleanField(default=False, help_text="Difference from amounts already exported for this invoice.")
+
+  class Meta:
+    ordering = ["invoice_date", "invoice_number", "gl_account"]
+    constraints = [
+      models.UniqueConstraint(
+        fields=["invoice_number", "gl_account"],
+        condition=models.Q(export__isnull=True),
+        name="journalline_pending_unique",
+      ),
+    ]
+    indexes = [models.Index(fields=["export", "invoice_date"], name="journalline_pending_idx")]
+
+  def __str__(self) -> str:
+    return f"{self.invoice_number} {self.gl_account or 'unmapped'} {self.amount}"
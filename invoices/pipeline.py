@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from parsers.fca import PARSER_VERSION as FCA_PARSER_VERSION
+from storage import Storage, get_storage
+from storage.dedup import put_file
+from storage.parse_cache import ParseCache
+from suppliers.models import Supplier
+from .fca_parser import (
+  PARSER_VERSION,
+  FCAInvoiceParser,
+  ParsedFCAInvoice,
+  render_invoice_pdf,
+  render_mapping_pdf,
+  render_summary_pdf,
+)
+from .ingestion import PdfSource, source_path, source_stream
+from .journal import record_invoice_journal
+from .models import Invoice, InvoiceFile
+
+RESULT_NAMESPACE = "fca-statements"
+# InvoiceFile rows written here carry this description, so a re-parse updates them
+# and leaves files attached by hand alone.
+PIPELINE_FILE_DESCRIPTION = "FCA statement parse"
+# Metadata and GL entries come from parsers.fca, so its version counts too.
+CACHE_VERSION = f"{PARSER_VERSION}.{FCA_PARSER_VERSION}"
+
+
+def _artifact_keys(results: List[Dict]):
+  for result in results:
+    if "error" not in result:
+      if result.get("invoice_key"):
+        yield result["invoice_key"]
+      yield result["summary_key"]
+      yield result["mapping_key"]
+
+
+def parse_cache(storage: Optional[Storage] = None) -> ParseCache:
+  return ParseCache(storage or get_storage(), RESULT_NAMESPACE, CACHE_VERSION, _artifact_keys)
+
+
+def cached_statement_results(digest: str, storage: Optional[Storage] = None) -> Optional[List[Dict]]:
+  """The cached results for a statement by its SHA-256, or None if it was not parsed by this version."""
+  cached = parse_cache(storage).get(digest)
+  if cached is not None:
+    for result in cached:
+      result.update(digest=digest, invoice=ParsedFCAInvoice.from_dict(result["invoice"]))
+  return cached
+
+
+def _parse_and_render(source: PdfSource, source_name: str, storage: Storage) -> List[Dict]:
+  try:
+    parsed_invoices = FCAInvoiceParser(source).parse()
+  except Exception as exc:
+    return [{"source_name": source_name, "error": str(exc)}]
+
+  from pypdf import PdfReader
+
+  path = source_path(source)
+  reader = PdfReader(str(path) if path is not None else source_stream(source))
+  return [
+    {
+      "source_name": source_name,
+      "invoice": parsed,
+      "invoice_key": render_invoice_pdf(reader, parsed, storage),
+      "summary_key": render_summary_pdf(parsed, storage),
+      "mapping_key": render_mapping_pdf(parsed, storage),
+    }
+    for parsed in parsed_invoices
+  ]
+
+
+def record_invoice_files(result: Dict) -> Optional[Invoice]:
+  """
+  File one parsed invoice's PDFs (own pages, summary, GL mapping) against an
+  `Invoice` for the FCA supplier, so period exports and the invoice pages
+  find them. Invoices without a number are not recorded.
+  """
+  parsed = result["invoice"]
+  number = parsed.metadata.get("invoice_number_norm")
+  if not number:
+    return None
+  invoice_date = parse_date(parsed.metadata.get("invoice_date_iso") or "")
+  keys = {
+    InvoiceFile.FileKind.RAW: result.get("invoice_key"),
+    InvoiceFile.FileKind.SUMMARY: result["summary_key"],
+    InvoiceFile.FileKind.GL_CODING: result["mapping_key"],
+  }
+
+  with transaction.atomic():
+    supplier, _ = Supplier.objects.get_or_create(name=settings.FCA_SUPPLIER_NAME)
+    invoice, _ = Invoice.objects.get_or_create(
+      supplier=supplier, invoice_number=number, defaults={"invoice_date": invoice_date},
+    )
+    if invoice.invoice_date is None and invoice_date is not None:
+      invoice.invoice_date = invoice_date
+      invoice.save(update_fields=["invoice_date", "updated_at"])
+    for kind, key in keys.items():
+      if key:
+        InvoiceFile.objects.update_or_create(
+          invoice=invoice, file_kind=kind, description=PIPELINE_FILE_DESCRIPTION, defaults={"file_path": key},
+        )
+  return invoice
+
+
+def process_statement_pdf(source: PdfSource, source_name: str, storage: Optional[Storage] = None) -> List[Dict]:
+  """
+  Parse one FCA statement PDF (a path, or an upload/buffer read in place)
+  and render the invoice's own pages, summary and GL mapping PDFs for every
+  invoice in it into artifact storage, filed as `InvoiceFile`s. Shared by
+  the upload view and the mail intake worker. Parse failures come back as a
+  single `{"error": ...}` entry.
+
+  The upload is stored once under its SHA-256. When the same bytes were
+  parsed before by the current parser version, the cached result is
+  returned (with `duplicate` set) without parsing or rendering again.
+  Failed parses are not cached.
+  """
+  storage = storage or get_storage()
+  digest, upload_key = put_file(storage, source)
+
+  cached = cached_statement_results(digest, storage)
+  if cached is not None:
+    for result in cached:
+      result.update(source_name=source_name, duplicate=True)
+    return cached
+
+  results = _parse_and_render(source, source_name, storage)
+  for result in results:
+    result.update(upload_key=upload_key, digest=digest)
+    if "error" not in result:
+      record_invoice_journal(result["invoice"], source_name)
+      record_invoice_files(result)
+  if not any("error" in result for result in results):
+    parse_cache(storage).put(digest, [{**result, "invoice": result["invoice"].to_dict()} for result in results])
+  return results
@@ -0,0 +1,131 @@
+import logging
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from common.models import JobCheckpoint
+from notifications.models import Notification
+from receipts.models import ReceiptLine
+from .models import Invoice
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "invoices.reconcile_receipts"
+MARK_CHUNK_SIZE = 1000
+
+
+@dataclass
+class ReconciliationResult:
+  invoices_checked: int = 0
+  flagged_received: int = 0
+  unflagged_received: int = 0
+  mismatches: int = 0
+
+
+def mismatch_dedupe_key(invoice_id: int, direction: str) -> str:
+  # One notification per invoice and direction: partial receipts that leave an
+  # invoice short again, or reruns, do not re-notify.
+  return f"invoice_mismatch:{invoice_id}:{direction}"
+
+
+def _mismatch_direction(row) -> str:
+  return "over-received" if row["quantity_received"] > row["quantity_ordered"] else "short"
+
+
+def _mismatch_notification(row, recipient, now) -> Notification:
+  ordered, received = row["quantity_ordered"], row["quantity_received"]
+  direction = _mismatch_direction(row)
+  return Notification(
+    type=Notification.Type.INVOICE_MISMATCH,
+    target_email=recipient,
+    subject=f"Invoice {row['invoice_number']} {direction}: received {received} of {ordered}",
+    body=(
+      f"{row['supplier__name']} invoice {row['invoice_number']} has {received} units received "
+      f"against {ordered} ordered across its lines."
+    ),
+    send_on=now,
+    payload={
+      "invoice_id": row["id"],
+      "invoice_number": row["invoice_number"],
+      "quantity_ordered": ordered,
+      "quantity_received": received,
+    },
+    dedupe_key=mismatch_dedupe_key(row["id"], direction),
+  )
+
+
+def reconcile_receipts(full: bool = False) -> ReconciliationResult:
+  """
+  Compare ordered vs received quantities for invoices that got matched
+  `ReceiptLine`s since the last run (every invoice with receipts when
+  `full`). Totals come from the `with_line_totals` aggregates, the
+  `received_flag` flips are two bulk UPDATEs and mismatch notifications are
+  one batch insert, deduplicated per invoice and direction.
+
+  New lines are the ones with no `reconciled_at` yet (a partial index keeps
+  that lookup cheap), rather than ids past a high-water mark: ids are handed
+  out at insert but become visible at commit, so a long receipt import can
+  commit ids below a mark a concurrent run already stored. The `JobCheckpoint`
+  row is locked for the run so overlapping runs queue instead of racing.
+  """
+  result = ReconciliationResult()
+  now = timezone.now()
+
+  with transaction.atomic():
+    checkpoint, _ = JobCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+    pending = ReceiptLine.objects.filter(reconciled_at__isnull=True, invoice_line__isnull=False)
+    # Only the lines seen now are marked, so anything committed mid-run waits for the next one.
+    pending_ids = list(pending.values_list("id", flat=True))
+    # Re-checking an invoice whose line committed since is harmless; it is marked next run.
+    touched = (ReceiptLine.objects.filter(invoice_line__isnull=False) if full else pending).values("invoice_line__invoice_id")
+
+    if pending_ids or full:
+      rows = list(
+        Invoice.objects.filter(id__in=touched)
+        .with_line_totals()
+        .values(
+          "id",
+          "invoice_number",
+          "supplier__name",
+          "received_flag",
+          "quantity_ordered",
+          "quantity_received",
+          "fully_received",
+          "uploaded_by__email",
+        )
+      )
+      result.invoices_checked = len(rows)
+
+      to_flag = [row["id"] for row in rows if row["fully_received"] and not row["received_flag"]]
+      to_unflag = [row["id"] for row in rows if not row["fully_received"] and row["received_flag"]]
+      if to_flag:
+        result.flagged_received = Invoice.objects.filter(id__in=to_flag).update(received_flag=True, updated_at=now)
+      if to_unflag:
+        result.unflagged_received = Invoice.objects.filter(id__in=to_unflag).update(received_flag=False, updated_at=now)
+
+      mismatched = [row for row in rows if row["quantity_received"] != row["quantity_ordered"]]
+      existing = set(
+        Notification.objects.filter(
+          dedupe_key__in=[mismatch_dedupe_key(row["id"], _mismatch_direction(row)) for row in mismatched]
+        ).values_list("dedupe_key", flat=True)
+      )
+      notifications = []
+      for row in mismatched:
+        if mismatch_dedupe_key(row["id"], _mismatch_direction(row)) in existing:
+          continue
+        recipient = settings.PARTS_NOTIFICATION_EMAIL or row["uploaded_by__email"]
+        if not recipient:
+          logger.warning("No recipient for mismatch on invoice %s", row["invoice_number"])
+          continue
+        notifications.append(_mismatch_notification(row, recipient, now))
+      Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+      result.mismatches = len(notifications)
+
+    for start in range(0, len(pending_ids), MARK_CHUNK_SIZE):
+      ReceiptLine.objects.filter(id__in=pending_ids[start : start + MARK_CHUNK_SIZE]).update(reconciled_at=now)
+    checkpoint.last_run_at = now
+    checkpoint.save(update_fields=["last_run_at"])
+
+  return result
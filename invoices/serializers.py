@@ -0,0 +1,64 @@
+from rest_framework import serializers
+
+from common.api import SparseFieldsSerializer
+from .models import Invoice, InvoiceLine
+
+
+class InvoiceLineSerializer(SparseFieldsSerializer):
+  invoice_number = serializers.CharField(source="invoice.invoice_number", read_only=True)
+
+  class Meta:
+    model = InvoiceLine
+    fields = [
+      "id",
+      "invoice",
+      "invoice_number",
+      "part_number",
+      "description",
+      "quantity",
+      "unit_price",
+      "received_quantity",
+      "refund_status",
+      "created_at",
+      "updated_at",
+    ]
+    select_related = {"invoice_number": "invoice"}
+    validator_relations = {"invoice_number": "invoice"}
+
+
+class NestedInvoiceLineSerializer(serializers.ModelSerializer):
+  class Meta:
+    model = InvoiceLine
+    fields = ["id", "part_number", "description", "quantity", "unit_price", "received_quantity", "refund_status"]
+
+
+class InvoiceSerializer(SparseFieldsSerializer):
+  supplier_name = serializers.CharField(source="supplier.name", read_only=True)
+  lines_total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+  total_mismatch = serializers.BooleanField(read_only=True)
+  lines = NestedInvoiceLineSerializer(many=True, read_only=True)
+
+  class Meta:
+    model = Invoice
+    fields = [
+      "id",
+      "supplier",
+      "supplier_name",
+      "invoice_number",
+      "invoice_date",
+      "total_amount",
+      "status",
+      "billed_flag",
+      "received_flag",
+      "notes",
+      "lines_total",
+      "total_mismatch",
+      "lines",
+      "created_at",
+      "updated_at",
+    ]
+    expandable_fields = ["lines_total", "total_mismatch", "lines"]
+    select_related = {"supplier_name": "supplier"}
+    prefetch_related = {"lines": "lines"}
+    annotations = {"lines_total": "with_line_totals", "total_mismatch": "with_line_totals"}
+    validator_relations = {"supplier_name": "supplier", "lines_total": "lines", "total_mismatch": "lines", "lines": "lines"}
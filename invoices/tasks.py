@@ -0,0 +1,16 @@
+from dataclasses import asdict
+
+from celery import shared_task
+
+from .artifacts import collect_artifacts as run_artifact_gc
+from .reconciliation import reconcile_receipts as run_reconciliation
+
+
+@shared_task
+def reconcile_receipts(full: bool = False):
+  return asdict(run_reconciliation(full=full))
+
+
+@shared_task
+def collect_artifacts():
+  return asdict(run_artifact_gc())
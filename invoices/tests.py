@@ -0,0 +1,78 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+from .exports import stream_period_archive
+from .models import Invoice, InvoiceFile
+from .pipeline import process_statement_pdf
+
+
+def _statement(path: Path, invoices) -> Path:
+  """A combined FCA statement: a header page and a summary page per invoice."""
+  pdf = canvas.Canvas(str(path))
+  for number, day in invoices:
+    for lines in (
+      ["MOPAR CANADA INC. - PARTS INVOICE", f"INVOICE NUMBER: 09308000W{number}", f"INVOICE DATE: JANUARY {day}, 2024"],
+      ["ARC01217 FREIGHT CHARGE 120.50", "GST/HST @ 13% 15.67", "NET INVOICE AMOUNT 136.17"],
+    ):
+      y = 800
+      for line in lines:
+        pdf.drawString(50, y, line)
+        y -= 20
+      pdf.showPage()
+  pdf.save()
+  return path
+
+
+class PeriodExportFromPipelineTests(TestCase):
+  def setUp(self):
+    self.root = Path(tempfile.mkdtemp())
+    self.addCleanup(shutil.rmtree, self.root)
+    patcher = mock.patch.dict(os.environ, {"ARTIFACT_STORAGE_URL": (self.root / "artifacts").as_uri()})
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def test_parsed_statement_is_in_the_period_export(self):
+    statement = _statement(self.root / "statement.pdf", [("12345", 15), ("12346", 20)])
+    results = process_statement_pdf(statement, "statement.pdf")
+    self.assertEqual([result.get("error") for result in results], [None, None])
+
+    invoice = Invoice.objects.get(invoice_number="09308000W12345")
+    self.assertEqual(invoice.supplier.name, "FCA")
+    self.assertEqual(invoice.invoice_date, date(2024, 1, 15))
+    self.assertEqual(
+      sorted(invoice.files.values_list("file_kind", flat=True)),
+      [InvoiceFile.FileKind.GL_CODING, InvoiceFile.FileKind.RAW, InvoiceFile.FileKind.SUMMARY],
+    )
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(stream_period_archive(date(2024, 1, 1), date(2024, 1, 31)))))
+    names = archive.namelist()
+    self.assertEqual(len(names), 7)
+    self.assertEqual(names[-1], "manifest.csv")
+    self.assertNotIn("missing", archive.read("manifest.csv").decode())
+    for number in ("09308000W12345", "09308000W12346"):
+      for kind in ("raw", "summary", "gl_coding"):
+        self.assertTrue(any(name.startswith(f"fca/{number}/{kind}-") for name in names), (number, kind, names))
+
+    raw = next(name for name in names if name.startswith("fca/09308000W12346/raw-"))
+    own_pages = PdfReader(io.BytesIO(archive.read(raw))).pages
+    self.assertEqual(len(own_pages), 2)
+    self.assertIn("09308000W12346", own_pages[0].extract_text())
+
+  def test_reparsing_updates_the_pipeline_files_in_place(self):
+    statement = _statement(self.root / "statement.pdf", [("12345", 15)])
+    process_statement_pdf(statement, "statement.pdf")
+    with mock.patch("invoices.pipeline.cached_statement_results", return_value=None):
+      process_statement_pdf(statement, "statement.pdf")
+
+    self.assertEqual(Invoice.objects.count(), 1)
+    self.assertEqual(InvoiceFile.objects.count(), 3)
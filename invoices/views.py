@@ -0,0 +1,34 @@
+from accounts.models import User
+from common.api import SyncReadOnlyViewSet
+from .models import Invoice, InvoiceLine
+from .serializers import InvoiceLineSerializer, InvoiceSerializer
+
+INVOICE_ROLES = [User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]
+
+
+class InvoiceViewSet(SyncReadOnlyViewSet):
+  queryset = Invoice.objects.all()
+  serializer_class = InvoiceSerializer
+  allowed_roles = INVOICE_ROLES
+  filterset_fields = {
+    **SyncReadOnlyViewSet.filterset_fields,
+    "supplier": ["exact"],
+    "status": ["exact"],
+    "invoice_date": ["gte", "lte"],
+    "received_flag": ["exact"],
+    "billed_flag": ["exact"],
+  }
+  search_fields = ["invoice_number"]
+
+
+class InvoiceLineViewSet(SyncReadOnlyViewSet):
+  queryset = InvoiceLine.objects.all()
+  serializer_class = InvoiceLineSerializer
+  allowed_roles = INVOICE_ROLES
+  filterset_fields = {
+    **SyncReadOnlyViewSet.filterset_fields,
+    "invoice": ["exact"],
+    "part_number": ["exact"],
+    "refund_status": ["exact"],
+  }
+  search_fields = ["part_number", "description"]
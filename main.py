@@ -1,25 +1,24 @@
-import shutil
-import tempfile
+import re
 from pathlib import Path
 
-from fastapi import FastAPI, File, Request, UploadFile
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
-from pdf_utils import InvoiceProcessingError, process_combined_pdf
+from metrics import CONTENT_TYPE, REGISTRY, authorized
+from parsers.fca import PARSER_VERSION
+from pdf_utils import OUTPUT_PREFIXES, InvoiceProcessingError, process_combined_pdf
+from storage import StorageError, get_storage
+from storage.dedup import put_file
+from storage.parse_cache import ParseCache
 
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "templates"
-OUTPUT_DIR = BASE_DIR / "output"
 
-app = FastAPI(title="FCA Invoice Parser")
-
-# Ensure output directories exist early.
-for sub in [OUTPUT_DIR / "invoices", OUTPUT_DIR / "summaries", OUTPUT_DIR / "mappings"]:
-    sub.mkdir(parents=True, exist_ok=True)
+RESULT_NAMESPACE = "splitter"
+DIGEST_RE = re.compile(r"[0-9a-f]{64}")
 
-app.mount("/output", StaticFiles(directory=str(OUTPUT_DIR)), name="output")
+app = FastAPI(title="FCA Invoice Parser")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
@@ -28,16 +27,36 @@ async def upload_form(request: Request):
     return templates.TemplateResponse("fca_upload.html", {"request": request})
 
 
+def _artifact_keys(invoices):
+    for invoice in invoices:
+        yield from invoice["files"].values()
+
+
+def _parse_cache() -> ParseCache:
+    return ParseCache(get_storage(), RESULT_NAMESPACE, PARSER_VERSION, _artifact_keys)
+
+
+def process_upload(source):
+    """
+    Split a combined PDF and return `(digest, invoices)`, reusing the cached
+    result when the same bytes were split before by this parser version.
+    """
+    storage = get_storage()
+    cache = _parse_cache()
+    digest, _ = put_file(storage, source)
+    invoices = cache.get(digest)
+    if invoices is None:
+        invoices = process_combined_pdf(source, storage)
+        cache.put(digest, invoices)
+    return digest, invoices
+
+
 @app.post("/upload", response_class=HTMLResponse)
 async def upload_pdf(request: Request, file: UploadFile = File(...)):
-    # Save uploaded file to a temporary location.
-    tmp_dir = tempfile.mkdtemp()
-    tmp_path = Path(tmp_dir) / file.filename
-    with open(tmp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
+    # Parse the upload where Starlette spooled it: in memory for small files, an
+    # anonymous temp file past the spool limit. No extra copy is made.
     try:
-        invoices = process_combined_pdf(tmp_path, OUTPUT_DIR)
+        digest, _ = process_upload(file.file)
     except InvoiceProcessingError as exc:
         return templates.TemplateResponse(
             "fca_upload.html",
@@ -48,23 +67,61 @@ async def upload_pdf(request: Request, file: UploadFile = File(...)):
             status_code=400,
         )
     finally:
-        # Clean up uploaded file
-        try:
-            tmp_path.unlink(missing_ok=True)
-            Path(tmp_dir).rmdir()
-        except OSError:
-            pass
+        await file.close()
 
+    return RedirectResponse(url=f"/results/{digest}", status_code=303)
+
+
+@app.get("/results/{digest}", response_class=HTMLResponse)
+def show_results(request: Request, digest: str):
+    # Rendered from the parse cache, so reloading or sharing the page does not re-split.
+    invoices = _parse_cache().get(digest) if DIGEST_RE.fullmatch(digest) else None
+    if invoices is None:
+        raise HTTPException(status_code=404, detail="No parsed result for this upload; upload it again")
     return templates.TemplateResponse(
         "fca_results.html", {"request": request, "invoices": invoices}
     )
 
 
+def servable_key(key: str) -> bool:
+    # Only the split invoice PDFs the results page links to; uploads, cached parses and
+    # fingerprints share the store but are not for download.
+    parts = key.split("/")
+    return len(parts) > 1 and parts[0] in OUTPUT_PREFIXES and all(part not in ("", ".", "..") for part in parts)
+
+
+@app.get("/files/{key:path}")
+def download_file(key: str):
+    # Streams from whichever backend ARTIFACT_STORAGE_URL points at, so any app server can serve it.
+    if not servable_key(key):
+        raise HTTPException(status_code=404, detail="Not found")
+    storage = get_storage()
+    try:
+        found = storage.exists(key)
+    except StorageError:
+        found = False
+    if not found:
+        raise HTTPException(status_code=404, detail="Not found")
+    return StreamingResponse(
+        storage.iter_chunks(key),
+        media_type="application/pdf" if key.endswith(".pdf") else "application/octet-stream",
+        headers={"Content-Disposition": f'inline; filename="{Path(key).name}"'},
+    )
+
+
 @app.get("/health", response_class=HTMLResponse)
 async def healthcheck():
     return "ok"
 
 
+@app.get("/metrics")
+def metrics(request: Request):
+    # Prometheus text format; set METRICS_TOKEN to require `Authorization: Bearer <token>`.
+    if not authorized(request.headers.get("authorization")):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -72,18 +72,20 @@ def _render_summary_page(invoice_info: Dict) -> BytesIO:
     return buffer
 
 
-def build_summary_mapping_pdf(invoice_info: Dict, summary_pdf: Path, output_path: Path) -> None:
-    summary_pdf = Path(summary_pdf)
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
+def build_summary_mapping_pdf(invoice_info: Dict, summary_pdf, output) -> None:
+    """`summary_pdf` and `output` may be paths or binary file objects (e.g. storage writers)."""
     # First page: rendered summary + mapping
     summary_buffer = _render_summary_page(invoice_info)
 
     merger = PdfMerger()
     merger.append(PdfReader(summary_buffer))
-    merger.append(str(summary_pdf))
+    merger.append(summary_pdf if hasattr(summary_pdf, "read") else str(summary_pdf))
 
-    with output_path.open("wb") as f:
-        merger.write(f)
+    if hasattr(output, "write"):
+        merger.write(output)
+    else:
+        output_path = Path(output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("wb") as f:
+            merger.write(f)
     merger.close()
@@ -0,0 +1,212 @@
+import logging
+import smtplib
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the SMTP session itself is suspect and gets reopened.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+@dataclass
+class DispatchResult:
+  claimed: int = 0
+  messages: int = 0
+  sent: int = 0
+  retried: int = 0
+  failed: int = 0
+
+  def add(self, other: "DispatchResult") -> None:
+    self.claimed += other.claimed
+    self.messages += other.messages
+    self.sent += other.sent
+    self.retried += other.retried
+    self.failed += other.failed
+
+
+class RateLimiter:
+  """Spaces calls at least `1 / per_second` apart; 0 disables throttling."""
+
+  def __init__(self, per_second: float):
+    self.interval = 1.0 / per_second if per_second > 0 else 0.0
+    self.next_at = 0.0
+
+  def wait(self) -> None:
+    if not self.interval:
+      return
+    now = time.monotonic()
+    if now < self.next_at:
+      time.sleep(self.next_at - now)
+    self.next_at = max(now, self.next_at) + self.interval
+
+
+def due_notifications(now):
+  return Notification.objects.filter(
+    Q(send_on__isnull=True) | Q(send_on__lte=now), status=Notification.Status.PENDING
+  )
+
+
+def build_message(notifications: List[Notification], connection) -> EmailMessage:
+  """One notification goes out as-is; several are rendered into a digest."""
+  first = notifications[0]
+  if len(notifications) == 1:
+    subject, body = first.subject or first.get_type_display(), first.body
+  else:
+    subject = f"{len(notifications)} {first.get_type_display().lower()} notifications"
+    body = render_to_string("notifications/digest.txt", {"notifications": notifications, "type": first.get_type_display()})
+  return EmailMessage(
+    subject=subject,
+    body=body,
+    from_email=settings.DEFAULT_FROM_EMAIL,
+    to=[first.target_email],
+    connection=connection,
+  )
+
+
+def group_for_digest(batch: List[Notification], window_seconds: int) -> List[List[Notification]]:
+  """
+  Split a claimed batch into messages: rows for the same (target_email, type)
+  created within `window_seconds` of the first row of their group share one
+  message. A window of 0 sends every row on its own.
+  """
+  if window_seconds <= 0:
+    return [[notification] for notification in batch]
+
+  window = timedelta(seconds=window_seconds)
+  by_key: Dict[Tuple[str, str], List[Notification]] = defaultdict(list)
+  for notification in batch:
+    by_key[(notification.target_email.lower(), notification.type)].append(notification)
+
+  groups: List[List[Notification]] = []
+  for rows in by_key.values():
+    rows.sort(key=lambda n: (n.created_at, n.pk))
+    current = [rows[0]]
+    for notification in rows[1:]:
+      if notification.created_at - current[0].created_at <= window:
+        current.append(notification)
+      else:
+        groups.append(current)
+        current = [notification]
+    groups.append(current)
+  return groups
+
+
+def retry_delay(attempts: int) -> timedelta:
+  return timedelta(seconds=settings.NOTIFICATION_RETRY_BACKOFF * 2 ** max(attempts - 1, 0))
+
+
+def _send(connection, message: EmailMessage) -> None:
+  try:
+    connection.send_messages([message])
+  except CONNECTION_ERRORS:
+    # One reconnect per message; a second failure counts against the row.
+    connection.close()
+    connection.open()
+    connection.send_messages([message])
+
+
+def claim_batch(batch_size: int) -> List[Notification]:
+  """
+  Claim up to `batch_size` due rows with `SELECT ... FOR UPDATE SKIP LOCKED`
+  (so parallel workers split the queue) and lease them by pushing `send_on`
+  `NOTIFICATION_CLAIM_LEASE` seconds ahead, all in one short transaction.
+  Sending happens after the locks are gone; a worker that dies mid-batch
+  leaves its rows to come due again when the lease runs out.
+  """
+  now = timezone.now()
+  with transaction.atomic():
+    batch: List[Notification] = list(
+      due_notifications(now).select_for_update(skip_locked=True).order_by("send_on", "id")[:batch_size]
+    )
+    if batch:
+      Notification.objects.filter(pk__in=[notification.pk for notification in batch]).update(
+        send_on=now + timedelta(seconds=settings.NOTIFICATION_CLAIM_LEASE)
+      )
+  return batch
+
+
+def dispatch_batch(connection, limiter: RateLimiter, batch_size: int) -> DispatchResult:
+  """
+  Claim a batch (see `claim_batch`), send it over the shared, already open
+  connection (merged into digests per `NOTIFICATION_DIGEST_WINDOW`) and
+  write the outcome back in bulk. No row locks are held during SMTP, and an
+  outcome write can no longer roll back a message that already went out.
+  Rows in a digest succeed or fail together.
+  """
+  result = DispatchResult()
+  batch = claim_batch(batch_size)
+  result.claimed = len(batch)
+  sent_ids: List[int] = []
+  retries: List[Notification] = []
+
+  for group in group_for_digest(batch, settings.NOTIFICATION_DIGEST_WINDOW):
+    limiter.wait()
+    result.messages += 1
+    try:
+      _send(connection, build_message(group, connection))
+    except (smtplib.SMTPException, OSError) as exc:
+      logger.warning("Sending %d notification(s) to %s failed: %s", len(group), group[0].target_email, exc)
+      failed_at = timezone.now()
+      for notification in group:
+        notification.attempts += 1
+        notification.last_error = str(exc)[:2000]
+        notification.updated_at = failed_at
+        if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+          notification.status = Notification.Status.FAILED
+          result.failed += 1
+        else:
+          notification.send_on = failed_at + retry_delay(notification.attempts)
+          result.retried += 1
+        retries.append(notification)
+    else:
+      sent_ids.extend(notification.pk for notification in group)
+
+  sent_at = timezone.now()
+  if sent_ids:
+    result.sent = Notification.objects.filter(pk__in=sent_ids).update(
+      status=Notification.Status.SENT, sent_at=sent_at, last_error="", updated_at=sent_at
+    )
+  if retries:
+    Notification.objects.bulk_update(retries, ["status", "attempts", "last_error", "send_on", "updated_at"])
+
+  return result
+
+
+def dispatch_pending(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> DispatchResult:
+  """Drain due notifications batch by batch over a single SMTP session."""
+  batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+  limiter = RateLimiter(settings.NOTIFICATION_RATE_LIMIT)
+  total = DispatchResult()
+  batches = 0
+
+  if not due_notifications(timezone.now()).exists():
+    return total
+
+  connection = get_connection(fail_silently=False)
+  # Opened here, send_messages() reuses the session instead of opening and
+  # closing one per message.
+  connection.open()
+  try:
+    while max_batches is None or batches < max_batches:
+      result = dispatch_batch(connection, limiter, batch_size)
+      total.add(result)
+      batches += 1
+      # A batch where nothing went out is all retries pushed into the future.
+      if result.claimed < batch_size or not result.sent:
+        break
+  finally:
+    connection.close()
+  return total
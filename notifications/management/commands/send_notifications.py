@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import dispatch_pending
+
+
+class Command(BaseCommand):
+  help = "Send due notifications over a single SMTP connection."
+
+  def add_arguments(self, parser):
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows claimed per batch (default: NOTIFICATION_BATCH_SIZE)")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+
+  def handle(self, *args, **options):
+    result = dispatch_pending(batch_size=options["batch_size"], max_batches=options["max_batches"])
+    self.stdout.write(self.style.SUCCESS(
+      f"Claimed {result.claimed} in {result.messages} messages: {result.sent} sent, {result.retried} to retry, {result.failed} failed"
+    ))
@@ -23,6 +23,13 @@ class Notification(TimeStampedModel):
   sent_at = models.DateTimeField(null=True, blank=True)
   status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
   payload = models.JSONField(default=dict, blank=True)
+  # Set by scheduled producers so a rerun can't queue the same notice twice.
+  dedupe_key = models.CharField(max_length=191, unique=True, null=True, blank=True)
+  attempts = models.PositiveSmallIntegerField(default=0)
+  last_error = models.TextField(blank=True)
+
+  class Meta:
+    indexes = [models.Index(fields=["status", "send_on"], name="notification_due_idx")]
 
   def __str__(self) -> str:
     return f"{self.type} -> {self.target_email}"
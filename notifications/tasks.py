@@ -0,0 +1,10 @@
+from dataclasses import asdict
+
+from celery import shared_task
+
+from .dispatch import dispatch_pending
+
+
+@shared_task
+def dispatch_notifications(batch_size=None, max_batches=None):
+  return asdict(dispatch_pending(batch_size=batch_size, max_batches=max_batches))
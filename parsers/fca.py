@@ -4,6 +4,10 @@ from typing import Dict, List
 
 INVOICE_PREFIX = "09308000"
 
+# Bump whenever parsing (or the splitter's result shape) changes, so cached
+# results from the older version are parsed again.
+PARSER_VERSION = 1
+
 INVOICE_TYPE_MAP: Dict[str, str] = {
     "W": "weekly invoice",
     "WD": "weekly deferred invoice",
@@ -67,8 +71,9 @@ def _parse_invoice_date(raw_date: str) -> str:
 
 
 def parse_invoice_metadata(first_page_text: str) -> Dict:
-    invoice_number_match = re.search(r"INVOICE\s+NUMBER\s*:\s*([0-9A-Z\s]+)", first_page_text, re.IGNORECASE)
-    invoice_date_match = re.search(r"INVOICE\s+DATE\s*:\s*([A-Z\s,0-9]+)", first_page_text, re.IGNORECASE)
+    # Values stop at the end of the line; `\s` would run on into the next label.
+    invoice_number_match = re.search(r"INVOICE\s+NUMBER\s*:[ \t]*([0-9A-Z \t]+)", first_page_text, re.IGNORECASE)
+    invoice_date_match = re.search(r"INVOICE\s+DATE\s*:[ \t]*([A-Z \t,0-9]+)", first_page_text, re.IGNORECASE)
 
     invoice_number_raw = invoice_number_match.group(1).strip() if invoice_number_match else ""
     invoice_date_raw = invoice_date_match.group(1).strip() if invoice_date_match else ""
@@ -105,7 +110,9 @@ def parse_summary(summary_text: str) -> Dict:
     accounts: List[Dict] = []
     tax: Dict[str, float] = {"gst_hst_amount": 0.0, "gst_hst_rate": 0.0}
 
-    account_pattern = re.compile(r"^([A-Z0-9.]+)\s+(.*\S)\s+([0-9,]+\.\d{2})$")
+    # FCA codes carry a digit or a dot (ARC01217, ENV.LUBRICANT); plain words such as
+    # "NET INVOICE AMOUNT" are totals, not accounts.
+    account_pattern = re.compile(r"^([A-Z0-9]*[0-9.][A-Z0-9.]*)\s+(.*\S)\s+([0-9,]+\.\d{2})$")
     amount_pattern = re.compile(r"^(TOTAL.*|DISCOUNTS\s+EARNED.*|NET\s+INVOICE\s+AMOUNT.*|NET\s+AMOUNT.*|.*TOTAL.*)\s+([0-9,]+\.\d{2})$",
                                 re.IGNORECASE)
     gst_pattern = re.compile(r"GST/HST.*?@\s*([0-9.]+)%[^0-9]*([0-9,]+\.\d{2})", re.IGNORECASE)
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
   "sales",
   "notifications",
   "audit",
+  "intake",
   "web",
 ]
 
@@ -74,6 +75,10 @@ DATABASES = {
   "default": env.db(default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
 }
 
+CACHES = {
+  "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 AUTH_PASSWORD_VALIDATORS = [
   {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
   {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -118,6 +123,32 @@ CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="redis://localhost:
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+CELERY_BEAT_SCHEDULE = {
+  "reconcile-receipts": {
+    "task": "invoices.tasks.reconcile_receipts",
+    "schedule": env.int("RECONCILE_RECEIPTS_INTERVAL", default=300),
+  },
+  "scan-radio-expiries": {
+    "task": "service_requests.tasks.scan_radio_expiries",
+    "schedule": env.int("RADIO_EXPIRY_SCAN_INTERVAL", default=3600),
+  },
+  "dispatch-notifications": {
+    "task": "notifications.tasks.dispatch_notifications",
+    "schedule": env.int("NOTIFICATION_DISPATCH_INTERVAL", default=60),
+  },
+  "poll-intake-maildir": {
+    "task": "intake.tasks.poll_maildir",
+    "schedule": env.float("INTAKE_POLL_INTERVAL", default=30),
+  },
+  "maintain-audit-partitions": {
+    "task": "audit.tasks.maintain_audit_partitions",
+    "schedule": 60 * 60 * 24,
+  },
+  "collect-artifacts": {
+    "task": "invoices.tasks.collect_artifacts",
+    "schedule": env.int("ARTIFACT_GC_INTERVAL", default=60 * 60 * 6),
+  },
+}
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = env("EMAIL_HOST", default="localhost")
@@ -126,6 +157,55 @@ EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=False)
 DEFAULT_FROM_EMAIL = env("EMAIL_FROM", default="noreply@example.com")
+# Receiving mismatches go here; falls back to the invoice uploader when blank.
+PARTS_NOTIFICATION_EMAIL = env("PARTS_NOTIFICATION_EMAIL", default="")
+# Radio expiry warnings go here; falls back to the assignee, then the creator.
+SERVICE_NOTIFICATION_EMAIL = env("SERVICE_NOTIFICATION_EMAIL", default="")
+RADIO_EXPIRY_WARNING_DAYS = env.int("RADIO_EXPIRY_WARNING_DAYS", default=7)
+# Notification dispatcher: rows claimed per batch, messages per second (0 = unthrottled),
+# attempts before a row is marked failed, and the first retry delay (doubles each attempt).
+NOTIFICATION_BATCH_SIZE = env.int("NOTIFICATION_BATCH_SIZE", default=100)
+NOTIFICATION_RATE_LIMIT = env.float("NOTIFICATION_RATE_LIMIT", default=0)
+NOTIFICATION_MAX_ATTEMPTS = env.int("NOTIFICATION_MAX_ATTEMPTS", default=5)
+NOTIFICATION_RETRY_BACKOFF = env.int("NOTIFICATION_RETRY_BACKOFF", default=60)
+# Seconds a claimed batch stays hidden from other workers while it is sent; keep it above
+# NOTIFICATION_BATCH_SIZE / NOTIFICATION_RATE_LIMIT.
+NOTIFICATION_CLAIM_LEASE = env.int("NOTIFICATION_CLAIM_LEASE", default=600)
+# Same-recipient, same-type notifications created within this many seconds go out
+# as one digest email (0 = one email per notification).
+NOTIFICATION_DIGEST_WINDOW = env.int("NOTIFICATION_DIGEST_WINDOW", default=900)
+
+# Audit events: "buffer" batches them in-process, "celery" hands each batch to a worker,
+# "sync" writes every event as it happens (handy in the shell).
+AUDIT_WRITER = env("AUDIT_WRITER", default="buffer")
+AUDIT_BATCH_SIZE = env.int("AUDIT_BATCH_SIZE", default=200)
+AUDIT_FLUSH_INTERVAL = env.float("AUDIT_FLUSH_INTERVAL", default=2.0)
+AUDIT_MAX_PENDING = env.int("AUDIT_MAX_PENDING", default=10000)
+# Months of audit history kept in the database; older months are exported to
+# AUDIT_ARCHIVE_DIR as .jsonl.gz and dropped. Partitions are pre-created this many months ahead.
+AUDIT_RETENTION_MONTHS = env.int("AUDIT_RETENTION_MONTHS", default=24)
+AUDIT_ARCHIVE_DIR = Path(env("AUDIT_ARCHIVE_DIR", default=str(BASE_DIR / "archive" / "audit")))
+AUDIT_PARTITION_MONTHS_AHEAD = env.int("AUDIT_PARTITION_MONTHS_AHEAD", default=3)
+
+# Mail intake: statements delivered to this maildir (new/ cur/ tmp/) are parsed automatically.
+INTAKE_MAILDIR = env("INTAKE_MAILDIR", default="")
+INTAKE_SPOOL_DIR = Path(env("INTAKE_SPOOL_DIR", default=str(MEDIA_ROOT / "intake")))
+INTAKE_MAX_WORKERS = env.int("INTAKE_MAX_WORKERS", default=4)
+INTAKE_POLL_INTERVAL = env.float("INTAKE_POLL_INTERVAL", default=30)
+# Seconds a document may sit in "processing" before another delivery of the same PDF may take it
+# over (its worker is assumed dead). Keep it well above the slowest statement parse.
+INTAKE_DOCUMENT_LEASE = env.int("INTAKE_DOCUMENT_LEASE", default=1800)
+
+# Generated PDFs (see ARTIFACT_STORAGE_URL) unused for this many days are deleted, then the least
+# recently used go until the store is under ARTIFACT_GC_MAX_BYTES. 0 disables either limit.
+ARTIFACT_GC_MAX_AGE_DAYS = env.int("ARTIFACT_GC_MAX_AGE_DAYS", default=180)
+ARTIFACT_GC_MAX_BYTES = env.int("ARTIFACT_GC_MAX_BYTES", default=20 * 1024 ** 3)
+
+# Supplier that invoices parsed from FCA statements (FCA parser page, mail intake) are filed under.
+FCA_SUPPLIER_NAME = env("FCA_SUPPLIER_NAME", default="FCA")
+
+# Scrapers send `Authorization: Bearer <token>` to /metrics; without a token only staff sessions can read it.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
 
 LOGGING = {
   "version": 1,
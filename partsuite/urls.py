@@ -2,7 +2,19 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
 
+from invoices.views import InvoiceLineViewSet, InvoiceViewSet
+from receipts.views import ReceiptUploadViewSet
+from returns.views import ReturnRequestViewSet
+from sales.views import DueBillRequestViewSet
+from service_requests.views import ServiceRequestViewSet
+
 router = routers.DefaultRouter()
+router.register("invoices", InvoiceViewSet, basename="api-invoice")
+router.register("invoice-lines", InvoiceLineViewSet, basename="api-invoice-line")
+router.register("receipts", ReceiptUploadViewSet, basename="api-receipt")
+router.register("returns", ReturnRequestViewSet, basename="api-return")
+router.register("service-requests", ServiceRequestViewSet, basename="api-service-request")
+router.register("due-bills", DueBillRequestViewSet, basename="api-due-bill")
 
 urlpatterns = [
   path("admin/", admin.site.urls),
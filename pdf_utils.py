@@ -1,38 +1,57 @@
-import re
-from datetime import datetime
+import io
+import mmap
+import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
 
 import pdfplumber
+import pdfplumber.page
+from pdfminer.pdfpage import PDFPage
 from PyPDF2 import PdfReader, PdfWriter
 
+from fingerprints import PageIndex, content_fingerprint, text_fingerprint
 from mapping_pdf import build_summary_mapping_pdf
+from metrics import PIPELINE_INVOICES, PIPELINE_PAGES, PIPELINE_SECONDS, PIPELINE_STAGE_SECONDS
 from parsers.fca import (
     detect_invoice_start,
     map_accounts_to_internal,
     parse_invoice_metadata,
     parse_summary,
 )
+from storage import Storage, get_storage
 
 
 class InvoiceProcessingError(Exception):
     """Raised when invoice data cannot be parsed."""
 
 
-def save_pdf_subset(reader: PdfReader, page_indices: List[int], output_path: Path) -> None:
+PIPELINE = "splitter"
+
+
+def _stage(name: str):
+    return PIPELINE_STAGE_SECONDS.time(pipeline=PIPELINE, stage=name)
+
+
+def write_pdf_subset(reader: PdfReader, page_indices: List[int], target) -> None:
     writer = PdfWriter()
     for idx in page_indices:
         writer.add_page(reader.pages[idx])
+    writer.write(target)
+
+
+def save_pdf_subset(reader: PdfReader, page_indices: List[int], output_path: Path) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with output_path.open("wb") as f:
-        writer.write(f)
+        write_pdf_subset(reader, page_indices, f)
 
 
 def _finalize_invoice(
     reader: PdfReader,
     invoice_pages: List[int],
     page_texts: List[str],
-    output_base: Path,
+    storage: Storage,
 ) -> Optional[Dict]:
     if not invoice_pages:
         return None
@@ -41,9 +60,11 @@ def _finalize_invoice(
     summary_page_text = page_texts[-1]
 
     try:
-        metadata = parse_invoice_metadata(first_page_text)
-        summary_data = parse_summary(summary_page_text)
-        mapped_accounts = map_accounts_to_internal(summary_data)
+        with _stage("parse_invoice_metadata"):
+            metadata = parse_invoice_metadata(first_page_text)
+        with _stage("parse_summary"):
+            summary_data = parse_summary(summary_page_text)
+            mapped_accounts = map_accounts_to_internal(summary_data)
     except Exception as exc:
         raise InvoiceProcessingError(
             f"Failed to parse invoice starting on page {invoice_pages[0] + 1}: {exc}"
@@ -51,58 +72,302 @@ def _finalize_invoice(
 
     invoice_key_norm = metadata["invoice_key_norm"]
 
-    invoice_pdf_path = output_base / "invoices" / f"{invoice_key_norm}.pdf"
-    summary_pdf_path = output_base / "summaries" / f"{invoice_key_norm}_summary.pdf"
-    mapping_pdf_path = output_base / "mappings" / f"{invoice_key_norm}_mapping.pdf"
-    base_parent = output_base.parent
+    invoice_key = f"{INVOICES_PREFIX}/{invoice_key_norm}.pdf"
+    summary_key = f"{SUMMARIES_PREFIX}/{invoice_key_norm}_summary.pdf"
+    mapping_key = f"{MAPPINGS_PREFIX}/{invoice_key_norm}_mapping.pdf"
+
+    with _stage("save_pdf_subset"):
+        with storage.open_write(invoice_key, "application/pdf") as target:
+            write_pdf_subset(reader, invoice_pages, target)
 
-    save_pdf_subset(reader, invoice_pages, invoice_pdf_path)
-    save_pdf_subset(reader, [invoice_pages[-1]], summary_pdf_path)
+        # The one-page summary is needed twice (stored, and merged into the mapping PDF).
+        summary_buffer = io.BytesIO()
+        write_pdf_subset(reader, [invoice_pages[-1]], summary_buffer)
+        storage.save_bytes(summary_key, summary_buffer.getvalue(), "application/pdf")
 
     invoice_info = {
         **metadata,
+        "pages": [invoice_pages[0] + 1, invoice_pages[-1] + 1],
         "summary": summary_data,
         "mapped_accounts": mapped_accounts,
         "files": {
-            # URLs are relative so they can be served by StaticFiles mounted at /output.
-            "invoice_pdf": str(invoice_pdf_path.relative_to(base_parent)),
-            "summary_pdf": str(summary_pdf_path.relative_to(base_parent)),
-            "summary_mapping_pdf": str(mapping_pdf_path.relative_to(base_parent)),
+            # Storage keys; main.py serves them under /files/.
+            "invoice_pdf": invoice_key,
+            "summary_pdf": summary_key,
+            "summary_mapping_pdf": mapping_key,
         },
     }
 
-    build_summary_mapping_pdf(invoice_info, summary_pdf_path, mapping_pdf_path)
+    summary_buffer.seek(0)
+    with _stage("build_summary_mapping_pdf"), storage.open_write(mapping_key, "application/pdf") as target:
+        build_summary_mapping_pdf(invoice_info, summary_buffer, target)
     return invoice_info
 
 
-def process_combined_pdf(pdf_path: Path, output_base: Path) -> List[Dict]:
-    output_base.mkdir(parents=True, exist_ok=True)
+PdfSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+# Low-memory mode (the default) drops pdfplumber/pdfminer/PyPDF2 caches after every
+# invoice; PDF_MAX_RSS_MB additionally fails a statement whose processing pushes the
+# worker past that resident size, instead of letting the OOM killer take the worker.
+LOW_MEMORY = os.environ.get("PDF_LOW_MEMORY", "1") != "0"
+MAX_RSS = int(os.environ.get("PDF_MAX_RSS_MB", "0")) * 1024 * 1024
+# Skip invoices already split from an earlier (overlapping) statement; see fingerprints.py.
+PAGE_FINGERPRINTS = os.environ.get("PDF_PAGE_FINGERPRINTS", "1") != "0"
+
+# Storage prefixes of the per-invoice PDFs; the only keys main.py serves under /files/.
+INVOICES_PREFIX = "invoices"
+SUMMARIES_PREFIX = "summaries"
+MAPPINGS_PREFIX = "mappings"
+OUTPUT_PREFIXES = (INVOICES_PREFIX, SUMMARIES_PREFIX, MAPPINGS_PREFIX)
+
+
+class MemoryCeilingExceeded(InvoiceProcessingError):
+    """Raised when processing a statement pushes RSS past the configured ceiling."""
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size in bytes from /proc (Linux); None where unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+@contextmanager
+def open_pdf_source(source: PdfSource, use_mmap: bool = True) -> Iterator[BinaryIO]:
+    """
+    A seekable stream over the PDF without copying it: files on disk are
+    memory-mapped (or opened, when mapped pages should not count towards
+    RSS), bytes are wrapped, and open files (e.g. an upload's spooled file)
+    are used as they are.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            if not use_mmap:
+                yield handle
+                return
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+        return
+    source.seek(0)
+    yield source
+
+
+class _Cursor(io.RawIOBase):
+    """
+    An independent read position over a shared seekable stream, so pdfplumber
+    and PyPDF2 can read the same PDF in turns without a second copy.
+    """
+
+    def __init__(self, base: BinaryIO):
+        self._base = base
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
 
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            # mmap.seek() returns None before Python 3.13, so ask tell().
+            self._base.seek(0, io.SEEK_END)
+            self._pos = self._base.tell() + offset
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        self._base.seek(self._pos)
+        data = self._base.read(len(buffer))
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def _cursor(stream: BinaryIO) -> BinaryIO:
+    return io.BufferedReader(_Cursor(stream), buffer_size=64 * 1024)
+
+
+def _iter_pages(pdf, low_memory: bool) -> Iterator[pdfplumber.page.Page]:
+    if not low_memory:
+        yield from pdf.pages
+        return
+    # `pdf.pages` builds (and keeps) every page up front, content streams included.
+    for number, page_obj in enumerate(PDFPage.create_pages(pdf.doc), start=1):
+        yield pdfplumber.page.Page(pdf, page_obj, page_number=number)
+
+
+def _release_caches(pdf, reader: PdfReader) -> None:
+    # pdfminer keeps every object it parses and PyPDF2 every object it resolves;
+    # both re-read from the stream on demand once cleared.
+    for cache in (
+        getattr(pdf.doc, "_cached_objs", None),
+        getattr(pdf.doc, "_parsed_objs", None),
+        getattr(reader, "resolved_objects", None),
+    ):
+        if cache is not None:
+            cache.clear()
+
+
+class _PendingPage:
+    __slots__ = ("index", "page", "text", "record", "fingerprints")
+
+    def __init__(self, index, page, text, record, fingerprints):
+        self.index = index
+        self.page = page
+        self.text = text
+        self.record = record
+        self.fingerprints = fingerprints
+
+    def release(self) -> None:
+        # Only an invoice's first and last page are read again.
+        self.page = None
+        self.text = None
+
+
+def process_combined_pdf(
+    source: PdfSource,
+    storage: Optional[Storage] = None,
+    low_memory: Optional[bool] = None,
+    max_rss: Optional[int] = None,
+    fingerprints: Optional[bool] = None,
+) -> List[Dict]:
+    """
+    Split a combined statement into invoices, one invoice at a time. Only the
+    current invoice is held: a `_PendingPage` per page with its number and
+    fingerprints, plus the page object and text of its first and (so far)
+    last page; pages in between are let go once the next page arrives. In
+    low-memory mode page layouts and parser caches are released as each
+    page/invoice is done, so peak memory does not grow with page count.
+    `max_rss` (bytes, 0 for none) raises `MemoryCeilingExceeded` if crossed.
+
+    With page fingerprints on, an invoice whose pages were all seen before
+    (an overlapping or re-sent statement) is not re-rendered: its stored
+    result comes back with `duplicate: True`, and pages known by their
+    content stream are not even text-extracted.
+    """
+    storage = storage or get_storage()
+    max_rss = MAX_RSS if max_rss is None else max_rss
+    low_memory = (LOW_MEMORY if low_memory is None else low_memory) or bool(max_rss)
+    fingerprints = PAGE_FINGERPRINTS if fingerprints is None else fingerprints
+    index = PageIndex(storage) if fingerprints else None
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        invoice_results = _split_statement(source, storage, low_memory, max_rss, index)
+        outcome = "ok"
+    finally:
+        PIPELINE_SECONDS.observe(time.perf_counter() - started, pipeline=PIPELINE, outcome=outcome)
+    return invoice_results
+
+
+def _split_statement(
+    source: PdfSource,
+    storage: Storage,
+    low_memory: bool,
+    max_rss: int,
+    index: Optional[PageIndex],
+) -> List[Dict]:
     invoice_results: List[Dict] = []
-    reader = PdfReader(str(pdf_path))
 
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        current_page_indices: List[int] = []
-        current_texts: List[str] = []
+    with open_pdf_source(source, use_mmap=not low_memory) as stream:
+        reader = PdfReader(_cursor(stream))
+        with pdfplumber.open(_cursor(stream)) as pdf:
+            current: List[_PendingPage] = []
 
-        for idx, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            is_start = detect_invoice_start(text)
+            def page_text(pending: _PendingPage) -> str:
+                if pending.text is None:
+                    stored = pending.record.get("text") if pending.record else None
+                    if stored is not None:
+                        pending.text = stored
+                    else:
+                        with _stage("extract_text"):
+                            pending.text = pending.page.extract_text() or ""
+                        if low_memory:
+                            pending.page.close()
+                return pending.text
 
-            if is_start and current_page_indices:
-                result = _finalize_invoice(reader, current_page_indices, current_texts, output_base)
+            def finalize() -> None:
+                result = None
+                if index is not None:
+                    known = index.known_invoice([pending.record for pending in current])
+                    if known:
+                        result = index.load_invoice(known)
+                        if result is not None:
+                            PIPELINE_INVOICES.inc(pipeline=PIPELINE, result="duplicate")
+                            result["duplicate"] = True
+                            result["pages"] = [current[0].index + 1, current[-1].index + 1]
+                if result is None:
+                    first_text, last_text = page_text(current[0]), page_text(current[-1])
+                    result = _finalize_invoice(
+                        reader, [pending.index for pending in current], [first_text, last_text], storage
+                    )
+                    if result:
+                        PIPELINE_INVOICES.inc(pipeline=PIPELINE, result="rendered")
+                    if result and index is not None:
+                        with _stage("fingerprint"):
+                            index.record_invoice(
+                                result, [pending.fingerprints for pending in current], first_text, last_text
+                            )
                 if result:
                     invoice_results.append(result)
-                current_page_indices = []
-                current_texts = []
+                if low_memory:
+                    _release_caches(pdf, reader)
+                rss = current_rss() if max_rss else None
+                if rss is not None and rss > max_rss:
+                    raise MemoryCeilingExceeded(
+                        f"Memory use reached {rss // (1024 * 1024)} MB after page {current[-1].index + 1}, "
+                        f"over the {max_rss // (1024 * 1024)} MB limit (PDF_MAX_RSS_MB)"
+                    )
+
+            for idx, page in enumerate(_iter_pages(pdf, low_memory)):
+                text = None
+                record = None
+                page_fingerprints: List[Optional[str]] = []
+                if index is not None:
+                    with _stage("fingerprint"):
+                        fingerprint = content_fingerprint(reader, idx)
+                        record = index.lookup(fingerprint)
+                    page_fingerprints.append(fingerprint)
+                if record is None:
+                    with _stage("extract_text"):
+                        text = page.extract_text() or ""
+                    PIPELINE_PAGES.inc(pipeline=PIPELINE, result="extracted")
+                    if low_memory:
+                        page.close()
+                    if index is not None:
+                        with _stage("fingerprint"):
+                            fingerprint = text_fingerprint(text)
+                            record = index.lookup(fingerprint)
+                        page_fingerprints.append(fingerprint)
+                else:
+                    PIPELINE_PAGES.inc(pipeline=PIPELINE, result="skipped")
+                with _stage("detect_boundary"):
+                    is_start = record["start"] if record else detect_invoice_start(text)
+
+                if is_start and current:
+                    finalize()
+                    current = []
 
-            if is_start or current_page_indices:
-                current_page_indices.append(idx)
-                current_texts.append(text)
+                if is_start or current:
+                    if len(current) > 1:
+                        current[-1].release()
+                    current.append(_PendingPage(idx, page, text, record, page_fingerprints))
 
-        if current_page_indices:
-            result = _finalize_invoice(reader, current_page_indices, current_texts, output_base)
-            if result:
-                invoice_results.append(result)
+            if current:
+                finalize()
 
     return invoice_results
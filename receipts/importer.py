@@ -0,0 +1,169 @@
+import csv
+import io
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import BinaryIO, Deque, Dict, List
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from invoices.models import Invoice, InvoiceLine
+from .models import ReceiptLine, ReceiptUpload
+
+PART_COLUMNS = ("part_number", "part", "part_no", "part #", "partnumber")
+QUANTITY_COLUMNS = ("quantity_received", "quantity", "qty", "qty_received", "received")
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+# ReceiptLine.quantity_received is an IntegerField: 32-bit on Postgres.
+MAX_QUANTITY = 2 ** 31 - 1
+
+
+def normalize_part_number(raw: str) -> str:
+  """Dock scanners and FCA invoices disagree on dashes/spaces; compare alphanumerics only."""
+  return re.sub(r"[^0-9A-Z]", "", (raw or "").upper())
+
+
+@dataclass
+class ReceiptImportResult:
+  rows: int = 0
+  matched: int = 0
+  unmatched: int = 0
+  skipped: int = 0
+  lines_updated: int = 0
+  errors: List[str] = field(default_factory=list)
+
+  def skip(self, row_number: int, reason: str) -> None:
+    self.skipped += 1
+    if len(self.errors) < MAX_REPORTED_ERRORS:
+      self.errors.append(f"Row {row_number}: {reason}")
+
+
+def build_open_line_index() -> Dict[str, Deque[List[int]]]:
+  """
+  Map normalized part number -> queue of [invoice_line_id, outstanding qty]
+  for every line not yet fully received, oldest invoice first. Built with a
+  single streamed query so matching never goes back to the database.
+  """
+  index: Dict[str, Deque[List[int]]] = defaultdict(deque)
+  rows = (
+    InvoiceLine.objects.filter(received_quantity__lt=F("quantity"))
+    .order_by("invoice__invoice_date", "invoice_id", "id")
+    .values_list("id", "part_number", "quantity", "received_quantity")
+  )
+  for pk, part_number, quantity, received in rows.iterator(chunk_size=5000):
+    index[normalize_part_number(part_number)].append([pk, quantity - received])
+  return index
+
+
+def _resolve_columns(fieldnames) -> tuple[str, str]:
+  by_name = {(name or "").strip().lower(): name for name in fieldnames or []}
+  part = next((by_name[c] for c in PART_COLUMNS if c in by_name), None)
+  quantity = next((by_name[c] for c in QUANTITY_COLUMNS if c in by_name), None)
+  if not part or not quantity:
+    raise ValueError(f"CSV needs a part number and a quantity column (got: {', '.join(by_name) or 'no header'})")
+  return part, quantity
+
+
+def _apply_received_increments(increments: Dict[int, int], chunk_size: int) -> int:
+  """
+  Bump `received_quantity` set-wise: lines are grouped by increment so each
+  distinct quantity is one `UPDATE ... WHERE id IN (...)` per chunk.
+  """
+  by_amount: Dict[int, List[int]] = defaultdict(list)
+  for pk, amount in increments.items():
+    by_amount[amount].append(pk)
+
+  now = timezone.now()
+  updated = 0
+  for amount, ids in by_amount.items():
+    for start in range(0, len(ids), chunk_size):
+      chunk = ids[start : start + chunk_size]
+      updated += InvoiceLine.objects.filter(id__in=chunk).update(
+        received_quantity=F("received_quantity") + amount,
+        updated_at=now,
+      )
+      # Touch the invoices too, so `updated_at__gte` polls of /api/invoices/ see the change.
+      Invoice.objects.filter(id__in=InvoiceLine.objects.filter(id__in=chunk).values("invoice_id")).update(updated_at=now)
+  return updated
+
+
+def import_receipt_csv(upload: ReceiptUpload, stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReceiptImportResult:
+  """
+  Stream a dock-scan CSV into `ReceiptLine`s for `upload`.
+
+  Rows are matched in memory against open invoice lines; a quantity larger
+  than a line's outstanding amount spills onto the next open line for the
+  same part, and whatever is left is stored unmatched. Receipt lines are
+  written with `bulk_create` in chunks and invoice lines are bumped with
+  set-based updates at the end, all in one transaction. Bad rows are
+  skipped; a CSV that cannot be read at all raises `ValueError`.
+  """
+  result = ReceiptImportResult()
+  text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+  try:
+    reader = csv.DictReader(text)
+    part_column, quantity_column = _resolve_columns(reader.fieldnames)
+
+    with transaction.atomic():
+      index = build_open_line_index()
+      increments: Dict[int, int] = defaultdict(int)
+      pending: List[ReceiptLine] = []
+
+      for row_number, row in enumerate(reader, start=2):
+        result.rows += 1
+        part_number = (row.get(part_column) or "").strip()
+        raw_quantity = (row.get(quantity_column) or "").strip()
+        if not part_number:
+          result.skip(row_number, "missing part number")
+          continue
+        try:
+          quantity = int(float(raw_quantity))
+        except (ValueError, OverflowError):  # "abc", "nan", "inf"
+          result.skip(row_number, f"bad quantity {raw_quantity!r}")
+          continue
+        if quantity <= 0:
+          result.skip(row_number, f"non-positive quantity {quantity}")
+          continue
+        if quantity > MAX_QUANTITY:
+          result.skip(row_number, f"quantity {raw_quantity} is too large")
+          continue
+
+        remaining = quantity
+        queue = index.get(normalize_part_number(part_number))
+        while remaining and queue:
+          entry = queue[0]
+          take = min(remaining, entry[1])
+          pending.append(ReceiptLine(upload=upload, part_number=part_number, quantity_received=take, invoice_line_id=entry[0]))
+          increments[entry[0]] += take
+          entry[1] -= take
+          remaining -= take
+          if entry[1] == 0:
+            queue.popleft()
+
+        if remaining == quantity:
+          result.unmatched += 1
+        else:
+          result.matched += 1
+        if remaining:
+          pending.append(ReceiptLine(upload=upload, part_number=part_number, quantity_received=remaining))
+
+        if len(pending) >= chunk_size:
+          ReceiptLine.objects.bulk_create(pending)
+          pending = []
+
+      if pending:
+        ReceiptLine.objects.bulk_create(pending)
+      result.lines_updated = _apply_received_increments(increments, chunk_size)
+
+      upload.processed_at = timezone.now()
+      upload.save(update_fields=["processed_at", "updated_at"])
+  except csv.Error as exc:
+    # Unreadable CSV (e.g. a field over csv.field_size_limit()): nothing was imported.
+    raise ValueError(f"malformed CSV near line {reader.line_num}: {exc}") from exc
+  finally:
+    text.detach()
+
+  return result
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from receipts.importer import DEFAULT_CHUNK_SIZE, import_receipt_csv
+from receipts.models import ReceiptUpload
+
+
+class Command(BaseCommand):
+  help = "Import a dock-scan receipt CSV, matching rows against open invoice lines."
+
+  def add_arguments(self, parser):
+    parser.add_argument("path", help="CSV file to import")
+    parser.add_argument("--user", help="Username to record as the uploader")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per bulk insert")
+
+  def handle(self, *args, **options):
+    path = Path(options["path"])
+    if not path.is_file():
+      raise CommandError(f"No such file: {path}")
+
+    uploaded_by = None
+    if options["user"]:
+      uploaded_by = User.objects.filter(username=options["user"]).first()
+      if uploaded_by is None:
+        raise CommandError(f"Unknown user {options['user']}")
+
+    upload = ReceiptUpload.objects.create(
+      uploaded_by=uploaded_by, source=ReceiptUpload.Source.CSV, filename=path.name
+    )
+    with path.open("rb") as stream:
+      try:
+        result = import_receipt_csv(upload, stream, chunk_size=options["chunk_size"])
+      except ValueError as exc:
+        raise CommandError(str(exc))
+
+    for error in result.errors:
+      self.stdout.write(self.style.WARNING(error))
+    self.stdout.write(self.style.SUCCESS(
+      f"Upload {upload.id}: {result.rows} rows, {result.matched} matched, {result.unmatched} unmatched, "
+      f"{result.skipped} skipped, {result.lines_updated} invoice lines updated"
+    ))
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from common.db import trigram_indexes
+
+
+class Migration(migrations.Migration):
+  atomic = False
+
+  dependencies = [
+    ("receipts", "0001_initial"),
+  ]
+
+  operations = [
+    trigram_indexes("receipts_receiptline", ["part_number"]),
+  ]
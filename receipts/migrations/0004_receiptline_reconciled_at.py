@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:33
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_checkpointed_lines(apps, schema_editor):
+    # Lines at or below the old id high-water mark were already reconciled.
+    JobCheckpoint = apps.get_model('common', 'JobCheckpoint')
+    ReceiptLine = apps.get_model('receipts', 'ReceiptLine')
+    checkpoint = JobCheckpoint.objects.filter(name='invoices.reconcile_receipts').first()
+    if checkpoint and checkpoint.position:
+        ReceiptLine.objects.filter(id__lte=checkpoint.position).update(reconciled_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('receipts', '0003_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receiptline',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='receiptline',
+            index=models.Index(condition=models.Q(('invoice_line__isnull', False), ('reconciled_at__isnull', True)), fields=['id'], name='receiptline_unreconciled_idx'),
+        ),
+        migrations.RunPython(mark_checkpointed_lines, migrations.RunPython.noop),
+    ]
@@ -22,6 +22,9 @@ class ReceiptUpload(TimeStampedModel):
   processed_at = models.DateTimeField(null=True, blank=True)
   notes = models.TextField(blank=True)
 
+  class Meta:
+    indexes = [models.Index(fields=["updated_at", "id"], name="receiptupload_updated_idx")]
+
   def __str__(self) -> str:
     return self.filename or f"Upload {self.id}"
 
@@ -31,6 +34,17 @@ class ReceiptLine(TimeStampedModel):
   part_number = models.CharField(max_length=128)
   quantity_received = models.IntegerField(default=0)
   invoice_line = models.ForeignKey(InvoiceLine, on_delete=models.SET_NULL, null=True, blank=True, related_name="receipt_lines")
+  # Set by invoices.reconciliation once the line's invoice has been reconciled.
+  reconciled_at = models.DateTimeField(null=True, blank=True)
+
+  class Meta:
+    indexes = [
+      models.Index(
+        fields=["id"],
+        name="receiptline_unreconciled_idx",
+        condition=models.Q(reconciled_at__isnull=True, invoice_line__isnull=False),
+      ),
+    ]
 
   def __str__(self) -> str:
     return f"{self.part_number} x{self.quantity_received}"
@@ -0,0 +1,19 @@
+from common.api import SparseFieldsSerializer
+from .models import ReceiptLine, ReceiptUpload
+
+
+class ReceiptLineSerializer(SparseFieldsSerializer):
+  class Meta:
+    model = ReceiptLine
+    fields = ["id", "part_number", "quantity_received", "invoice_line"]
+
+
+class ReceiptUploadSerializer(SparseFieldsSerializer):
+  lines = ReceiptLineSerializer(many=True, read_only=True)
+
+  class Meta:
+    model = ReceiptUpload
+    fields = ["id", "uploaded_by", "source", "filename", "processed_at", "notes", "lines", "created_at", "updated_at"]
+    expandable_fields = ["lines"]
+    prefetch_related = {"lines": "lines"}
+    validator_relations = {"lines": "lines"}
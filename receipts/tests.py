@@ -0,0 +1,39 @@
+import io
+
+from django.test import TestCase
+
+from invoices.models import Invoice, InvoiceLine
+from suppliers.models import Supplier
+from .importer import MAX_QUANTITY, import_receipt_csv
+from .models import ReceiptLine, ReceiptUpload
+
+
+class ReceiptImportQuantityTests(TestCase):
+  def setUp(self):
+    invoice = Invoice.objects.create(supplier=Supplier.objects.create(name="FCA"), invoice_number="INV1")
+    self.line = InvoiceLine.objects.create(invoice=invoice, part_number="68123456AA", quantity=5)
+    self.upload = ReceiptUpload.objects.create()
+
+  def _import(self, *rows):
+    body = "part_number,quantity\n" + "".join(f"{part},{quantity}\n" for part, quantity in rows)
+    return import_receipt_csv(self.upload, io.BytesIO(body.encode()))
+
+  def test_quantities_over_the_field_maximum_are_row_errors(self):
+    result = self._import(("68123456AA", "1e20"), ("68123456AA", str(MAX_QUANTITY + 1)), ("68123456AA", "2"))
+
+    self.assertEqual(result.rows, 3)
+    self.assertEqual(result.skipped, 2)
+    self.assertEqual(
+      result.errors,
+      ["Row 2: quantity 1e20 is too large", f"Row 3: quantity {MAX_QUANTITY + 1} is too large"],
+    )
+    self.assertEqual(list(ReceiptLine.objects.values_list("quantity_received", flat=True)), [2])
+    self.line.refresh_from_db()
+    self.assertEqual(self.line.received_quantity, 2)
+
+  def test_largest_storable_quantity_is_imported(self):
+    result = self._import(("99999999ZZ", str(MAX_QUANTITY)))
+
+    self.assertEqual(result.skipped, 0)
+    self.assertEqual(result.unmatched, 1)
+    self.assertEqual(ReceiptLine.objects.get().quantity_received, MAX_QUANTITY)
@@ -0,0 +1,12 @@
+from accounts.models import User
+from common.api import SyncReadOnlyViewSet
+from .models import ReceiptUpload
+from .serializers import ReceiptUploadSerializer
+
+
+class ReceiptUploadViewSet(SyncReadOnlyViewSet):
+  queryset = ReceiptUpload.objects.all()
+  serializer_class = ReceiptUploadSerializer
+  allowed_roles = [User.Role.ADMIN, User.Role.PARTS]
+  filterset_fields = {**SyncReadOnlyViewSet.filterset_fields, "source": ["exact"]}
+  search_fields = ["filename"]
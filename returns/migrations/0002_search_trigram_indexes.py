@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from common.db import trigram_indexes
+
+
+class Migration(migrations.Migration):
+  atomic = False
+
+  dependencies = [
+    ("returns", "0001_initial"),
+  ]
+
+  operations = [
+    trigram_indexes("returns_returnrequest", ["rma_number"]),
+  ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('returns', '0002_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='returnrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='returnrequest_updated_idx'),
+        ),
+    ]
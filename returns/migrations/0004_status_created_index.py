@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('returns', '0003_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='returnrequest',
+            index=models.Index(fields=['status', 'created_at'], name='returnrequest_status_age_idx'),
+        ),
+    ]
@@ -20,5 +20,11 @@ class ReturnRequest(TimeStampedModel):
   )
   refund_received_at = models.DateField(null=True, blank=True)
 
+  class Meta:
+    indexes = [
+      models.Index(fields=["updated_at", "id"], name="returnrequest_updated_idx"),
+      models.Index(fields=["status", "created_at"], name="returnrequest_status_age_idx"),
+    ]
+
   def __str__(self) -> str:
     return f"Return {self.id} for {self.invoice_line}"
@@ -0,0 +1,87 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from invoices.models import MONEY
+from .models import ReturnRequest
+
+# (label, oldest age in days that still falls in the bucket); the last bucket is open-ended.
+AGING_BUCKETS = (("0-30", 30), ("31-60", 60), ("61-90", 90), ("90+", None))
+AGING_CACHE_SECONDS = 60 * 60 * 24
+
+
+def _day_start(day: date) -> datetime:
+  return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _bucket_expression(as_of: date) -> Case:
+  whens = [
+    When(created_at__gte=_day_start(as_of - timedelta(days=max_age)), then=Value(label))
+    for label, max_age in AGING_BUCKETS
+    if max_age is not None
+  ]
+  return Case(*whens, default=Value(AGING_BUCKETS[-1][0]), output_field=CharField())
+
+
+def _empty_buckets() -> Dict[str, Dict]:
+  return {label: {"count": 0, "amount": Decimal("0.00")} for label, _ in AGING_BUCKETS}
+
+
+def build_refund_aging(as_of: date) -> Dict:
+  """
+  Money waiting on refunds, by supplier and age bucket, from one grouped
+  query. Amounts are the returned invoice line's `quantity * unit_price`.
+  """
+  rows = (
+    ReturnRequest.objects.filter(status=ReturnRequest.Status.WAITING)
+    .annotate(bucket=_bucket_expression(as_of), supplier_name=F("invoice_line__invoice__supplier__name"))
+    .values("supplier_name", "bucket")
+    .annotate(
+      count=Count("id"),
+      amount=Coalesce(
+        Sum(F("invoice_line__quantity") * F("invoice_line__unit_price"), output_field=MONEY),
+        Value(Decimal("0")),
+        output_field=MONEY,
+      ),
+    )
+    .order_by("supplier_name", "bucket")
+  )
+
+  suppliers: Dict[str, Dict] = {}
+  totals = _empty_buckets()
+  for row in rows:
+    supplier = suppliers.setdefault(row["supplier_name"], {"supplier": row["supplier_name"], "buckets": _empty_buckets()})
+    amount = Decimal(row["amount"]).quantize(Decimal("0.01"))
+    for target in (supplier["buckets"][row["bucket"]], totals[row["bucket"]]):
+      target["count"] += row["count"]
+      target["amount"] += amount
+
+  report_rows: List[Dict] = []
+  for supplier in suppliers.values():
+    supplier["total_count"] = sum(b["count"] for b in supplier["buckets"].values())
+    supplier["total_amount"] = sum((b["amount"] for b in supplier["buckets"].values()), Decimal("0.00"))
+    report_rows.append(supplier)
+
+  return {
+    "as_of": as_of,
+    "buckets": [label for label, _ in AGING_BUCKETS],
+    "rows": report_rows,
+    "totals": totals,
+    "total_count": sum(b["count"] for b in totals.values()),
+    "total_amount": sum((b["amount"] for b in totals.values()), Decimal("0.00")),
+  }
+
+
+def refund_aging(as_of: Optional[date] = None) -> Dict:
+  """`build_refund_aging`, cached once per calendar day."""
+  as_of = as_of or timezone.localdate()
+  return cache.get_or_set(
+    f"returns:refund-aging:{as_of.isoformat()}",
+    lambda: build_refund_aging(as_of),
+    AGING_CACHE_SECONDS,
+  )
@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from common.api import SparseFieldsSerializer
+from .models import ReturnRequest
+
+
+class ReturnRequestSerializer(SparseFieldsSerializer):
+  part_number = serializers.CharField(source="invoice_line.part_number", read_only=True)
+
+  class Meta:
+    model = ReturnRequest
+    fields = [
+      "id",
+      "invoice_line",
+      "part_number",
+      "status",
+      "reason",
+      "rma_number",
+      "created_by",
+      "refund_received_at",
+      "created_at",
+      "updated_at",
+    ]
+    select_related = {"part_number": "invoice_line"}
+    validator_relations = {"part_number": "invoice_line"}
@@ -0,0 +1,12 @@
+from accounts.models import User
+from common.api import SyncReadOnlyViewSet
+from .models import ReturnRequest
+from .serializers import ReturnRequestSerializer
+
+
+class ReturnRequestViewSet(SyncReadOnlyViewSet):
+  queryset = ReturnRequest.objects.all()
+  serializer_class = ReturnRequestSerializer
+  allowed_roles = [User.Role.ADMIN, User.Role.PARTS]
+  filterset_fields = {**SyncReadOnlyViewSet.filterset_fields, "status": ["exact"], "invoice_line": ["exact"]}
+  search_fields = ["rma_number", "invoice_line__part_number"]
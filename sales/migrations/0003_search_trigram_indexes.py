@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from common.db import trigram_indexes
+
+
+class Migration(migrations.Migration):
+  atomic = False
+
+  dependencies = [
+    ("sales", "0002_duebillrequest_add_fields"),
+  ]
+
+  operations = [
+    trigram_indexes("sales_duebillrequest", ["customer_name", "customer_number", "vin", "stock_number"]),
+    trigram_indexes("sales_duebillitem", ["part_number", "description"]),
+  ]
@@ -28,6 +28,9 @@ class DueBillRequest(TimeStampedModel):
   notes = models.TextField(blank=True)
   sent_to_parts_at = models.DateTimeField(null=True, blank=True)
 
+  class Meta:
+    indexes = [models.Index(fields=["updated_at", "id"], name="duebillrequest_updated_idx")]
+
   def __str__(self) -> str:
     return f"Due Bill {self.id} - {self.customer_name}"
 
@@ -48,6 +51,10 @@ class DueBillItem(TimeStampedModel):
   def __str__(self) -> str:
     return f"{self.description} ({self.status})"
 
+  def save(self, *args, **kwargs):
+    super().save(*args, **kwargs)
+    self.request.touch()
+
 
 class DueBillComment(TimeStampedModel):
   request = models.ForeignKey(DueBillRequest, on_delete=models.CASCADE, related_name="comments")
@@ -56,3 +63,7 @@ class DueBillComment(TimeStampedModel):
 
   def __str__(self) -> str:
     return f"Comment by {self.author} on {self.request}"
+
+  def save(self, *args, **kwargs):
+    super().save(*args, **kwargs)
+    self.request.touch()
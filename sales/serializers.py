@@ -0,0 +1,44 @@
+from common.api import SparseFieldsSerializer
+from .models import DueBillComment, DueBillItem, DueBillRequest
+
+
+class DueBillItemSerializer(SparseFieldsSerializer):
+  class Meta:
+    model = DueBillItem
+    fields = ["id", "description", "part_number", "status", "updated_at"]
+
+
+class DueBillCommentSerializer(SparseFieldsSerializer):
+  class Meta:
+    model = DueBillComment
+    fields = ["id", "author", "body", "created_at"]
+
+
+class DueBillRequestSerializer(SparseFieldsSerializer):
+  items = DueBillItemSerializer(many=True, read_only=True)
+  comments = DueBillCommentSerializer(many=True, read_only=True)
+
+  class Meta:
+    model = DueBillRequest
+    fields = [
+      "id",
+      "customer_name",
+      "customer_number",
+      "vin",
+      "stock_number",
+      "sales_consultant_name",
+      "vehicle_info",
+      "promised_date",
+      "status",
+      "requested_by",
+      "assigned_to",
+      "notes",
+      "sent_to_parts_at",
+      "items",
+      "comments",
+      "created_at",
+      "updated_at",
+    ]
+    expandable_fields = ["comments"]
+    prefetch_related = {"items": "items", "comments": "comments"}
+    validator_relations = {"items": "items", "comments": "comments"}
@@ -0,0 +1,46 @@
+from typing import Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from audit.writer import record as audit
+from .models import DueBillItem, DueBillRequest
+
+
+def apply_checklist(due_bill, completed_ids: Iterable[str], actor=None) -> int:
+  """
+  Apply a checklist submission: checked items become installed, unchecked
+  items go back to pending. Runs as at most two UPDATEs; audit events are
+  buffered and written after commit. Returns the number of items that changed.
+  """
+  completed = {int(pk) for pk in completed_ids if str(pk).isdigit()}
+
+  with transaction.atomic():
+    current = dict(due_bill.items.select_for_update().values_list("id", "status"))
+    transitions = {
+      DueBillItem.Status.INSTALLED: [pk for pk, status in current.items() if pk in completed and status != DueBillItem.Status.INSTALLED],
+      DueBillItem.Status.PENDING: [pk for pk, status in current.items() if pk not in completed and status != DueBillItem.Status.PENDING],
+    }
+
+    now = timezone.now()
+    for new_status, ids in transitions.items():
+      if ids:
+        DueBillItem.objects.filter(id__in=ids).update(status=new_status, updated_at=now)
+    if any(transitions.values()):
+      DueBillRequest.objects.filter(pk=due_bill.pk).update(updated_at=now)
+
+    changed = 0
+    for new_status, ids in transitions.items():
+      for pk in ids:
+        audit(
+          "duebill_item.status_changed",
+          actor=actor,
+          metadata={"due_bill": due_bill.pk, "from": current[pk], "to": new_status},
+          object_type="sales.DueBillItem",
+          object_id=pk,
+        )
+      changed += len(ids)
+    if changed:
+      due_bill.touch()
+
+  return changed
@@ -0,0 +1,12 @@
+from accounts.models import User
+from common.api import SyncReadOnlyViewSet
+from .models import DueBillRequest
+from .serializers import DueBillRequestSerializer
+
+
+class DueBillRequestViewSet(SyncReadOnlyViewSet):
+  queryset = DueBillRequest.objects.all()
+  serializer_class = DueBillRequestSerializer
+  allowed_roles = [User.Role.ADMIN, User.Role.SALES, User.Role.PARTS]
+  filterset_fields = {**SyncReadOnlyViewSet.filterset_fields, "status": ["exact"]}
+  search_fields = ["customer_name", "customer_number", "vin", "stock_number"]
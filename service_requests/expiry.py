@@ -0,0 +1,70 @@
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from notifications.models import Notification
+from .models import ServiceRequest
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def radio_expiry_dedupe_key(request_id: int, expiry_date) -> str:
+  # Keyed on the date too, so a corrected received_date gets its own warning.
+  return f"radio_expiry:{request_id}:{expiry_date.isoformat()}"
+
+
+def scan_radio_expiries(days: Optional[int] = None) -> int:
+  """
+  Queue a RADIO_EXPIRY notification for every radio whose `expiry_date`
+  falls within the next `days` days. The lookup is a range scan on the
+  (request_type, expiry_date) index, so history doesn't slow it down.
+  Notifications carry a dedupe key and go in with one batched insert that
+  ignores conflicts, so reruns (or overlapping workers) are no-ops.
+  Returns how many notifications were new.
+  """
+  days = settings.RADIO_EXPIRY_WARNING_DAYS if days is None else days
+  today = timezone.localdate()
+  now = timezone.now()
+
+  rows = (
+    ServiceRequest.objects.filter(
+      request_type=ServiceRequest.RequestType.RADIO,
+      expiry_date__gte=today,
+      expiry_date__lte=today + timedelta(days=days),
+    )
+    .exclude(status=ServiceRequest.Status.CANCELLED)
+    .values("id", "vin", "ro_number", "part_number", "customer_name", "expiry_date", "assigned_to__email", "created_by__email")
+  )
+  candidates = {radio_expiry_dedupe_key(row["id"], row["expiry_date"]): row for row in rows}
+  if not candidates:
+    return 0
+
+  existing = set(Notification.objects.filter(dedupe_key__in=list(candidates)).values_list("dedupe_key", flat=True))
+  notifications = []
+  for key, row in candidates.items():
+    if key in existing:
+      continue
+    recipient = settings.SERVICE_NOTIFICATION_EMAIL or row["assigned_to__email"] or row["created_by__email"]
+    if not recipient:
+      logger.warning("No recipient for radio expiry on service request %s", row["id"])
+      continue
+    notifications.append(Notification(
+      type=Notification.Type.RADIO_EXPIRY,
+      target_email=recipient,
+      subject=f"Radio for RO {row['ro_number'] or '-'} expires {row['expiry_date'].isoformat()}",
+      body=(
+        f"Service request #{row['id']} (VIN {row['vin'] or '-'}, part {row['part_number'] or '-'}, "
+        f"customer {row['customer_name'] or '-'}) reaches its radio expiry on {row['expiry_date'].isoformat()}."
+      ),
+      send_on=now,
+      payload={"service_request_id": row["id"], "expiry_date": row["expiry_date"].isoformat()},
+      dedupe_key=key,
+    ))
+
+  Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE, ignore_conflicts=True)
+  return len(notifications)
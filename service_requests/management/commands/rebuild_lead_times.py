@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from service_requests.metrics import rebuild_rollups
+
+
+class Command(BaseCommand):
+  help = "Recompute the service lead-time rollup table from scratch."
+
+  def handle(self, *args, **options):
+    groups = rebuild_rollups()
+    self.stdout.write(self.style.SUCCESS(f"Rebuilt {groups} lead-time rollup rows"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from service_requests.expiry import scan_radio_expiries
+
+
+class Command(BaseCommand):
+  help = "Queue notifications for radios expiring soon."
+
+  def add_arguments(self, parser):
+    parser.add_argument("--days", type=int, default=None, help="Look-ahead window (default: RADIO_EXPIRY_WARNING_DAYS)")
+
+  def handle(self, *args, **options):
+    created = scan_radio_expiries(days=options["days"])
+    self.stdout.write(self.style.SUCCESS(f"Queued {created} radio expiry notifications"))
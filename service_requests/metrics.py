@@ -0,0 +1,113 @@
+import math
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F
+from django.db.models.functions import TruncMonth
+
+from .models import LeadTimeRollup, ServiceRequest
+
+
+def percentile(histogram: Dict[str, int], q: float) -> Optional[int]:
+  """Nearest-rank percentile over a {days: count} histogram."""
+  total = sum(histogram.values())
+  if not total:
+    return None
+  rank = max(math.ceil(q * total), 1)
+  seen = 0
+  for days in sorted(histogram, key=int):
+    seen += histogram[days]
+    if seen >= rank:
+      return int(days)
+  return None
+
+
+def merge_histograms(histograms) -> Dict[str, int]:
+  merged: Dict[str, int] = defaultdict(int)
+  for histogram in histograms:
+    for days, count in histogram.items():
+      merged[days] += count
+  return dict(merged)
+
+
+def summarize(count: int, total_days: int, histogram: Dict[str, int]) -> Dict:
+  return {
+    "count": count,
+    "average": round(total_days / count, 1) if count else None,
+    "p90": percentile(histogram, 0.9),
+  }
+
+
+def rebuild_rollups(service_request_model=ServiceRequest, rollup_model=LeadTimeRollup) -> int:
+  """
+  Recompute every rollup row from `ServiceRequest`. The grouping (month,
+  types, lead time) is done in SQL, so only one row per distinct lead time
+  per group comes back. Also used by the backfill migration with historical
+  models.
+  """
+  rows = (
+    service_request_model.objects.filter(
+      ordered_date__isnull=False, received_date__isnull=False, received_date__gte=F("ordered_date")
+    )
+    .annotate(
+      month=TruncMonth("received_date"),
+      lead=ExpressionWrapper(F("received_date") - F("ordered_date"), output_field=DurationField()),
+    )
+    .values("month", "request_type", "warranty_type", "lead")
+    .annotate(n=Count("id"))
+    .order_by()
+  )
+  groups: Dict[tuple, Dict] = {}
+  for row in rows:
+    month = row["month"]
+    key = (month.date() if hasattr(month, "date") else month, row["request_type"], row["warranty_type"])
+    group = groups.setdefault(key, {"count": 0, "total_days": 0, "histogram": {}})
+    days = row["lead"].days
+    group["count"] += row["n"]
+    group["total_days"] += days * row["n"]
+    group["histogram"][str(days)] = group["histogram"].get(str(days), 0) + row["n"]
+
+  with transaction.atomic():
+    rollup_model.objects.all().delete()
+    rollup_model.objects.bulk_create(
+      [
+        rollup_model(month=month, request_type=request_type, warranty_type=warranty_type, **values)
+        for (month, request_type, warranty_type), values in groups.items()
+      ],
+      batch_size=500,
+    )
+  return len(groups)
+
+
+def lead_time_report(since: Optional[date] = None) -> Dict:
+  """Monthly rows plus per-type totals for the metrics page, read from the rollup only."""
+  rollups = LeadTimeRollup.objects.filter(count__gt=0)
+  if since:
+    rollups = rollups.filter(month__gte=since)
+
+  request_types = dict(ServiceRequest.RequestType.choices)
+  warranty_types = dict(ServiceRequest.WarrantyType.choices)
+  monthly: List[Dict] = []
+  totals: Dict[tuple, Dict] = {}
+  for rollup in rollups:
+    labels = {
+      "request_type": request_types.get(rollup.request_type, rollup.request_type),
+      "warranty_type": warranty_types.get(rollup.warranty_type, rollup.warranty_type),
+    }
+    monthly.append({"month": rollup.month, **labels, **summarize(rollup.count, rollup.total_days, rollup.histogram)})
+    total = totals.setdefault((rollup.request_type, rollup.warranty_type), {**labels, "count": 0, "total_days": 0, "histograms": []})
+    total["count"] += rollup.count
+    total["total_days"] += rollup.total_days
+    total["histograms"].append(rollup.histogram)
+
+  overall = [
+    {
+      "request_type": total["request_type"],
+      "warranty_type": total["warranty_type"],
+      **summarize(total["count"], total["total_days"], merge_histograms(total["histograms"])),
+    }
+    for _, total in sorted(totals.items())
+  ]
+  return {"monthly": monthly, "overall": overall}
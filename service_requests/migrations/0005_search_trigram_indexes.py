@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from common.db import trigram_indexes
+
+
+class Migration(migrations.Migration):
+  atomic = False
+
+  dependencies = [
+    ("service_requests", "0004_update_warranty_and_request_type_choices"),
+  ]
+
+  operations = [
+    trigram_indexes(
+      "service_requests_servicerequest",
+      ["part_number", "vin", "ro_number", "customer_name", "customer_number"],
+    ),
+  ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:24
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    from service_requests.metrics import rebuild_rollups
+
+    rebuild_rollups(apps.get_model('service_requests', 'ServiceRequest'), apps.get_model('service_requests', 'LeadTimeRollup'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0007_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadTimeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('request_type', models.CharField(choices=[('radio', 'Radio'), ('vor', 'VOR')], max_length=32)),
+                ('warranty_type', models.CharField(choices=[('mopar_warranty', 'Mopar Warranty'), ('customer_pay', 'Customer Pay'), ('regular_warranty', 'Regular Warranty'), ('good_will', 'Good Will')], max_length=32)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_days', models.BigIntegerField(default=0)),
+                ('histogram', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-month', 'request_type', 'warranty_type'],
+                'unique_together': {('month', 'request_type', 'warranty_type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
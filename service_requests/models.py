@@ -1,7 +1,7 @@
 from datetime import timedelta
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 from common.models import TimeStampedModel
 
@@ -44,13 +44,107 @@ class ServiceRequest(TimeStampedModel):
   )
   notes = models.TextField(blank=True)
 
+  class Meta:
+    indexes = [
+      models.Index(fields=["updated_at", "id"], name="servicerequest_updated_idx"),
+      models.Index(fields=["request_type", "expiry_date"], name="servicerequest_expiry_idx"),
+    ]
+
   def __str__(self) -> str:
     return f"{self.get_request_type_display()} ({self.vin or 'no VIN'})"
 
+  @classmethod
+  def from_db(cls, db, field_names, values):
+    instance = super().from_db(db, field_names, values)
+    if LEAD_TIME_FIELDS <= set(field_names):
+      instance._lead_time_key = instance.lead_time_key()
+    return instance
+
+  def lead_time_key(self):
+    """(month, request_type, warranty_type, days) this request adds to `LeadTimeRollup`, or None."""
+    if not (self.ordered_date and self.received_date) or self.received_date < self.ordered_date:
+      return None
+    return (
+      self.received_date.replace(day=1),
+      self.request_type,
+      self.warranty_type,
+      (self.received_date - self.ordered_date).days,
+    )
+
+  def _stored_lead_time_key(self):
+    if hasattr(self, "_lead_time_key"):
+      return self._lead_time_key
+    if self._state.adding or self.pk is None:
+      return None
+    stored = type(self).objects.filter(pk=self.pk).only(*LEAD_TIME_FIELDS).first()
+    return stored.lead_time_key() if stored else None
+
   def save(self, *args, **kwargs):
     if self.received_date:
       self.expiry_date = self.received_date + timedelta(days=30)
-    super().save(*args, **kwargs)
+    with transaction.atomic():
+      old_key = self._stored_lead_time_key()
+      super().save(*args, **kwargs)
+      new_key = self.lead_time_key()
+      if old_key != new_key:
+        LeadTimeRollup.move(old_key, new_key)
+    self._lead_time_key = new_key
+
+  def delete(self, *args, **kwargs):
+    with transaction.atomic():
+      old_key = self._stored_lead_time_key()
+      result = super().delete(*args, **kwargs)
+      LeadTimeRollup.move(old_key, None)
+    return result
+
+
+LEAD_TIME_FIELDS = {"ordered_date", "received_date", "request_type", "warranty_type"}
+
+
+class LeadTimeRollup(models.Model):
+  """
+  Order-to-receipt lead time per received month, request type and warranty
+  type, kept current by `ServiceRequest.save`. `histogram` maps lead days to
+  request counts, which is enough for exact percentiles without touching
+  the requests table. `service_requests.metrics.rebuild_rollups` recomputes it.
+  """
+
+  month = models.DateField()
+  request_type = models.CharField(max_length=32, choices=ServiceRequest.RequestType.choices)
+  warranty_type = models.CharField(max_length=32, choices=ServiceRequest.WarrantyType.choices)
+  count = models.PositiveIntegerField(default=0)
+  total_days = models.BigIntegerField(default=0)
+  histogram = models.JSONField(default=dict, blank=True)
+
+  class Meta:
+    unique_together = ("month", "request_type", "warranty_type")
+    ordering = ["-month", "request_type", "warranty_type"]
+
+  def __str__(self) -> str:
+    return f"{self.month:%Y-%m} {self.request_type}/{self.warranty_type}: {self.count}"
+
+  @classmethod
+  def adjust(cls, key, delta: int) -> None:
+    month, request_type, warranty_type, days = key
+    row, _ = cls.objects.select_for_update().get_or_create(
+      month=month, request_type=request_type, warranty_type=warranty_type
+    )
+    bucket = str(days)
+    remaining = row.histogram.get(bucket, 0) + delta
+    if remaining > 0:
+      row.histogram[bucket] = remaining
+    else:
+      row.histogram.pop(bucket, None)
+    row.count = max(row.count + delta, 0)
+    row.total_days += delta * days
+    row.save()
+
+  @classmethod
+  def move(cls, old_key, new_key) -> None:
+    if old_key:
+      cls.adjust(old_key, -1)
+    if new_key:
+      cls.adjust(new_key, 1)
 
 
 class ServiceRequestComment(TimeStampedModel):
@@ -60,3 +154,7 @@ class ServiceRequestComment(TimeStampedModel):
 
   def __str__(self) -> str:
     return f"Comment by {self.author} on {self.request}"
+
+  def save(self, *args, **kwargs):
+    super().save(*args, **kwargs)
+    self.request.touch()
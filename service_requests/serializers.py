@@ -0,0 +1,38 @@
+from common.api import SparseFieldsSerializer
+from .models import ServiceRequest, ServiceRequestComment
+
+
+class ServiceRequestCommentSerializer(SparseFieldsSerializer):
+  class Meta:
+    model = ServiceRequestComment
+    fields = ["id", "author", "body", "created_at"]
+
+
+class ServiceRequestSerializer(SparseFieldsSerializer):
+  comments = ServiceRequestCommentSerializer(many=True, read_only=True)
+
+  class Meta:
+    model = ServiceRequest
+    fields = [
+      "id",
+      "request_type",
+      "part_number",
+      "vin",
+      "ro_number",
+      "customer_name",
+      "customer_number",
+      "warranty_type",
+      "ordered_date",
+      "received_date",
+      "expiry_date",
+      "status",
+      "created_by",
+      "assigned_to",
+      "notes",
+      "comments",
+      "created_at",
+      "updated_at",
+    ]
+    expandable_fields = ["comments"]
+    prefetch_related = {"comments": "comments"}
+    validator_relations = {"comments": "comments"}
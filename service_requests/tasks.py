@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .expiry import scan_radio_expiries as run_scan
+
+
+@shared_task
+def scan_radio_expiries(days=None):
+  return run_scan(days=days)
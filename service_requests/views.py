@@ -0,0 +1,18 @@
+from accounts.models import User
+from common.api import SyncReadOnlyViewSet
+from .models import ServiceRequest
+from .serializers import ServiceRequestSerializer
+
+
+class ServiceRequestViewSet(SyncReadOnlyViewSet):
+  queryset = ServiceRequest.objects.all()
+  serializer_class = ServiceRequestSerializer
+  allowed_roles = [User.Role.ADMIN, User.Role.SERVICE, User.Role.PARTS]
+  filterset_fields = {
+    **SyncReadOnlyViewSet.filterset_fields,
+    "request_type": ["exact"],
+    "warranty_type": ["exact"],
+    "status": ["exact"],
+    "expiry_date": ["gte", "lte"],
+  }
+  search_fields = ["vin", "ro_number", "part_number", "customer_name", "customer_number"]
@@ -0,0 +1,52 @@
+"""
+Artifact storage shared by the Django apps and the FastAPI parser.
+
+`get_storage()` picks the backend from `ARTIFACT_STORAGE_URL`:
+
+- `file:///srv/partsuite/artifacts` (default: `output/` next to this package)
+- `s3://bucket/optional/prefix?endpoint_url=http://localhost:9000&region=us-east-1`
+  (credentials come from the usual AWS_* environment variables)
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+from .base import Storage, StorageError, StoredObject
+from .local import LocalStorage
+from .s3 import S3MultipartWriter, S3Storage
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_STORAGE_URL = (BASE_DIR / "output").as_uri()
+
+__all__ = [
+    "LocalStorage",
+    "S3MultipartWriter",
+    "S3Storage",
+    "Storage",
+    "StorageError",
+    "StoredObject",
+    "get_storage",
+    "storage_from_url",
+]
+
+
+def storage_from_url(url: str) -> Storage:
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "file"):
+        return LocalStorage(unquote(parsed.path) or url)
+    if parsed.scheme == "s3":
+        options = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+        return S3Storage(
+            bucket=parsed.netloc,
+            prefix=parsed.path,
+            endpoint_url=options.get("endpoint_url"),
+            region=options.get("region"),
+            part_size=int(options.get("part_size", 8 * 1024 * 1024)),
+        )
+    raise StorageError(f"Unsupported ARTIFACT_STORAGE_URL scheme: {parsed.scheme}")
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> Storage:
+    return storage_from_url(os.environ.get("ARTIFACT_STORAGE_URL", DEFAULT_STORAGE_URL))
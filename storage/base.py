@@ -0,0 +1,92 @@
+import io
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageError(Exception):
+    """Raised when an artifact cannot be read from or written to storage."""
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: datetime
+    accessed: Optional[datetime] = None
+
+    @property
+    def last_used(self) -> datetime:
+        return max(self.modified, self.accessed) if self.accessed else self.modified
+
+
+class Storage:
+    """
+    Minimal artifact store keyed by slash-separated strings.
+
+    Backends implement `open_write`, `open_read`, `exists`, `delete`,
+    `size` and `list`; everything else is built on those. Writers are
+    context managers that publish the object on a clean exit and discard it
+    if the block raises, so readers never see half-written files.
+    """
+
+    def open_write(self, key: str, content_type: str = "application/octet-stream") -> BinaryIO:
+        raise NotImplementedError
+
+    def open_read(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        raise NotImplementedError
+
+    def touch(self, key: str) -> None:
+        """Record a read for LRU eviction; backends without access times ignore it."""
+
+    def save(self, key: str, source: BinaryIO, content_type: str = "application/octet-stream") -> str:
+        with self.open_write(key, content_type) as target:
+            shutil.copyfileobj(source, target, DEFAULT_CHUNK_SIZE)
+        return key
+
+    def save_bytes(self, key: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+        return self.save(key, io.BytesIO(data), content_type)
+
+    def read_bytes(self, key: str) -> bytes:
+        with self.open_read(key) as handle:
+            return handle.read()
+
+    def iter_chunks(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open_read(key) as handle:
+            while True:
+                chunk = handle.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        """A filesystem path holding the object, for tools that only take paths."""
+        suffix = Path(key).suffix
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            with self.open_read(key) as handle:
+                shutil.copyfileobj(handle, tmp, DEFAULT_CHUNK_SIZE)
+            tmp.flush()
+            yield Path(tmp.name)
+
+    def describe(self, key: str) -> Optional[str]:
+        """Human-readable location, for logs and UI."""
+        return key
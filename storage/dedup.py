@@ -0,0 +1,132 @@
+"""
+Content-addressed helpers: artifacts are keyed by the SHA-256 of their
+bytes, so identical uploads and renders are stored once, and a parse
+result can be cached next to the upload it came from.
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from .base import DEFAULT_CHUNK_SIZE, Storage
+
+UPLOADS_PREFIX = "uploads"
+RESULTS_PREFIX = "results"
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_stream(handle) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: handle.read(DEFAULT_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_file(path) -> str:
+    with open(path, "rb") as handle:
+        return sha256_stream(handle)
+
+
+@contextmanager
+def _open_source(source):
+    """
+    A binary stream at offset 0 over a path, an open file (left open and
+    rewound afterwards), an mmap or a bytes-like object.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            yield handle
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+        return
+    source.seek(0)
+    try:
+        yield source
+    finally:
+        source.seek(0)
+
+
+def content_key(prefix: str, digest: str, suffix: str = ".pdf") -> str:
+    # Two-character fan-out keeps local directories small.
+    return f"{prefix}/{digest[:2]}/{digest}{suffix}"
+
+
+def put_bytes(
+    storage: Storage,
+    prefix: str,
+    data: bytes,
+    suffix: str = ".pdf",
+    content_type: str = "application/pdf",
+) -> str:
+    """Store `data` under its content key unless it is already there."""
+    key = content_key(prefix, sha256_bytes(data), suffix)
+    if storage.exists(key):
+        storage.touch(key)
+    else:
+        storage.save_bytes(key, data, content_type)
+    return key
+
+
+def put_file(
+    storage: Storage,
+    source,
+    prefix: str = UPLOADS_PREFIX,
+    suffix: str = ".pdf",
+    digest: Optional[str] = None,
+    content_type: str = "application/pdf",
+) -> Tuple[str, str]:
+    """
+    Store `source` (a path, open binary file, mmap or bytes) under its
+    content key, streaming it, and return `(digest, key)`.
+    """
+    if digest is None:
+        if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            digest = hashlib.sha256(source).hexdigest()
+        else:
+            with _open_source(source) as handle:
+                digest = sha256_stream(handle)
+    key = content_key(prefix, digest, suffix)
+    if storage.exists(key):
+        storage.touch(key)
+    else:
+        with _open_source(source) as handle:
+            storage.save(key, handle, content_type)
+    return digest, key
+
+
+def result_key(namespace: str, digest: str) -> str:
+    return f"{RESULTS_PREFIX}/{namespace}/{digest}.json"
+
+
+def load_result(storage: Storage, namespace: str, digest: str, artifact_keys: Optional[Callable[[Any], Iterable[str]]] = None) -> Any:
+    """
+    The cached result for an upload, or None. When `artifact_keys` is given
+    (a callable taking the result), every key it yields must still exist,
+    otherwise the result is treated as stale (e.g. collected by GC).
+    """
+    key = result_key(namespace, digest)
+    if not storage.exists(key):
+        return None
+    result = json.loads(storage.read_bytes(key))
+    if artifact_keys is not None:
+        keys = list(artifact_keys(result))
+        if not all(storage.exists(k) for k in keys):
+            return None
+        for k in keys:
+            storage.touch(k)
+    return result
+
+
+def save_result(storage: Storage, namespace: str, digest: str, result: Any) -> str:
+    return storage.save_bytes(
+        result_key(namespace, digest),
+        json.dumps(result, default=str).encode("utf-8"),
+        "application/json",
+    )
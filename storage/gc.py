@@ -0,0 +1,92 @@
+"""
+Retention for generated artifacts.
+
+`collect()` deletes objects whose last use is older than `max_age`, then,
+if what is left still exceeds `max_bytes`, evicts least recently used
+objects until it fits. Protected keys are never deleted but do count
+towards the size cap.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Collection, List, Optional
+
+from .base import Storage, StoredObject
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GCResult:
+    scanned: int = 0
+    scanned_bytes: int = 0
+    protected: int = 0
+    deleted: int = 0
+    reclaimed_bytes: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def remaining_bytes(self) -> int:
+        return self.scanned_bytes - self.reclaimed_bytes
+
+    def merge(self, other: "GCResult") -> "GCResult":
+        self.scanned += other.scanned
+        self.scanned_bytes += other.scanned_bytes
+        self.protected += other.protected
+        self.deleted += other.deleted
+        self.reclaimed_bytes += other.reclaimed_bytes
+        self.errors.extend(other.errors)
+        return self
+
+
+def collect(
+    storage: Storage,
+    max_bytes: Optional[int] = None,
+    max_age: Optional[timedelta] = None,
+    protected: Collection[str] = (),
+    prefix: str = "",
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+) -> GCResult:
+    now = now or datetime.now(timezone.utc)
+    result = GCResult()
+    candidates: List[StoredObject] = []
+
+    for obj in storage.list(prefix):
+        result.scanned += 1
+        result.scanned_bytes += obj.size
+        if obj.key in protected:
+            result.protected += 1
+        else:
+            candidates.append(obj)
+
+    candidates.sort(key=lambda obj: obj.last_used)
+    cutoff = now - max_age if max_age is not None else None
+    total = result.scanned_bytes
+
+    for obj in candidates:
+        expired = cutoff is not None and obj.last_used < cutoff
+        over_cap = max_bytes is not None and total > max_bytes
+        if not expired and not over_cap:
+            # Sorted oldest first: nothing later is expired, and we are under the cap.
+            break
+        if not dry_run:
+            try:
+                storage.delete(obj.key)
+            except Exception as exc:  # keep going; one bad object should not stop the sweep
+                result.errors.append(f"{obj.key}: {exc}")
+                continue
+        total -= obj.size
+        result.deleted += 1
+        result.reclaimed_bytes += obj.size
+
+    logger.info(
+        "Artifact GC%s: %d objects scanned (%d bytes), %d deleted, %d bytes reclaimed, %d protected",
+        " (dry run)" if dry_run else "",
+        result.scanned,
+        result.scanned_bytes,
+        result.deleted,
+        result.reclaimed_bytes,
+        result.protected,
+    )
+    return result
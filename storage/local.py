@@ -0,0 +1,140 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from .base import Storage, StorageError, StoredObject
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+class _AtomicFileWriter:
+    """Writes to a temp file next to the target and renames it into place on close."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+        self._handle = os.fdopen(fd, "wb")
+        self._tmp_path = Path(tmp_name)
+        self._path = path
+
+    def write(self, data) -> int:
+        return self._handle.write(data)
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        self._handle.flush()
+
+    def tell(self) -> int:
+        return self._handle.tell()
+
+    @property
+    def closed(self) -> bool:
+        return self._handle.closed
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self._handle.close()
+        # mkstemp creates 0600; give the artifact the mode a plain open() would.
+        os.chmod(self._tmp_path, 0o666 & ~_current_umask())
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        if not self._handle.closed:
+            self._handle.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class LocalStorage(Storage):
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise StorageError(f"Key escapes storage root: {key}")
+        return path
+
+    def open_write(self, key: str, content_type: str = "application/octet-stream") -> BinaryIO:
+        return _AtomicFileWriter(self.path(key))
+
+    def open_read(self, key: str) -> BinaryIO:
+        try:
+            handle = self.path(key).open("rb")
+        except FileNotFoundError as exc:
+            raise StorageError(f"No such artifact: {key}") from exc
+        self.touch(key)
+        return handle
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def delete(self, key: str) -> None:
+        path = self.path(key)
+        path.unlink(missing_ok=True)
+        # Drop directories emptied by the delete (content-addressed keys fan out a lot).
+        for parent in path.parents:
+            if parent == self.root or self.root not in parent.parents:
+                break
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+
+    def size(self, key: str) -> int:
+        return self.path(key).stat().st_size
+
+    def touch(self, key: str) -> None:
+        # Set atime explicitly: relatime/noatime mounts would otherwise not track reads.
+        path = self.path(key)
+        try:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        base = self.path(prefix) if prefix else self.root
+        if not base.exists():
+            return
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                if name.endswith(".part"):
+                    continue
+                path = Path(dirpath) / name
+                stat = path.stat()
+                yield StoredObject(
+                    key=path.relative_to(self.root).as_posix(),
+                    size=stat.st_size,
+                    modified=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    accessed=datetime.fromtimestamp(stat.st_atime, tz=timezone.utc),
+                )
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        path = self.path(key)
+        if not path.is_file():
+            raise StorageError(f"No such artifact: {key}")
+        self.touch(key)
+        yield path
+
+    def describe(self, key: str) -> str:
+        return str(self.path(key))
@@ -0,0 +1,94 @@
+"""
+Versioned cache of parse results.
+
+Entries are keyed by (document SHA-256, parser version) and stored as
+compact zlib-compressed JSON under `parsed/<namespace>/v<version>/`.
+Bumping a parser's version only invalidates that parser's entries: they
+are never read again and age out through artifact GC, while other
+namespaces keep theirs. Recently used entries also stay, still
+compressed, in a small in-process LRU so a results page can be rendered
+again without a storage round-trip.
+"""
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from .base import Storage
+from .dedup import content_key
+
+PARSED_PREFIX = "parsed"
+MEMORY_ENTRIES = 256
+
+_memory: "OrderedDict[Tuple[int, str], bytes]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def encode(result: Any) -> bytes:
+    return zlib.compress(json.dumps(result, separators=(",", ":"), default=str).encode("utf-8"), 6)
+
+
+def decode(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload))
+
+
+class ParseCache:
+    def __init__(
+        self,
+        storage: Storage,
+        namespace: str,
+        version: Any,
+        artifact_keys: Optional[Callable[[Any], Iterable[str]]] = None,
+    ):
+        self.storage = storage
+        self.namespace = namespace
+        self.version = str(version)
+        self.artifact_keys = artifact_keys
+
+    def key(self, digest: str) -> str:
+        return content_key(f"{PARSED_PREFIX}/{self.namespace}/v{self.version}", digest, ".json.z")
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        with _memory_lock:
+            _memory[(id(self.storage), key)] = payload
+            _memory.move_to_end((id(self.storage), key))
+            while len(_memory) > MEMORY_ENTRIES:
+                _memory.popitem(last=False)
+
+    def _recall(self, key: str) -> Optional[bytes]:
+        with _memory_lock:
+            payload = _memory.get((id(self.storage), key))
+            if payload is not None:
+                _memory.move_to_end((id(self.storage), key))
+            return payload
+
+    def get(self, digest: str) -> Any:
+        """
+        The cached result for `digest` under this version, or None. A fresh
+        copy is decoded on every call, so callers may mutate it. With
+        `artifact_keys`, every key it yields for the result must still
+        exist (e.g. not collected by GC), otherwise the entry is ignored.
+        """
+        key = self.key(digest)
+        payload = self._recall(key)
+        if payload is None:
+            if not self.storage.exists(key):
+                return None
+            payload = self.storage.read_bytes(key)
+            self._remember(key, payload)
+        result = decode(payload)
+        if self.artifact_keys is not None:
+            keys = list(self.artifact_keys(result))
+            if not all(self.storage.exists(k) for k in keys):
+                return None
+            for k in keys:
+                self.storage.touch(k)
+        return result
+
+    def put(self, digest: str, result: Any) -> str:
+        key = self.key(digest)
+        payload = encode(result)
+        self.storage.save_bytes(key, payload, "application/octet-stream")
+        self._remember(key, payload)
+        return key
@@ -0,0 +1,172 @@
+import io
+from typing import BinaryIO, Iterator, Optional
+
+from .base import DEFAULT_CHUNK_SIZE, Storage, StorageError, StoredObject
+
+# S3 rejects multipart parts under 5 MiB (except the last one).
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    File-like writer that streams to S3 in `part_size` chunks.
+
+    At most one part is buffered in memory. Objects that never fill a part go
+    up with a single PutObject; otherwise a multipart upload is started on
+    the first full part and completed on close. A failure (or leaving the
+    `with` block with an exception) aborts the upload so no parts linger.
+    """
+
+    def __init__(self, client, bucket: str, key: str, part_size: int = DEFAULT_PART_SIZE, content_type: str = "application/octet-stream"):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.content_type = content_type
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload_id: Optional[str] = None
+        self._written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._written
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed S3 writer")
+        view = memoryview(data).cast("B")
+        self._buffer += view
+        self._written += len(view)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(view)
+
+    def _upload_part(self, chunk: bytes) -> None:
+        try:
+            if self._upload_id is None:
+                response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key, ContentType=self.content_type)
+                self._upload_id = response["UploadId"]
+            number = len(self._parts) + 1
+            response = self.client.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=chunk
+            )
+            self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+        except Exception:
+            self.abort()
+            raise
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), ContentType=self.content_type)
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": self._parts}
+                )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            finally:
+                self._upload_id = None
+        self._buffer = bytearray()
+        if not self.closed:
+            super().close()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class S3Storage(Storage):
+    """S3 or S3-compatible (MinIO) backend. Needs `boto3` unless a client is passed in."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        client=None,
+    ):
+        if client is None:
+            try:
+                import boto3
+            except ImportError as exc:
+                raise StorageError("The S3 storage backend needs boto3 (pip install boto3)") from exc
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.part_size = part_size
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _is_missing(self, exc) -> bool:
+        error = getattr(exc, "response", {}).get("Error", {})
+        return str(error.get("Code")) in {"404", "NoSuchKey", "NotFound"}
+
+    def open_write(self, key: str, content_type: str = "application/octet-stream") -> BinaryIO:
+        return S3MultipartWriter(self.client, self.bucket, self._key(key), self.part_size, content_type)
+
+    def open_read(self, key: str) -> BinaryIO:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except Exception as exc:
+            if self._is_missing(exc):
+                raise StorageError(f"No such artifact: {key}") from exc
+            raise
+        return body
+
+    def iter_chunks(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        body = self.open_read(key)
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as exc:
+            if self._is_missing(exc):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"]
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                yield StoredObject(key=item["Key"][strip:], size=item["Size"], modified=item["LastModified"])
+
+    def describe(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
@@ -0,0 +1,43 @@
+"""/files/ only serves the split invoice PDFs, never uploads or cached parse data."""
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_STORAGE_URL", tmp_path.as_uri())
+    store = main.get_storage()
+    for key in (
+        "invoices/F123.pdf",
+        "summaries/F123_summary.pdf",
+        "mappings/F123_mapping.pdf",
+        "uploads/ab/ab12.pdf",
+        "parsed/splitter/v1/ab/ab12.json.z",
+        "fingerprints/text/ab/ab12.json",
+    ):
+        store.save_bytes(key, b"%PDF-1.4", "application/pdf")
+    return store
+
+
+@pytest.mark.parametrize("key", ["invoices/F123.pdf", "summaries/F123_summary.pdf", "mappings/F123_mapping.pdf"])
+def test_generated_pdfs_are_served(storage, key):
+    response = main.download_file(key)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        "uploads/ab/ab12.pdf",
+        "parsed/splitter/v1/ab/ab12.json.z",
+        "fingerprints/text/ab/ab12.json",
+        "invoices/../uploads/ab/ab12.pdf",
+        "invoices",
+    ],
+)
+def test_other_keys_are_not_found(storage, key):
+    with pytest.raises(HTTPException) as raised:
+        main.download_file(key)
+    assert raised.value.status_code == 404
@@ -0,0 +1,80 @@
+"""
+process_combined_pdf(low_memory=True) must not hold the whole statement:
+splitting a statement five times as long should barely move peak RSS.
+Each run happens in a fresh interpreter so ru_maxrss belongs to it alone.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from reportlab.pdfgen import canvas
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INVOICES = 40
+PAGES_EACH = 3
+# Allowed peak RSS growth (MB) from N to 5N invoices; holding every page costs far more.
+RSS_MARGIN_MB = 25
+
+CHILD = """
+import json, resource, sys
+from pdf_utils import process_combined_pdf
+results = process_combined_pdf(sys.argv[1], low_memory=True, fingerprints=False)
+print(json.dumps({
+    "invoices": len(results),
+    "peak_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def _statement(path: Path, invoices: int) -> Path:
+    pdf = canvas.Canvas(str(path))
+    total = invoices * PAGES_EACH
+    page = 0
+    for number in range(invoices):
+        for position in range(PAGES_EACH):
+            page += 1
+            if position == 0:
+                lines = [
+                    "MOPAR CANADA INC. - PARTS INVOICE",
+                    f"INVOICE NUMBER: 09308000 F{number:05d}",
+                    "INVOICE DATE: JANUARY 15, 2024",
+                ]
+            else:
+                lines = [f"PART {number}-{position}-{row} QTY 1 PRICE 12.34" for row in range(40)]
+            if position == PAGES_EACH - 1:
+                lines += ["ARC01217 FREIGHT CHARGE 120.50", "GST/HST @ 13% 15.67", "NET INVOICE AMOUNT 136.17"]
+            lines.append(f"PAGE {page} OF {total}")
+            y = 800
+            for line in lines:
+                pdf.drawString(50, y, line)
+                y -= 16
+            pdf.showPage()
+    pdf.save()
+    return path
+
+
+def _split(statement: Path, artifacts: Path) -> dict:
+    env = dict(os.environ, ARTIFACT_STORAGE_URL=artifacts.as_uri(), PDF_MAX_RSS_MB="0")
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD, str(statement)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ru_maxrss is reported in KB on Linux only")
+def test_low_memory_peak_rss_does_not_grow_with_page_count(tmp_path):
+    small = _split(_statement(tmp_path / "small.pdf", INVOICES), tmp_path / "small-artifacts")
+    large = _split(_statement(tmp_path / "large.pdf", INVOICES * 5), tmp_path / "large-artifacts")
+
+    assert small["invoices"] == INVOICES
+    assert large["invoices"] == INVOICES * 5
+    growth_mb = (large["peak_kb"] - small["peak_kb"]) / 1024
+    assert growth_mb < RSS_MARGIN_MB, f"peak RSS grew {growth_mb:.1f} MB from {INVOICES} to {INVOICES * 5} invoices"
@@ -7,6 +7,7 @@ from receipts.models import ReceiptUpload
 from returns.models import ReturnRequest
 from service_requests.models import ServiceRequest, ServiceRequestComment
 from sales.models import DueBillRequest, DueBillItem, DueBillComment
+from suppliers.models import Supplier
 
 
 class InvoiceCreateForm(forms.ModelForm):
@@ -19,6 +20,22 @@ class InvoiceCreateForm(forms.ModelForm):
     }
 
 
+class PeriodForm(forms.Form):
+  start_date = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+  end_date = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+
+  def clean(self):
+    cleaned_data = super().clean()
+    start, end = cleaned_data.get("start_date"), cleaned_data.get("end_date")
+    if start and end and start > end:
+      raise forms.ValidationError("Start date must be on or before end date.")
+    return cleaned_data
+
+
+class InvoiceExportForm(PeriodForm):
+  supplier = forms.ModelChoiceField(queryset=Supplier.objects.order_by("name"), required=False, empty_label="All suppliers")
+
+
 class InvoiceLineForm(forms.ModelForm):
   class Meta:
     model = InvoiceLine
@@ -26,6 +43,13 @@ class InvoiceLineForm(forms.ModelForm):
 
 
 class ReceiptUploadForm(forms.ModelForm):
+  csv_file = forms.FileField(
+    label="Receipt CSV",
+    required=False,
+    widget=forms.ClearableFileInput(attrs={"accept": ".csv,text/csv"}),
+    help_text="Dock scan export with part number and quantity columns.",
+  )
+
   class Meta:
     model = ReceiptUpload
     fields = ["filename", "source", "notes"]
@@ -33,6 +57,15 @@ class ReceiptUploadForm(forms.ModelForm):
       "notes": forms.Textarea(attrs={"rows": 3}),
     }
 
+  def clean(self):
+    cleaned_data = super().clean()
+    csv_file = cleaned_data.get("csv_file")
+    if csv_file:
+      cleaned_data["source"] = ReceiptUpload.Source.CSV
+      if not cleaned_data.get("filename"):
+        cleaned_data["filename"] = csv_file.name
+    return cleaned_data
+
 
 class ReturnRequestForm(forms.ModelForm):
   class Meta:
@@ -131,15 +164,24 @@ class MultipleFileInput(forms.ClearableFileInput):
   allow_multiple_selected = True
 
 
+class MultipleFileField(forms.FileField):
+  """FileField that validates each file of a multi-select and returns them as a list."""
+
+  def clean(self, data, initial=None):
+    if isinstance(data, (list, tuple)):
+      return [super(MultipleFileField, self).clean(item, initial) for item in data]
+    return [super().clean(data, initial)] if data else []
+
+
 class FCAInvoiceUploadForm(forms.Form):
-  files = forms.FileField(
+  files = MultipleFileField(
     label="Invoice PDFs",
     required=False,
     widget=MultipleFileInput(attrs={"multiple": True, "accept": "application/pdf"}),
   )
 
   def clean_files(self):
-    uploads = self.files.getlist("files")
+    uploads = self.cleaned_data["files"]
     if not uploads:
       raise forms.ValidationError("Please choose at least one PDF.")
     return uploads
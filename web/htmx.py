@@ -0,0 +1,17 @@
+def is_fragment_request(request) -> bool:
+  """
+  True for targeted HTMX swaps. Boosted navigation also sends HX-Request but
+  expects a full page, so it is excluded.
+  """
+  return request.headers.get("HX-Request") == "true" and request.headers.get("HX-Boosted") != "true"
+
+
+class FragmentTemplateMixin:
+  """Render `fragment_template_name` instead of the full page for HTMX swaps."""
+
+  fragment_template_name = None
+
+  def get_template_names(self):
+    if self.fragment_template_name and is_fragment_request(self.request):
+      return [self.fragment_template_name]
+    return super().get_template_names()
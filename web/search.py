@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+from django.db.models import QuerySet
+from django.urls import reverse
+
+from accounts.models import User
+from invoices.models import InvoiceLine
+from receipts.models import ReceiptLine
+from returns.models import ReturnRequest
+from service_requests.models import ServiceRequest
+from sales.models import DueBillItem, DueBillRequest
+
+# Trigram indexes only kick in from three characters; shorter terms would scan.
+MIN_QUERY_LENGTH = 3
+RESULTS_PER_DOMAIN = 10
+
+
+@dataclass(frozen=True)
+class SearchDomain:
+  key: str
+  label: str
+  roles: Sequence[str]
+  fields: Sequence[str]
+  queryset: Callable[[], QuerySet]
+  describe: Callable[[object], Dict[str, str]]
+
+  def visible_to(self, user) -> bool:
+    return user.is_superuser or user.role in self.roles
+
+  def search(self, term: str, limit: int) -> List[object]:
+    """
+    Per-column queries with a LIMIT and no ORDER BY, written as bare
+    `ILIKE`s (see common.db) so each can be answered from that column's
+    trigram index without sorting every match. Exact matches are fetched
+    first, so a long tail of substring hits can't crowd them out; substring
+    matches fill the remaining slots. The small merged set is ranked here:
+    exact matches first, then most recently updated.
+    """
+    rows = {}
+    for lookup in ("trgm_exact", "trgm_contains"):
+      if len(rows) >= limit:
+        break
+      for field in self.fields:
+        for row in self.queryset().filter(**{f"{field}__{lookup}": term}).order_by()[:limit]:
+          rows.setdefault(row.pk, row)
+
+    needle = term.lower()
+
+    def rank(row):
+      exact = any(str(_resolve(row, field) or "").lower() == needle for field in self.fields)
+      return (not exact, -row.updated_at.timestamp())
+
+    return sorted(rows.values(), key=rank)[:limit]
+
+
+def _resolve(obj, path: str):
+  for attr in path.split("__"):
+    obj = getattr(obj, attr, None)
+  return obj
+
+
+INVOICE_ROLES = (User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING)
+PARTS_ROLES = (User.Role.ADMIN, User.Role.PARTS)
+SERVICE_ROLES = (User.Role.ADMIN, User.Role.SERVICE, User.Role.PARTS)
+SALES_ROLES = (User.Role.ADMIN, User.Role.SALES, User.Role.PARTS)
+
+SEARCH_DOMAINS: List[SearchDomain] = [
+  SearchDomain(
+    key="invoice_lines",
+    label="Invoice lines",
+    roles=INVOICE_ROLES,
+    fields=("part_number", "description", "invoice__invoice_number"),
+    queryset=lambda: InvoiceLine.objects.select_related("invoice__supplier"),
+    describe=lambda line: {
+      "title": f"{line.part_number} x{line.quantity}",
+      "subtitle": f"{line.invoice.supplier.name} · Invoice {line.invoice.invoice_number} · {line.description}",
+      "url": reverse("invoice-detail", args=[line.invoice_id]),
+    },
+  ),
+  SearchDomain(
+    key="receipt_lines",
+    label="Receipt lines",
+    roles=INVOICE_ROLES,
+    fields=("part_number",),
+    queryset=lambda: ReceiptLine.objects.select_related("upload"),
+    describe=lambda line: {
+      "title": f"{line.part_number} x{line.quantity_received}",
+      "subtitle": f"Upload {line.upload}",
+      "url": reverse("receipt-list"),
+    },
+  ),
+  SearchDomain(
+    key="returns",
+    label="Returns",
+    roles=PARTS_ROLES,
+    fields=("rma_number", "invoice_line__part_number"),
+    queryset=lambda: ReturnRequest.objects.select_related("invoice_line"),
+    describe=lambda ret: {
+      "title": f"Return {ret.id} · {ret.invoice_line.part_number}",
+      "subtitle": f"{ret.get_status_display()} · RMA {ret.rma_number or '-'}",
+      "url": reverse("return-list"),
+    },
+  ),
+  SearchDomain(
+    key="service_requests",
+    label="Service requests",
+    roles=SERVICE_ROLES,
+    fields=("part_number", "vin", "ro_number", "customer_name", "customer_number"),
+    queryset=lambda: ServiceRequest.objects.all(),
+    describe=lambda req: {
+      "title": f"Service Request #{req.id} · {req.get_request_type_display()}",
+      "subtitle": f"VIN {req.vin or '-'} · RO {req.ro_number or '-'} · {req.customer_name or '-'}",
+      "url": reverse("service-detail", args=[req.pk]),
+    },
+  ),
+  SearchDomain(
+    key="due_bills",
+    label="Due bills",
+    roles=SALES_ROLES,
+    fields=("customer_name", "customer_number", "vin", "stock_number"),
+    queryset=lambda: DueBillRequest.objects.all(),
+    describe=lambda req: {
+      "title": f"Due Bill #{req.id} · {req.customer_name or '-'}",
+      "subtitle": f"VIN {req.vin or '-'} · Stock {req.stock_number or '-'} · {req.get_status_display()}",
+      "url": reverse("sales-detail", args=[req.pk]),
+    },
+  ),
+  SearchDomain(
+    key="due_bill_items",
+    label="Due bill items",
+    roles=SALES_ROLES,
+    fields=("part_number", "description"),
+    queryset=lambda: DueBillItem.objects.select_related("request"),
+    describe=lambda item: {
+      "title": f"{item.description} ({item.get_status_display()})",
+      "subtitle": f"Due Bill #{item.request_id} · Part {item.part_number or '-'}",
+      "url": reverse("sales-detail", args=[item.request_id]),
+    },
+  ),
+]
+
+
+def global_search(user, term: str, limit: int = RESULTS_PER_DOMAIN) -> List[Dict]:
+  """
+  Search every domain the user can see and return results grouped by domain.
+  Each domain runs bounded per-column queries; `limit + 1` rows tell us if there is more.
+  """
+  term = term.strip()
+  if len(term) < MIN_QUERY_LENGTH:
+    return []
+
+  groups: List[Dict] = []
+  for domain in SEARCH_DOMAINS:
+    if not domain.visible_to(user):
+      continue
+    rows = list(domain.search(term, limit + 1))
+    if not rows:
+      continue
+    groups.append({
+      "key": domain.key,
+      "label": domain.label,
+      "results": [domain.describe(row) for row in rows[:limit]],
+      "has_more": len(rows) > limit,
+    })
+  return groups
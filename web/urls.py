@@ -3,17 +3,25 @@ from django.contrib.auth import views as auth_views
 
 from .views import (
   DashboardView,
+  GlobalSearchView,
   InvoiceListView,
   InvoiceDetailView,
+  InvoiceFileDownloadView,
+  InvoiceExportView,
+  JournalView,
+  JournalExportDownloadView,
   InvoiceCreateView,
   InvoiceLineCreateView,
   FCAInvoiceParserView,
+  FCAInvoiceResultsView,
   ReceiptListView,
   ReceiptCreateView,
   ReturnListView,
   ReturnCreateView,
+  ReturnAgingView,
   ServiceRequestListView,
   ServiceRequestDetailView,
+  ServiceMetricsView,
   ServiceRequestCreateView,
   service_comment_add,
   DueBillListView,
@@ -23,23 +31,33 @@ from .views import (
   duebill_items_update,
   duebill_comment_add,
   duebill_send_to_parts,
+  metrics_view,
 )
 
 urlpatterns = [
   path("", DashboardView.as_view(), name="dashboard"),
   path("login/", auth_views.LoginView.as_view(template_name="registration/login.html"), name="login"),
   path("logout/", auth_views.LogoutView.as_view(), name="logout"),
+  path("search/", GlobalSearchView.as_view(), name="global-search"),
+  path("metrics", metrics_view, name="metrics"),
   path("invoices/", InvoiceListView.as_view(), name="invoice-list"),
   path("invoices/new/", InvoiceCreateView.as_view(), name="invoice-create"),
+  path("invoices/export/", InvoiceExportView.as_view(), name="invoice-export"),
+  path("invoices/journal/", JournalView.as_view(), name="journal"),
+  path("invoices/journal/<int:pk>/download/", JournalExportDownloadView.as_view(), name="journal-download"),
   path("invoices/fca-parser/", FCAInvoiceParserView.as_view(), name="fca-parser"),
+  path("invoices/fca-parser/results/<slug:digest>/", FCAInvoiceResultsView.as_view(), name="fca-parser-results"),
   path("invoices/<int:pk>/", InvoiceDetailView.as_view(), name="invoice-detail"),
+  path("invoices/files/<int:pk>/", InvoiceFileDownloadView.as_view(), name="invoice-file-download"),
   path("invoices/<int:invoice_pk>/lines/new/", InvoiceLineCreateView.as_view(), name="invoice-line-create"),
   path("receipts/", ReceiptListView.as_view(), name="receipt-list"),
   path("receipts/new/", ReceiptCreateView.as_view(), name="receipt-create"),
   path("returns/", ReturnListView.as_view(), name="return-list"),
   path("returns/new/", ReturnCreateView.as_view(), name="return-create"),
+  path("returns/aging/", ReturnAgingView.as_view(), name="return-aging"),
   path("service/", ServiceRequestListView.as_view(), name="service-list"),
   path("service/new/", ServiceRequestCreateView.as_view(), name="service-create"),
+  path("service/metrics/", ServiceMetricsView.as_view(), name="service-metrics"),
   path("service/<int:pk>/", ServiceRequestDetailView.as_view(), name="service-detail"),
   path("service/<int:pk>/comment/", service_comment_add, name="service-comment-add"),
   path("sales/", DueBillListView.as_view(), name="sales-list"),
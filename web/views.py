@@ -1,30 +1,39 @@
 from pathlib import Path
-import tempfile
+import csv
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404, redirect
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.utils import timezone
-from django.views.generic import TemplateView, ListView, DetailView, CreateView
+from django.views.decorators.http import require_GET
+from django.views.generic import TemplateView, ListView, DetailView, CreateView, View
 from django.forms import formset_factory
 
 from accounts.models import User
-from invoices.fca_parser import (
-  FCAInvoiceParser,
-  encode_pdf_for_download,
-  render_mapping_pdf,
-  render_summary_pdf,
-)
-from invoices.models import Invoice, InvoiceLine
+from audit.writer import record as audit
+from invoices.exports import archive_filename, stream_period_archive
+from invoices.fca_parser import encode_pdf_for_download
+from invoices.journal import account_totals, create_export, pending_lines, render_csv, render_json
+from invoices.models import Invoice, InvoiceFile, InvoiceLine, JournalExport, JournalLine
+from invoices.pipeline import cached_statement_results, process_statement_pdf
+from metrics import CONTENT_TYPE, REGISTRY, bearer_matches
+from receipts.importer import import_receipt_csv
 from receipts.models import ReceiptUpload
 from returns.models import ReturnRequest
+from returns.reports import refund_aging
+from service_requests.metrics import lead_time_report
 from service_requests.models import ServiceRequest
 from sales.models import DueBillRequest
+from sales.services import apply_checklist
+from storage import StorageError
 from .forms import (
   InvoiceCreateForm,
+  InvoiceExportForm,
+  PeriodForm,
   InvoiceLineForm,
   ReceiptUploadForm,
   ReturnRequestForm,
@@ -36,6 +45,20 @@ from .forms import (
   FCAInvoiceUploadForm,
 )
 from web.decorators import role_required
+from web.htmx import FragmentTemplateMixin, is_fragment_request
+from web.search import MIN_QUERY_LENGTH, global_search
+
+
+@require_GET
+def metrics_view(request):
+  """
+  Ingestion metrics in Prometheus text format, for scrapers rather than
+  users: a `Bearer <METRICS_TOKEN>` header or a staff session is required.
+  """
+  staff = request.user.is_active and request.user.is_staff
+  if not (staff or bearer_matches(request.headers.get("Authorization"), settings.METRICS_TOKEN)):
+    return HttpResponse("Unauthorized", status=401, content_type="text/plain")
+  return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -52,6 +75,20 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     return ctx
 
 
+class GlobalSearchView(LoginRequiredMixin, FragmentTemplateMixin, TemplateView):
+  template_name = "search/results.html"
+  fragment_template_name = "search/partials/results.html"
+
+  def get_context_data(self, **kwargs):
+    ctx = super().get_context_data(**kwargs)
+    query = self.request.GET.get("q", "").strip()
+    ctx["query"] = query
+    ctx["min_length"] = MIN_QUERY_LENGTH
+    ctx["too_short"] = 0 < len(query) < MIN_QUERY_LENGTH
+    ctx["groups"] = global_search(self.request.user, query)
+    return ctx
+
+
 @method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
 class InvoiceListView(LoginRequiredMixin, ListView):
   model = Invoice
@@ -59,12 +96,95 @@ class InvoiceListView(LoginRequiredMixin, ListView):
   template_name = "invoices/list.html"
   ordering = ["-invoice_date", "-created_at"]
 
+  def get_queryset(self):
+    return super().get_queryset().select_related("supplier").with_line_totals()
+
 
 @method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
 class InvoiceDetailView(LoginRequiredMixin, DetailView):
   model = Invoice
   template_name = "invoices/detail.html"
 
+  def get_queryset(self):
+    return super().get_queryset().select_related("supplier", "uploaded_by").with_line_totals()
+
+  def get_context_data(self, **kwargs):
+    ctx = super().get_context_data(**kwargs)
+    ctx["lines"] = self.object.lines.with_extended_total()
+    ctx["files"] = self.object.files.order_by("file_kind", "id")
+    return ctx
+
+
+@method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
+class InvoiceFileDownloadView(LoginRequiredMixin, View):
+  def get(self, request, pk):
+    invoice_file = get_object_or_404(InvoiceFile, pk=pk)
+    try:
+      handle = invoice_file.open()
+    except (OSError, StorageError):
+      raise Http404("File is no longer in storage.")
+    return FileResponse(handle, filename=Path(invoice_file.file_path).name, content_type="application/pdf")
+
+
+@method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
+class InvoiceExportView(LoginRequiredMixin, TemplateView):
+  template_name = "invoices/export.html"
+
+  def get(self, request, *args, **kwargs):
+    form = InvoiceExportForm(request.GET or None)
+    if not form.is_valid():
+      return self.render_to_response(self.get_context_data(form=form))
+
+    start, end, supplier = form.cleaned_data["start_date"], form.cleaned_data["end_date"], form.cleaned_data["supplier"]
+    response = StreamingHttpResponse(stream_period_archive(start, end, supplier), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{archive_filename(start, end, supplier)}"'
+    # Let nginx pass chunks through as they are produced rather than buffering the archive.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@method_decorator(role_required([User.Role.ADMIN, User.Role.ACCOUNTING]), name="dispatch")
+class JournalView(LoginRequiredMixin, TemplateView):
+  template_name = "invoices/journal.html"
+
+  def get_context_data(self, **kwargs):
+    ctx = super().get_context_data(**kwargs)
+    ctx.setdefault("form", PeriodForm())
+    pending = JournalLine.objects.filter(export__isnull=True)
+    ctx["pending_accounts"] = account_totals(pending)
+    ctx["pending_count"] = pending.count()
+    ctx["pending_adjustments"] = pending.filter(adjustment=True).count()
+    ctx["exports"] = JournalExport.objects.select_related("created_by")[:25]
+    return ctx
+
+  def post(self, request, *args, **kwargs):
+    form = PeriodForm(request.POST)
+    if not form.is_valid():
+      return self.render_to_response(self.get_context_data(form=form))
+    start, end = form.cleaned_data["start_date"], form.cleaned_data["end_date"]
+    if not pending_lines(start, end).exists():
+      messages.warning(request, "No unexported journal lines in that period.")
+      return redirect("journal")
+    batch = create_export(start, end, request.user)
+    audit("journal.exported", batch, request.user, {"lines": batch.line_count, "total": str(batch.total_amount)})
+    messages.success(request, f"Journal batch {batch.pk} created with {batch.line_count} lines.")
+    return redirect("journal")
+
+
+@method_decorator(role_required([User.Role.ADMIN, User.Role.ACCOUNTING]), name="dispatch")
+class JournalExportDownloadView(LoginRequiredMixin, View):
+  def get(self, request, pk):
+    batch = get_object_or_404(JournalExport, pk=pk)
+    if request.GET.get("format") == "json":
+      response = HttpResponse(render_json(batch), content_type="application/json")
+      extension = "json"
+    else:
+      response = HttpResponse(render_csv(batch), content_type="text/csv")
+      extension = "csv"
+    filename = f"journal-{batch.pk}-{batch.period_start.isoformat()}-to-{batch.period_end.isoformat()}.{extension}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
 
 @method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
 class InvoiceCreateView(LoginRequiredMixin, CreateView):
@@ -74,8 +194,10 @@ class InvoiceCreateView(LoginRequiredMixin, CreateView):
 
   def form_valid(self, form):
     form.instance.uploaded_by = self.request.user
+    response = super().form_valid(form)
+    audit("invoice.created", self.object, self.request.user, {"invoice_number": self.object.invoice_number})
     messages.success(self.request, "Invoice created.")
-    return super().form_valid(form)
+    return response
 
   def get_success_url(self):
     return reverse("invoice-detail", args=[self.object.pk])
@@ -105,6 +227,14 @@ class InvoiceLineCreateView(LoginRequiredMixin, CreateView):
     return reverse("invoice-detail", args=[self.invoice.pk])
 
 
+def _with_downloads(results):
+  for result in results:
+    if "error" not in result:
+      result["summary_b64"] = encode_pdf_for_download(result["summary_key"])
+      result["mapping_b64"] = encode_pdf_for_download(result["mapping_key"])
+  return results
+
+
 @method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
 class FCAInvoiceParserView(LoginRequiredMixin, TemplateView):
   template_name = "invoices/fca_tool.html"
@@ -121,40 +251,24 @@ class FCAInvoiceParserView(LoginRequiredMixin, TemplateView):
     if not form.is_valid():
       return self.render_to_response(ctx)
 
-    output_dir = Path(settings.BASE_DIR) / "invoices" / "generated"
-
     for upload in form.cleaned_data["files"]:
-      with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        for chunk in upload.chunks():
-          tmp.write(chunk)
-        tmp_path = Path(tmp.name)
-
-      try:
-        parser = FCAInvoiceParser(tmp_path)
-        parsed_invoices = parser.parse()
-      except Exception as exc:
-        ctx["results"].append({
-          "source_name": upload.name,
-          "error": str(exc),
-        })
-        tmp_path.unlink(missing_ok=True)
-        continue
+      # Parsed where Django left it: read from memory for small uploads, or in
+      # place from the temp file FILE_UPLOAD_MAX_MEMORY_SIZE spilled it to.
+      ctx["results"].extend(_with_downloads(process_statement_pdf(upload, upload.name)))
 
-      for parsed in parsed_invoices:
-        summary_path = render_summary_pdf(parsed, output_dir)
-        mapping_path = render_mapping_pdf(parsed, output_dir)
-        ctx["results"].append({
-          "source_name": upload.name,
-          "invoice": parsed,
-          "summary_path": summary_path,
-          "mapping_path": mapping_path,
-          "summary_b64": encode_pdf_for_download(summary_path),
-          "mapping_b64": encode_pdf_for_download(mapping_path),
-        })
+    return self.render_to_response(ctx)
 
-      tmp_path.unlink(missing_ok=True)
 
-    return self.render_to_response(ctx)
+class FCAInvoiceResultsView(FCAInvoiceParserView):
+  """A statement's parse results straight from the parse cache, without the upload."""
+
+  http_method_names = ["get"]
+
+  def get(self, request, digest):
+    results = cached_statement_results(digest)
+    if results is None:
+      raise Http404("No cached parse for this statement; upload it again.")
+    return self.render_to_response(self.get_context_data(results=_with_downloads(results)))
 
 
 @method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS]), name="dispatch")
@@ -173,8 +287,25 @@ class ReceiptCreateView(LoginRequiredMixin, CreateView):
 
   def form_valid(self, form):
     form.instance.uploaded_by = self.request.user
-    messages.success(self.request, "Receipt upload logged.")
-    return super().form_valid(form)
+    csv_file = form.cleaned_data.get("csv_file")
+    if not csv_file:
+      messages.success(self.request, "Receipt upload logged.")
+      return super().form_valid(form)
+
+    response = super().form_valid(form)
+    try:
+      result = import_receipt_csv(self.object, csv_file.file)
+    except ValueError as exc:
+      messages.error(self.request, f"Receipt logged but the CSV could not be imported: {exc}")
+      return response
+
+    messages.success(
+      self.request,
+      f"Imported {result.rows} rows: {result.matched} matched, {result.unmatched} unmatched, {result.skipped} skipped.",
+    )
+    for error in result.errors[:5]:
+      messages.warning(self.request, error)
+    return response
 
   def get_success_url(self):
     return reverse("receipt-list")
@@ -203,14 +334,69 @@ class ReturnCreateView(LoginRequiredMixin, CreateView):
     return reverse("return-list")
 
 
+@method_decorator(role_required([User.Role.ADMIN, User.Role.PARTS, User.Role.ACCOUNTING]), name="dispatch")
+class ReturnAgingView(LoginRequiredMixin, TemplateView):
+  template_name = "returns/aging.html"
+
+  def get(self, request, *args, **kwargs):
+    if request.GET.get("format") == "csv":
+      return self.render_csv(refund_aging())
+    return super().get(request, *args, **kwargs)
+
+  def get_context_data(self, **kwargs):
+    ctx = super().get_context_data(**kwargs)
+    ctx["report"] = refund_aging()
+    return ctx
+
+  def render_csv(self, report):
+    response = HttpResponse(content_type="text/csv")
+    filename = f"refund-aging-{report['as_of'].isoformat()}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    writer = csv.writer(response)
+    header = ["Supplier"]
+    for bucket in report["buckets"]:
+      header += [f"{bucket} count", f"{bucket} amount"]
+    writer.writerow(header + ["Total count", "Total amount"])
+    for row in report["rows"] + [{"supplier": "Total", "buckets": report["totals"], "total_count": report["total_count"], "total_amount": report["total_amount"]}]:
+      cells = [row["supplier"]]
+      for bucket in report["buckets"]:
+        cells += [row["buckets"][bucket]["count"], row["buckets"][bucket]["amount"]]
+      writer.writerow(cells + [row["total_count"], row["total_amount"]])
+    return response
+
+
 @method_decorator(role_required([User.Role.ADMIN, User.Role.SERVICE, User.Role.PARTS]), name="dispatch")
-class ServiceRequestListView(LoginRequiredMixin, ListView):
+class ServiceRequestListView(LoginRequiredMixin, FragmentTemplateMixin, ListView):
   model = ServiceRequest
   paginate_by = 25
   template_name = "service/list.html"
+  fragment_template_name = "service/partials/rows.html"
   ordering = ["-created_at"]
 
 
+@method_decorator(role_required([User.Role.ADMIN, User.Role.SERVICE, User.Role.PARTS]), name="dispatch")
+class ServiceMetricsView(LoginRequiredMixin, TemplateView):
+  template_name = "service/metrics.html"
+  period_choices = (6, 12, 24, 60)
+
+  def get_context_data(self, **kwargs):
+    ctx = super().get_context_data(**kwargs)
+    try:
+      months = int(self.request.GET.get("months", 12))
+    except ValueError:
+      months = 12
+    if months and months not in self.period_choices:
+      # Only the offered periods (0 is "All"); anything else would build an invalid date.
+      months = 12
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - months
+    since = today.replace(year=index // 12, month=index % 12 + 1, day=1) if months else None
+    ctx["months"] = months
+    ctx["period_choices"] = self.period_choices
+    ctx["report"] = lead_time_report(since)
+    return ctx
+
+
 @method_decorator(role_required([User.Role.ADMIN, User.Role.SERVICE, User.Role.PARTS]), name="dispatch")
 class ServiceRequestDetailView(LoginRequiredMixin, DetailView):
   model = ServiceRequest
@@ -236,24 +422,28 @@ class ServiceRequestCreateView(LoginRequiredMixin, CreateView):
 def service_comment_add(request, pk):
   if request.method != "POST":
     return redirect("service-detail", pk=pk)
-  req = ServiceRequest.objects.get(pk=pk)
+  req = get_object_or_404(ServiceRequest, pk=pk)
   form = ServiceRequestCommentForm(request.POST)
   if form.is_valid():
     comment = form.save(commit=False)
     comment.request = req
     comment.author = request.user
     comment.save()
+    audit("service_comment.created", comment, request.user, {"service_request": req.pk})
     messages.success(request, "Comment added.")
   else:
     messages.error(request, "Could not add comment.")
+  if is_fragment_request(request):
+    return render(request, "service/partials/comments.html", {"object": req, "fragment": True})
   return redirect("service-detail", pk=pk)
 
 
 @method_decorator(role_required([User.Role.ADMIN, User.Role.SALES, User.Role.PARTS]), name="dispatch")
-class DueBillListView(LoginRequiredMixin, ListView):
+class DueBillListView(LoginRequiredMixin, FragmentTemplateMixin, ListView):
   model = DueBillRequest
   paginate_by = 25
   template_name = "sales/list.html"
+  fragment_template_name = "sales/partials/rows.html"
   ordering = ["-created_at"]
 
 
@@ -312,15 +502,18 @@ class DueBillCreateView(LoginRequiredMixin, CreateView):
 def duebill_item_add(request, pk):
   if request.method != "POST":
     return redirect("sales-detail", pk=pk)
-  req = DueBillRequest.objects.get(pk=pk)
+  req = get_object_or_404(DueBillRequest, pk=pk)
   form = DueBillItemForm(request.POST)
   if form.is_valid():
     item = form.save(commit=False)
     item.request = req
     item.save()
+    audit("duebill_item.created", item, request.user, {"due_bill": req.pk})
     messages.success(request, "Item added.")
   else:
     messages.error(request, "Could not add item.")
+  if is_fragment_request(request):
+    return render(request, "sales/partials/items.html", {"object": req, "fragment": True})
   return redirect("sales-detail", pk=pk)
 
 
@@ -330,22 +523,15 @@ def duebill_items_update(request, pk):
   if request.method != "POST":
     return redirect("sales-detail", pk=pk)
 
-  completed_ids = set(request.POST.getlist("completed"))
-  updated = 0
-
-  for item in req.items.all():
-    should_complete = str(item.id) in completed_ids
-    new_status = req.items.model.Status.INSTALLED if should_complete else req.items.model.Status.PENDING
-    if item.status != new_status:
-      item.status = new_status
-      item.save(update_fields=["status"])
-      updated += 1
+  updated = apply_checklist(req, request.POST.getlist("completed"), actor=request.user)
 
   if updated:
     messages.success(request, "Checklist updated.")
   else:
     messages.info(request, "No changes made to items.")
 
+  if is_fragment_request(request):
+    return render(request, "sales/partials/items.html", {"object": req, "fragment": True})
   return redirect("sales-detail", pk=pk)
 
 
@@ -353,16 +539,19 @@ def duebill_items_update(request, pk):
 def duebill_comment_add(request, pk):
   if request.method != "POST":
     return redirect("sales-detail", pk=pk)
-  req = DueBillRequest.objects.get(pk=pk)
+  req = get_object_or_404(DueBillRequest, pk=pk)
   form = DueBillCommentForm(request.POST)
   if form.is_valid():
     comment = form.save(commit=False)
     comment.request = req
     comment.author = request.user
     comment.save()
+    audit("duebill_comment.created", comment, request.user, {"due_bill": req.pk})
     messages.success(request, "Comment added.")
   else:
     messages.error(request, "Could not add comment.")
+  if is_fragment_request(request):
+    return render(request, "sales/partials/comments.html", {"object": req, "fragment": True})
   return redirect("sales-detail", pk=pk)
 
 
@@ -374,11 +563,14 @@ def duebill_send_to_parts(request, pk):
 
   if req.sent_to_parts_at:
     messages.info(request, "This request has already been sent to parts.")
-    return redirect("sales-detail", pk=pk)
-
-  req.sent_to_parts_at = timezone.now()
-  if req.status == DueBillRequest.Status.OPEN:
-    req.status = DueBillRequest.Status.IN_PROGRESS
-  req.save(update_fields=["sent_to_parts_at", "status"])
-  messages.success(request, "Request sent to parts department.")
+  else:
+    req.sent_to_parts_at = timezone.now()
+    if req.status == DueBillRequest.Status.OPEN:
+      req.status = DueBillRequest.Status.IN_PROGRESS
+    req.save(update_fields=["sent_to_parts_at", "status", "updated_at"])
+    audit("duebill.sent_to_parts", req, request.user, {"status": req.status})
+    messages.success(request, "Request sent to parts department.")
+
+  if is_fragment_request(request):
+    return render(request, "sales/partials/dispatch.html", {"object": req, "fragment": True})
   return redirect("sales-detail", pk=pk)